@@ -0,0 +1,72 @@
+"""회로 차단기 / 적응형 타임아웃 / 헤지 요청 시나리오 (로컬 가짜 서버)
+
+실행: python -m benchmarks.bench_circuit_breaker
+
+1. 정상: 지연 표본이 쌓이며 타임아웃이 p95 에 맞춰 줄어듦
+2. 장애: 오류율이 기준을 넘으면 회로 open, 이후 요청은 바로 대체 메시지
+3. 회복: cooldown 후 half-open 시험 요청 성공 → closed
+4. 꼬리 지연: 헤지 요청으로 느린 응답을 우회
+"""
+import asyncio
+import os
+import time
+
+from benchmarks.stub_llm_server import StubLLMServer
+
+DICE_RESULT = {'total': 12, 'notation': '1d20', 'success_level': 'success', 'username': '노루'}
+
+
+async def run_calls(generator, count: int) -> list:
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await generator.generate_brown_message(DICE_RESULT)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def summary(latencies: list) -> str:
+    ordered = sorted(latencies)
+    return (f"p50 {ordered[len(ordered) // 2] * 1000:.0f}ms / "
+            f"p95 {ordered[int(len(ordered) * 0.95) - 1] * 1000:.0f}ms / "
+            f"max {ordered[-1] * 1000:.0f}ms")
+
+
+async def main():
+    server = StubLLMServer(latency=0.05, jitter=0.02, seed=0)
+    os.environ['PERPLEXITY_API_URL'] = await server.start()
+    os.environ.setdefault('BREAKER_COOLDOWN', '1')
+    os.environ['PERPLEXITY_HEDGE'] = '1'
+    os.environ['LLM_PROVIDERS'] = 'perplexity'
+
+    from utils.perplexity_generator import PerplexityGenerator
+    generator = PerplexityGenerator()
+    provider = generator.router.providers[0]
+    breaker = provider.breaker
+
+    print("1) 정상")
+    print(f"   {summary(await run_calls(generator, 30))}, {breaker.stats()}")
+
+    print("2) 장애 (오류율 100%)")
+    server.error_rate = 1.0
+    calls_before = server.calls
+    print(f"   {summary(await run_calls(generator, 40))}")
+    print(f"   실제 전송 {server.calls - calls_before}회 / 40회, {breaker.stats()}")
+
+    print("3) 회복")
+    server.error_rate = 0.0
+    await asyncio.sleep(breaker.cooldown)
+    await run_calls(generator, 5)
+    print(f"   {breaker.stats()}")
+
+    print("4) 꼬리 지연 (10% 요청이 1초) + 헤지")
+    server.slow_rate, server.slow_latency = 0.1, 1.0
+    hedged_before = provider.hedged_requests
+    print(f"   {summary(await run_calls(generator, 50))}, 헤지 요청 {provider.hedged_requests - hedged_before}회")
+
+    await generator.close()
+    await server.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,44 @@
+"""동시 [1d20] 메시지 처리 시간 측정 (로컬 스텁 서버 사용)
+
+실행: python -m benchmarks.bench_concurrent_rolls [메시지 수] [지연(초)]
+
+비동기 HTTP 전송이 제대로 동작하면 N개의 메시지가
+LLM 왕복 약 1회 시간 안에 모두 처리되어야 합니다.
+(연결 풀 크기 PERPLEXITY_POOL_SIZE 보다 많으면 그만큼 나뉘어 처리됨)
+"""
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from benchmarks.fake_discord import FakeMessage
+from benchmarks.stub_llm_server import StubLLMServer
+
+
+async def run(count: int, latency: float):
+    server = StubLLMServer(latency=latency)
+    os.environ['PERPLEXITY_API_URL'] = await server.start()
+    os.environ.setdefault('LLM_PROVIDERS', 'perplexity')
+
+    # 환경 변수 설정 이후에 임포트해야 스텁 URL이 반영됨
+    from cogs.dice_roller import DiceRoller
+    cog = DiceRoller(SimpleNamespace(user=None))
+
+    messages = [FakeMessage('[1d20]', i) for i in range(count)]
+    started = time.perf_counter()
+    await asyncio.gather(*(cog.on_message(m) for m in messages))
+    elapsed = time.perf_counter() - started
+
+    await cog.cog_unload()
+    await server.stop()
+
+    replied = sum(1 for m in messages if m.replies)
+    print(f'메시지 {count}개 / 응답 {replied}개 / API 호출 {server.calls}회')
+    print(f'총 소요: {elapsed:.3f}s (LLM 1회 왕복 = {latency:.3f}s, 순차 처리 시 ≈ {latency * count:.1f}s)')
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    lat = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    asyncio.run(run(n, lat))
@@ -0,0 +1,41 @@
+"""주사위 엔진 처리량 측정 (풀 크기별, 백엔드별)
+
+실행: python -m benchmarks.bench_dice_engine
+"""
+import time
+
+from utils.dice_engine import DiceEngine, load_numpy, sum_distribution
+
+POOL_SIZES = (10, 100, 1_000, 100_000, 10_000_000)
+
+
+def bench_roll_sum(engine: DiceEngine, num_dice: int, dice_sides: int = 6) -> float:
+    """초당 생성한 주사위 수"""
+    repeat = max(1, 1_000_000 // num_dice)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        engine.roll_sum(num_dice, dice_sides)
+    elapsed = time.perf_counter() - started
+    return num_dice * repeat / elapsed
+
+
+def main():
+    engines = [DiceEngine(seed=0, use_numpy=False)]
+    if load_numpy() is not None:
+        engines.append(DiceEngine(seed=0, use_numpy=True))
+
+    print("roll_sum 처리량 (주사위/초)")
+    for engine in engines:
+        for size in POOL_SIZES:
+            print(f"  {engine.backend:>6} {size:>10}d6: {bench_roll_sum(engine, size):>14,.0f}")
+
+    print("\n확률 분포 계산 (최초 계산, 캐시 미적용)")
+    for num_dice, dice_sides in ((3, 6), (10, 100), (50, 100), (20, 1000)):
+        sum_distribution.cache_clear()
+        started = time.perf_counter()
+        sum_distribution(num_dice, dice_sides)
+        print(f"  {num_dice}d{dice_sides}: {(time.perf_counter() - started) * 1000:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""LLM 라우터 시나리오 (로컬 가짜 서버 2대, 네트워크 불필요)
+
+실행: python -m benchmarks.bench_llm_router
+
+1. 지연 기반 선택: perplexity(느림) / gemini(빠름) 중 빠른 쪽으로 요청이 몰림
+2. 장애 전환: 빠른 쪽이 전부 503 을 내면 회로가 열리고 느린 쪽으로 자동 전환
+3. 전체 장애: 두 서버 모두 실패하면 offline 제공자가 응답
+"""
+import asyncio
+import os
+import time
+
+from benchmarks.stub_llm_server import StubLLMServer
+
+MESSAGES = [{'role': 'system', 'content': '브라운'}, {'role': 'user', 'content': '한 마디'}]
+
+
+async def run_calls(router, count: int) -> dict:
+    before = {name: s['calls'] for name, s in router.stats()['providers'].items()}
+    started = time.perf_counter()
+    for _ in range(count):
+        await router.generate(MESSAGES, {'max_tokens': 50})
+    elapsed = time.perf_counter() - started
+    after = router.stats()['providers']
+    share = {name: after[name]['calls'] - before[name] for name in after}
+    return {'평균 지연(ms)': round(elapsed / count * 1000, 1), '제공자별 호출': share}
+
+
+async def main():
+    slow = StubLLMServer(latency=0.08, jitter=0.01, seed=0)
+    fast = StubLLMServer(latency=0.02, jitter=0.01, seed=1)
+    os.environ['PERPLEXITY_API_URL'] = await slow.start()
+    await fast.start()
+    os.environ['GEMINI_API_URL'] = fast.base_url
+    os.environ['GEMINI_API_KEY'] = 'stub'
+    os.environ['LLM_PROVIDERS'] = 'perplexity,gemini,offline'
+    os.environ.setdefault('BREAKER_COOLDOWN', '60')
+
+    from utils.llm_providers import LLMRouter
+    router = LLMRouter.from_env()
+
+    print("1) 지연 기반 선택")
+    print(f"   {await run_calls(router, 40)}")
+
+    print("2) gemini 장애 (오류율 100%)")
+    fast.error_rate = 1.0
+    print(f"   {await run_calls(router, 40)}, 전환 {router.failovers}회, 회로 열림으로 건너뜀 {router.skipped_open}회")
+
+    print("3) 전체 장애")
+    slow.error_rate = 1.0
+    print(f"   {await run_calls(router, 20)}")
+    for name, stats in router.stats()['providers'].items():
+        print(f"   {name}: {stats['state']}, 오류율 {stats['error_rate']:.0%}, p50 {stats['p50'] * 1000:.0f}ms")
+
+    await router.close()
+    await slow.stop()
+    await fast.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""무거운 굴림/확률 계산 중 이벤트 루프(게이트웨이 하트비트) 지연 비교
+
+실행: python -m benchmarks.bench_offload [작업 수]
+
+같은 작업 묶음을 (1) 루프 안에서 바로 계산, (2) WorkPool 로 넘겨 계산하면서
+50ms 주기 하트비트 작업이 예정보다 얼마나 늦게 깨어나는지 측정
+"""
+import asyncio
+import sys
+import time
+
+from utils.dice_engine import sum_distribution
+from utils.offload import WorkPool, evaluate_job, probability_job
+
+HEARTBEAT = 0.05
+
+
+def jobs(count: int) -> list:
+    """서로 다른(캐시되지 않는) 확률 질의와 큰 풀 굴림을 번갈아"""
+    work = []
+    for i in range(count):
+        if i % 2:
+            work.append((probability_job, (40 + i, 100, 0, '>=', 50 * (40 + i))))
+        else:
+            work.append((evaluate_job, (f'{200000 + i}d6', i, False)))
+    return work
+
+
+async def heartbeat(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        expected = time.perf_counter() + HEARTBEAT
+        await asyncio.sleep(HEARTBEAT)
+        lags.append(time.perf_counter() - expected)
+
+
+def summary(lags: list) -> str:
+    ordered = sorted(lags)
+    if not ordered:
+        return '표본 없음'
+    return (f"p50 {ordered[len(ordered) // 2] * 1000:.1f}ms / "
+            f"p99 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000:.1f}ms / "
+            f"max {ordered[-1] * 1000:.1f}ms")
+
+
+async def measure(name: str, run_all):
+    sum_distribution.cache_clear()
+    lags, stop = [], asyncio.Event()
+    task = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(HEARTBEAT * 2)
+    started = time.perf_counter()
+    await run_all()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await task
+    print(f"  {name}: 소요 {elapsed:.2f}s, 하트비트 지연 {summary(lags)}")
+
+
+async def main(count: int):
+    work = jobs(count)
+    print(f"무거운 작업 {count}개 (큰 풀 굴림 / 확률 분포 번갈아)")
+
+    async def inline():
+        for func, args in work:
+            func(*args)
+            await asyncio.sleep(0)
+
+    for mode in ('thread', 'process'):
+        pool = WorkPool(mode=mode, max_queued=count)
+
+        async def offloaded():
+            await asyncio.gather(*(pool.run(func, *args) for func, args in work))
+
+        if mode == 'thread':
+            await measure('루프 안에서 계산', inline)
+        await measure(f'작업 풀 ({mode} x{pool.workers})', offloaded)
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 16))
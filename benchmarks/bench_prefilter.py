@@ -0,0 +1,97 @@
+"""메시지 사전 필터 처리량 측정 (혼합 채팅 말뭉치 재생)
+
+실행: python -m benchmarks.bench_prefilter [메시지 수]
+
+- 처리량: 초당 메시지 수 (이전 on_message 방식과 비교)
+- 할당량: tracemalloc 기준 메시지당 최대 추가 메모리 (표본 측정)
+"""
+import random
+import re
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from utils.message_prefilter import MessagePrefilter
+
+CHAT_LINES = [
+    'ㅋㅋㅋㅋ 오늘 세션 재밌었다', '다음 주 화요일 몇 시에 모여요?', 'gg', '저녁 뭐 먹지',
+    '키퍼님 이거 판정 어떻게 해요?', 'https://example.com/image.png', '아 그거 [스포일러] 였음',
+    'lol that was close', '[OOC] 잠깐 자리 비울게요', '이번 시나리오 너무 무서워요...',
+]
+COMMAND_LINES = [
+    '[1d100]', '[1d20+5]', '[4d6kh3]', '[1d100] [1d100]', '관찰 굴림 [1d100b]', '[2d6+1d4+3]',
+    '[prob 3d6>=12]', '[운세]', '[0d6]', '[1d6!]',
+]
+
+
+def build_corpus(count: int, seed: int = 0) -> list:
+    """일반 대화(일부는 대괄호 포함) 90%, 사용자 명령 5%, 봇이 보낸 명령 5% 의 말뭉치"""
+    rng = random.Random(seed)
+    bot_author = SimpleNamespace(bot=True)
+    user_author = SimpleNamespace(bot=False)
+    channel = SimpleNamespace(id=1)
+    corpus = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.05:
+            corpus.append(SimpleNamespace(author=bot_author, webhook_id=None, channel=channel,
+                                          content=rng.choice(COMMAND_LINES)))
+        elif roll < 0.10:
+            corpus.append(SimpleNamespace(author=user_author, webhook_id=None, channel=channel,
+                                          content=rng.choice(COMMAND_LINES)))
+        else:
+            corpus.append(SimpleNamespace(author=user_author, webhook_id=None, channel=channel,
+                                          content=rng.choice(CHAT_LINES)))
+    return corpus
+
+
+def legacy_scan(message) -> bool:
+    """이전 on_message 의 필터 단계 재현
+
+    자기 자신 비교 + strip + '[' 검사 + 미컴파일 패턴 findall + 표기마다 re.match 재검사
+    """
+    if message.author is None:
+        return False
+    if message.content.strip() == '[운세]':
+        return True
+    if '[' not in message.content:
+        return False
+    matches = re.findall(r'\[(\d+d\d+[\+\-]?\d*)\]', message.content)
+    return any(re.match(r'^(\d+)d(\d+)([\+\-]\d+)?$', notation) for notation in matches)
+
+
+def measure_throughput(func, corpus: list) -> float:
+    started = time.perf_counter()
+    for message in corpus:
+        func(message)
+    return len(corpus) / (time.perf_counter() - started)
+
+
+def measure_allocations(func, corpus: list, sample: int = 10000) -> float:
+    """메시지당 평균 최대 추가 할당 바이트 (tracemalloc)"""
+    tracemalloc.start()
+    total = 0
+    for message in corpus[:sample]:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        func(message)
+        total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return total / min(sample, len(corpus))
+
+
+def main(count: int):
+    corpus = build_corpus(count)
+    prefilter = MessagePrefilter(disabled_channels=set())
+
+    print(f"메시지 {count:,}개 재생")
+    for name, func in (('이전 방식', legacy_scan), ('사전 필터', prefilter.scan)):
+        rate = measure_throughput(func, corpus)
+        alloc = measure_allocations(func, corpus)
+        print(f"  {name}: {rate:,.0f} msg/s, 메시지당 할당 {alloc:.1f} bytes")
+    print(f"  사전 필터 통계: {prefilter.stats()}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
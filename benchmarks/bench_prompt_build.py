@@ -0,0 +1,64 @@
+"""프롬프트 구성 비용 / 전송 바이트 비교 (이전 방식 vs 사전 컴파일 템플릿)
+
+실행: python -m benchmarks.bench_prompt_build [반복 횟수]
+
+- 이전 방식: 호출마다 페르소나 + 샘플 80줄 + 지시사항을 f-string 으로 조립해 user 메시지 하나로 전송
+- 현재 방식: 판정별 system 메시지는 시작 시 1회 컴파일, 호출마다 짧은 user 메시지만 렌더링
+"""
+import json
+import sys
+import timeit
+
+from utils.perplexity_generator import PerplexityGenerator
+from utils.prompt_templates import get_judgment_instruction
+
+DICE_RESULT = {
+    'total': 17, 'rolls': [17], 'notation': '1d20',
+    'success_level': 'success', 'username': '노루',
+}
+
+
+def legacy_messages(generator: PerplexityGenerator, dice_result: dict) -> list:
+    """이전 generate_brown_message 의 프롬프트 조립 방식 재현"""
+    snapshot = generator.persona.snapshot
+    samples = "\n        ".join(snapshot.samples)
+    judgment_instruction = get_judgment_instruction(dice_result['success_level'])
+    prompt = f"""{snapshot.persona}
+
+        ### 인물의 샘플 대사
+        {samples}
+
+        ### 현재 상황
+        참가자: {dice_result['username']}
+        주사위 결과: {dice_result['notation']} = {dice_result['total']}점
+        판정: {dice_result['success_level']}
+
+        ### 지시사항
+        {judgment_instruction}
+        메시지만 제공하세요. 다른 설명은 제외하세요."""
+    return [{'role': 'user', 'content': prompt}]
+
+
+def payload_bytes(messages: list) -> int:
+    return len(json.dumps({'model': 'sonar', 'messages': messages}, ensure_ascii=False).encode('utf-8'))
+
+
+def main(iterations: int):
+    generator = PerplexityGenerator()
+
+    legacy_time = timeit.timeit(lambda: legacy_messages(generator, DICE_RESULT), number=iterations)
+    compiled_time = timeit.timeit(lambda: generator.templates.brown_messages(DICE_RESULT), number=iterations)
+
+    legacy = legacy_messages(generator, DICE_RESULT)
+    compiled = generator.templates.brown_messages(DICE_RESULT)
+    static_bytes = len(compiled[0]['content'].encode('utf-8'))
+    dynamic_bytes = len(compiled[1]['content'].encode('utf-8'))
+
+    print(f"반복 {iterations}회")
+    print(f"이전 방식: 호출당 {legacy_time / iterations * 1e6:.2f}µs, 요청 {payload_bytes(legacy)} bytes (전부 동적)")
+    print(f"현재 방식: 호출당 {compiled_time / iterations * 1e6:.2f}µs, 요청 {payload_bytes(compiled)} bytes "
+          f"(고정 system {static_bytes} bytes + 동적 user {dynamic_bytes} bytes)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
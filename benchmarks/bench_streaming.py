@@ -0,0 +1,66 @@
+"""굴림 결과가 처음 보이기까지의 시간 - 스트리밍(결과 먼저 답장 후 수정) vs 완성 후 한 번에 답장
+
+실행: python -m benchmarks.bench_streaming [메시지 수] [지연(초)]
+
+스트리밍에서는 첫 답장이 LLM 지연과 무관하게 바로 나가고, 대사는 STREAM_EDIT_INTERVAL 마다
+모아서 수정됩니다 (스텁 서버는 지연의 20% 뒤 첫 조각, 나머지를 8조각으로 나눠 전송).
+"""
+import asyncio
+import os
+import sys
+import time
+
+from benchmarks.fake_discord import FakeMessage
+from benchmarks.stub_llm_server import StubLLMServer
+
+
+def _percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def measure(count: int, streaming: bool) -> dict:
+    from cogs.dice_roller import DiceRoller
+    from types import SimpleNamespace
+
+    os.environ['STREAM_NARRATION'] = '1' if streaming else '0'
+    cog = DiceRoller(SimpleNamespace(user=None))
+
+    messages = [FakeMessage('[1d20]', i) for i in range(count)]
+    started = time.perf_counter()
+    await asyncio.gather(*(cog.on_message(m) for m in messages))
+    total = time.perf_counter() - started
+    await cog.cog_unload()
+
+    # 가짜 채널이 기록한 첫 답장 시각
+    first = [m.channel.sent[0][0] - started for m in messages if m.channel.sent]
+    return {
+        'first_p50': _percentile(first, 0.5),
+        'first_p99': _percentile(first, 0.99),
+        'total': total,
+        'edits': sum(len(m.edits) for m in messages) / count,
+    }
+
+
+async def run(count: int, latency: float):
+    server = StubLLMServer(latency=latency)
+    os.environ['PERPLEXITY_API_URL'] = await server.start()
+    os.environ.setdefault('LLM_PROVIDERS', 'perplexity')
+    os.environ.setdefault('PERPLEXITY_POOL_SIZE', str(count))
+    os.environ.setdefault('ROLL_HISTORY', '0')
+    os.environ.setdefault('NARRATION_POOL', '0')
+    os.environ.setdefault('COALESCE_WINDOW', '0')
+
+    print(f'메시지 {count}개, LLM 응답 완료까지 {latency:.2f}s')
+    for streaming in (False, True):
+        result = await measure(count, streaming)
+        label = '스트리밍' if streaming else '완성 후 답장'
+        print(f"  {label:<8} 첫 결과 p50 {result['first_p50'] * 1000:7.1f}ms / p99 {result['first_p99'] * 1000:7.1f}ms"
+              f" · 전체 {result['total']:.2f}s · 메시지당 수정 {result['edits']:.1f}회")
+    await server.stop()
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    lat = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    asyncio.run(run(n, lat))
@@ -0,0 +1,62 @@
+"""벤치마크용 가짜 discord 객체 (게이트웨이 없이 DiceRoller.on_message 를 직접 호출)
+
+DiceRoller 가 실제로 쓰는 속성/메서드만 흉내내고, 채널은 타이핑 표시/답장/수정을 기록함
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+
+class FakeTyping:
+    def __init__(self, channel: 'FakeChannel'):
+        self.channel = channel
+
+    async def __aenter__(self):
+        self.channel.typing_count += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeChannel:
+    """타이핑 표시 횟수와 답장/수정 기록 (전송 지연 send_latency 주입 가능)"""
+
+    def __init__(self, channel_id: int = 0, send_latency: float = 0.0):
+        self.id = channel_id
+        self.send_latency = send_latency
+        self.typing_count = 0
+        self.sent = []  # (시각, 'reply'|'edit', 본문)
+
+    def typing(self):
+        return FakeTyping(self)
+
+    async def record(self, kind: str, text: str):
+        if self.send_latency:
+            await asyncio.sleep(self.send_latency)
+        self.sent.append((time.perf_counter(), kind, text))
+
+
+class FakeReply:
+    def __init__(self, message: 'FakeMessage'):
+        self.message = message
+
+    async def edit(self, content: str):
+        self.message.edits.append(content)
+        await self.message.channel.record('edit', content)
+
+
+class FakeMessage:
+    def __init__(self, content: str, author_id: int, channel: FakeChannel | None = None, guild_id: int | None = None):
+        self.content = content
+        self.author = SimpleNamespace(id=author_id, display_name=f'참가자{author_id}', bot=False)
+        self.channel = channel or FakeChannel()
+        self.webhook_id = None
+        self.guild = SimpleNamespace(id=guild_id) if guild_id is not None else None
+        self.replies = []
+        self.edits = []
+
+    async def reply(self, text: str, **kwargs):
+        self.replies.append(text)
+        await self.channel.record('reply', text)
+        return FakeReply(self)
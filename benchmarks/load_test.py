@@ -0,0 +1,205 @@
+"""DiceRoller 전체 파이프라인 부하 테스트 (디스코드/실제 LLM 없이)
+
+실행: python -m benchmarks.load_test [--scenario 이름 ...] [--count N] [--rate 초당 메시지] [--latency 초]
+
+가짜 메시지를 일정한 간격(개방형 도착 - 이전 메시지 처리 완료를 기다리지 않음)으로
+DiceRoller.on_message 에 넣고, LLM 은 로컬 스텁 서버(로그정규 지연, 오류율 주입)로 대체합니다.
+시나리오마다 새 Cog 와 새 스텁 서버를 쓰며, 다음을 보고합니다.
+- 처리량(메시지/초), 종단 간 지연 p50/p95/p99 (on_message 시작 → 마지막 답장/수정)
+- 첫 답장까지 지연 p50 (스트리밍이면 굴림 결과가 처음 보인 시점)
+- 이벤트 루프 지연 p99/최대, 메시지당 API 호출 수(대사 풀 보충 포함), 레이트 리밋 거절 수
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.fake_discord import FakeChannel, FakeMessage
+from benchmarks.stub_llm_server import StubLLMServer
+
+# 이름 -> 메시지 내용 생성, 사용자 수, 스텁 서버 설정, 시나리오 동안만 적용할 환경 변수
+# 굴림 시나리오는 파이프라인 자체의 용량을 보기 위해 레이트 리밋을 끔 (운세 연타만 켜 둠)
+SCENARIOS = {
+    'single': {
+        'description': '굴림 하나 ([1d20])',
+        'content': lambda i: '[1d20]',
+        'users': 500,
+        'stub': {},
+        'env': {'RATE_LIMIT': '0'},
+    },
+    'multi': {
+        'description': '한 메시지에 굴림 3개 + 확률 질의',
+        'content': lambda i: '[1d20+5] 공격, [2d6+3] 피해, [4d6kh3] 능력치 [prob 3d6>=15]',
+        'users': 500,
+        'stub': {},
+        'env': {'RATE_LIMIT': '0'},
+    },
+    'fortune': {
+        'description': '소수 사용자의 [운세] 연타 (캐시/레이트 리밋)',
+        'content': lambda i: '[운세]',
+        'users': 10,
+        'stub': {},
+        'env': {'RATE_LIMIT': '1'},
+    },
+    'outage': {
+        'description': 'LLM 장애 (모든 요청 503) 중 굴림',
+        'content': lambda i: '[1d20]',
+        'users': 500,
+        'stub': {'error_rate': 1.0, 'latency': 0.05, 'sigma': 0.0},
+        'env': {'RATE_LIMIT': '0'},
+    },
+}
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class LagSampler:
+    """짧은 주기로 잠들었다 깨며 예정보다 늦은 시간을 기록"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - expected))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+async def run_scenario(name: str, count: int, rate: float, latency: float, sigma: float,
+                       send_latency: float) -> dict:
+    scenario = SCENARIOS[name]
+    stub_config = {'latency': latency, 'sigma': sigma, 'seed': 0, **scenario['stub']}
+    server = StubLLMServer(**stub_config)
+    url = await server.start()
+    os.environ['PERPLEXITY_API_URL'] = url
+    os.environ['GEMINI_API_URL'] = server.base_url
+    saved_env = {key: os.environ.get(key) for key in scenario['env']}
+    os.environ.update(scenario['env'])
+
+    # 환경 변수 설정 이후에 임포트해야 스텁 URL이 반영됨
+    from cogs.dice_roller import DiceRoller
+    cog = DiceRoller(SimpleNamespace(user=None))
+    await cog.cog_load()
+    for key, value in saved_env.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+
+    channels = [FakeChannel(channel_id=i, send_latency=send_latency) for i in range(scenario['users'])]
+    messages = [
+        FakeMessage(scenario['content'](i), author_id=i % scenario['users'],
+                    channel=channels[i % scenario['users']], guild_id=1)
+        for i in range(count)
+    ]
+    latencies = []
+
+    async def _handle(message: FakeMessage):
+        started = time.perf_counter()
+        await cog.on_message(message)
+        latencies.append(time.perf_counter() - started)
+        message.started = started
+
+    lag = LagSampler()
+    lag.start()
+    loop = asyncio.get_running_loop()
+    tasks = []
+    started = loop.time()
+    wall_started = time.perf_counter()
+    for i, message in enumerate(messages):
+        delay = started + i / rate - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(_handle(message)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - wall_started
+    await lag.stop()
+
+    # 같은 채널을 여러 메시지가 공유하므로 첫 답장은 메시지별 답장 기록으로 계산
+    first_reply = []
+    for message in messages:
+        sent = [t for t, kind, text in message.channel.sent if kind == 'reply' and t >= message.started]
+        if sent and message.replies:
+            first_reply.append(min(sent) - message.started)
+
+    rejections = sum(s['rejections'] for s in cog.rate_limiter.stats().values())
+    llm_calls = server.calls
+    await cog.cog_unload()
+    await server.stop()
+
+    return {
+        'scenario': name,
+        'messages': count,
+        'throughput': count / elapsed,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'first_reply_p50': percentile(first_reply, 0.50),
+        'lag_p99': percentile(lag.samples, 0.99),
+        'lag_max': max(lag.samples, default=0.0),
+        'calls_per_message': llm_calls / count,
+        'rate_limited': rejections,
+        'replied': sum(1 for m in messages if m.replies),
+    }
+
+
+def print_report(results: list, rate: float, latency: float):
+    print(f"\n도착 {rate:.0f}msg/s, LLM 지연 중앙값 {latency * 1000:.0f}ms")
+    header = (f"{'시나리오':<9}{'처리량':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'첫답장':>9}"
+              f"{'루프p99':>9}{'루프max':>9}{'API/msg':>9}{'거절':>7}{'응답':>7}")
+    print(header)
+    for r in results:
+        print(f"{r['scenario']:<9}{r['throughput']:>8.1f}/s"
+              f"{r['p50'] * 1000:>7.0f}ms{r['p95'] * 1000:>7.0f}ms{r['p99'] * 1000:>7.0f}ms"
+              f"{r['first_reply_p50'] * 1000:>7.0f}ms"
+              f"{r['lag_p99'] * 1000:>7.1f}ms{r['lag_max'] * 1000:>7.1f}ms"
+              f"{r['calls_per_message']:>9.2f}{r['rate_limited']:>7}{r['replied']:>7}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', nargs='*', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--count', type=int, default=300, help='시나리오당 메시지 수')
+    parser.add_argument('--rate', type=float, default=50, help='초당 도착 메시지 수')
+    parser.add_argument('--latency', type=float, default=0.6, help='LLM 응답 지연 중앙값(초)')
+    parser.add_argument('--sigma', type=float, default=0.4, help='LLM 지연 로그정규 분포의 sigma (0 이면 고정)')
+    parser.add_argument('--send-latency', type=float, default=0.05, help='디스코드 답장/수정 왕복(초)')
+    parser.add_argument('--verbose', action='store_true', help='봇 로그 출력 (기본은 숨김)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    os.environ.setdefault('LLM_PROVIDERS', 'perplexity')
+    os.environ.setdefault('PERPLEXITY_API_KEY', 'stub')
+    os.environ.setdefault('ROLL_HISTORY_PATH', os.path.join(tempfile.mkdtemp(), 'roll_history.sqlite3'))
+    os.environ.setdefault('PERSONA_RELOAD_INTERVAL', '0')
+
+    results = []
+    for name in args.scenario:
+        print(f"▶ {name}: {SCENARIOS[name]['description']}")
+        results.append(await run_scenario(name, args.count, args.rate, args.latency, args.sigma, args.send_latency))
+    print_report(results, args.rate, args.latency)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
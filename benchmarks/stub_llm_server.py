@@ -0,0 +1,147 @@
+"""로컬 테스트용 가짜 LLM 서버 (Perplexity chat/completions, Gemini generateContent 형식 흉내, SSE 스트리밍 포함)
+
+사용 예:
+    server = StubLLMServer(latency=0.5)
+    url = await server.start()
+    os.environ['PERPLEXITY_API_URL'] = url
+    os.environ['GEMINI_API_URL'] = server.base_url
+    ...
+    await server.stop()
+"""
+import asyncio
+import json
+import random
+import re
+from aiohttp import web
+
+STUB_LINE = '[좋습니다, 좋아요! 스텁 서버의 응답입니다!]'
+STUB_TEMPLATE = '[{username}님, {notation} = {total}점! 스텁 풀의 대사입니다!]'
+
+
+class StubLLMServer:
+    """지연 후 브라운 대사(일괄 요청이면 JSON 배열)를 돌려주는 aiohttp 서버
+
+    지연/오류는 실행 중에도 속성을 바꿔 주입할 수 있음
+    - latency: 기본 지연, jitter: 추가 균등 지연 상한
+    - sigma: 0 보다 크면 지연을 latency 중앙값의 로그정규 분포로 (실제 LLM 처럼 오른쪽 꼬리가 긴 분포)
+    - slow_rate / slow_latency: 일정 비율의 요청만 느리게 (꼬리 지연)
+    - error_rate: 일정 비율의 요청에 503 응답
+    - 스트리밍 요청은 지연의 first_token_ratio 만큼 기다린 뒤 나머지 시간 동안 stream_chunks 조각으로 나눠 전송
+    """
+
+    first_token_ratio = 0.2
+    stream_chunks = 8
+
+    def __init__(self, latency: float = 0.5, host: str = '127.0.0.1', port: int = 0,
+                 jitter: float = 0.0, error_rate: float = 0.0,
+                 slow_rate: float = 0.0, slow_latency: float = 0.0, seed: int | None = None,
+                 sigma: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.host = host
+        self.port = port
+        self.calls = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self.base_url = ''
+        self._runner: web.AppRunner | None = None
+
+    def _delay(self) -> float:
+        if self.slow_rate and self._rng.random() < self.slow_rate:
+            return self.slow_latency
+        if self.sigma > 0:
+            return self.latency * self._rng.lognormvariate(0, self.sigma) + self._rng.uniform(0, self.jitter)
+        return self.latency + self._rng.uniform(0, self.jitter)
+
+    async def _fail_or_wait(self, delay: float | None = None) -> web.Response | None:
+        """지연 주입 후, 오류를 주입할 차례면 503 응답 반환"""
+        self.calls += 1
+        await asyncio.sleep(self._delay() if delay is None else delay)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({'error': 'stub outage'}, status=503)
+        return None
+
+    @staticmethod
+    def _reply(prompt: str) -> str:
+        # 일괄 생성/템플릿 요청이면 요청된 개수만큼 JSON 배열로 응답
+        batch = re.search(r'순서대로 총 (\d+)개', prompt)
+        templates = re.search(r'서로 다른 브라운의 대사 (\d+)개', prompt)
+        if batch:
+            return json.dumps([STUB_LINE] * int(batch.group(1)), ensure_ascii=False)
+        if templates:
+            return json.dumps([STUB_TEMPLATE] * int(templates.group(1)), ensure_ascii=False)
+        return STUB_LINE
+
+    async def _stream(self, request: web.Request, content: str, event) -> web.StreamResponse:
+        """content 를 조각내어 SSE(data: {...}) 로 전송 - event(조각) 가 이벤트 본문"""
+        delay = self._delay()
+        error = await self._fail_or_wait(delay * self.first_token_ratio)
+        if error is not None:
+            return error
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+        size = max(1, -(-len(content) // self.stream_chunks))
+        pieces = [content[i:i + size] for i in range(0, len(content), size)]
+        for i, piece in enumerate(pieces):
+            if i:
+                await asyncio.sleep(delay * (1 - self.first_token_ratio) / (len(pieces) - 1))
+            await response.write(f"data: {json.dumps(event(piece), ensure_ascii=False)}\n\n".encode())
+        await response.write(b'data: [DONE]\n\n')
+        await response.write_eof()
+        return response
+
+    async def _handle_completion(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        prompt = '\n'.join(m['content'] for m in payload['messages'])
+        if payload.get('stream'):
+            return await self._stream(request, self._reply(prompt),
+                                      lambda piece: {'choices': [{'delta': {'content': piece}}]})
+        error = await self._fail_or_wait()
+        if error is not None:
+            return error
+        return web.json_response({'choices': [{'message': {'content': self._reply(prompt)}}]})
+
+    @staticmethod
+    def _gemini_prompt(payload: dict) -> str:
+        texts = [part['text'] for part in payload.get('system_instruction', {}).get('parts', [])]
+        texts += [part['text'] for content in payload['contents'] for part in content['parts']]
+        return '\n'.join(texts)
+
+    async def _handle_gemini(self, request: web.Request) -> web.Response:
+        """Gemini generateContent 형식"""
+        payload = await request.json()
+        error = await self._fail_or_wait()
+        if error is not None:
+            return error
+        content = self._reply(self._gemini_prompt(payload))
+        return web.json_response({'candidates': [{'content': {'parts': [{'text': content}]}}]})
+
+    async def _handle_gemini_stream(self, request: web.Request) -> web.StreamResponse:
+        """Gemini streamGenerateContent?alt=sse 형식"""
+        payload = await request.json()
+        return await self._stream(request, self._reply(self._gemini_prompt(payload)),
+                                  lambda piece: {'candidates': [{'content': {'parts': [{'text': piece}]}}]})
+
+    async def start(self) -> str:
+        """서버 시작 후 completions URL 반환 (Gemini 형식은 base_url 을 GEMINI_API_URL 로)"""
+        app = web.Application()
+        app.router.add_post('/chat/completions', self._handle_completion)
+        app.router.add_post('/models/{model}:generateContent', self._handle_gemini)
+        app.router.add_post('/models/{model}:streamGenerateContent', self._handle_gemini_stream)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f'http://{self.host}:{port}'
+        return f'{self.base_url}/chat/completions'
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
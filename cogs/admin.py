@@ -0,0 +1,95 @@
+from discord.ext import commands
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Admin(commands.Cog):
+    """봇 소유자 전용 운영 명령"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    def _watchdog(self):
+        return getattr(self.bot, 'loop_watchdog', None)
+
+    @commands.command(name='profiler')
+    @commands.is_owner()
+    async def profiler(self, ctx: commands.Context, action: str = 'report'):
+        """!profiler start|stop|report - 이벤트 루프 샘플링 프로파일러"""
+        watchdog = self._watchdog()
+        if watchdog is None:
+            await ctx.reply("루프 감시가 꺼져 있습니다.")
+            return
+
+        if action == 'start':
+            watchdog.start_profiler()
+            await ctx.reply(f"⏱️ 프로파일러 시작 (최대 {watchdog.profile_max_seconds:.0f}초)")
+            return
+        if action == 'stop':
+            watchdog.stop_profiler()
+        elif action != 'report':
+            await ctx.reply("사용법: `!profiler start|stop|report`")
+            return
+
+        await ctx.reply(self._format_report(watchdog.profile_report(limit=10)))
+
+    @commands.command(name='loopstats')
+    @commands.is_owner()
+    async def loopstats(self, ctx: commands.Context):
+        """!loopstats - 이벤트 루프 막힘 통계"""
+        watchdog = self._watchdog()
+        if watchdog is None:
+            await ctx.reply("루프 감시가 꺼져 있습니다.")
+            return
+        stats = watchdog.stats()
+        await ctx.reply(
+            f"막힘 {stats['blocked']}회 / 최장 {stats['longest_block']:.2f}초 / "
+            f"게이트웨이 지연 {self.bot.latency * 1000:.0f}ms"
+        )
+
+    @commands.command(name='persona')
+    @commands.is_owner()
+    async def persona(self, ctx: commands.Context, action: str = 'status'):
+        """!persona [reload] - 페르소나/샘플 데이터 상태, 강제로 다시 읽기"""
+        cog = self.bot.get_cog('DiceRoller')
+        if cog is None:
+            await ctx.reply("DiceRoller 가 로드되지 않았습니다.")
+            return
+        store = cog.perplexity.persona
+
+        if action == 'reload':
+            if not await store.reload(force=True):
+                await ctx.reply(f"⚠️ 다시 읽기 실패 - 기존 데이터 유지: {store.last_error}")
+                return
+        elif action != 'status':
+            await ctx.reply("사용법: `!persona [reload]`")
+            return
+
+        stats = store.stats()
+        samples = ', '.join(f"{tone} {n}" for tone, n in stats.get('samples', {}).items())
+        await ctx.reply(
+            f"페르소나 v{stats['version']} ({samples}) / 다시 읽기 {stats['reloads']}회, 실패 {stats['reload_failures']}회"
+            + (f"\n마지막 오류: {stats['last_error']}" if stats['last_error'] else '')
+        )
+
+    @staticmethod
+    def _format_report(report: dict) -> str:
+        """디스코드 메시지 길이에 맞춘 프로파일 요약"""
+        lines = [
+            f"표본 {report['samples']}개, 대기(idle) {report['idle_ratio']:.0%}"
+            f"{' - 수집 중' if report['profiling'] else ''}",
+        ]
+        for title, key in (('가장 안쪽 함수', 'top_functions'), ('봇 코드 기준', 'top_project')):
+            lines.append(f"[{title}]")
+            for label, count in report[key]:
+                share = count / report['samples'] if report['samples'] else 0
+                lines.append(f"{share:6.1%}  {label}")
+        text = '\n'.join(lines)
+        return f"```\n{text[:1900]}\n```"
+
+
+async def setup(bot):
+    """Cog 로드"""
+    await bot.add_cog(Admin(bot))
+    logger.info('✓ Admin cog loaded')
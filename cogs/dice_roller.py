@@ -1,72 +1,244 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
-import re
+import asyncio
+import contextlib
+import functools
+from concurrent.futures import BrokenExecutor
+import os
 import random
+import time
 import logging
-# from utils.gemini_generator import GeminiGenerator
+from types import SimpleNamespace
+# LLM 제공자(perplexity/gemini/offline)는 코드 수정 없이 LLM_PROVIDERS 환경 변수로 선택
 from utils.perplexity_generator import PerplexityGenerator
+from utils.narration_pool import NarrationPool
+from utils.dice_engine import DiceEngine, probability, probability_cost
+from utils.dice_parser import MAX_EXPRESSION_LENGTH, PARSE_CACHE_SIZE, DiceSyntaxError, parse_expression
+from utils.message_prefilter import MessagePrefilter
+from utils.rate_limiter import RateLimiter
+from utils.roll_history import RollHistory
+from utils.offload import WorkPool, WorkQueueFull, evaluate_job, probability_job
+from utils.metrics import DISCORD_SEND, E2E_LATENCY, FIRST_REPLY, REGISTRY, TIME_TO_TYPING
 
 logger = logging.getLogger(__name__)
 
+# 디스코드 메시지 최대 길이
+DISCORD_MESSAGE_LIMIT = 2000
+
+# 결과에 개별 눈을 표시하는 최대 개수 (넘으면 생략)
+ROLLS_DISPLAY_LIMIT = 30
+
+# 스트리밍 중 대사 자리에 표시할 문구
+STREAMING_PLACEHOLDER = '…'
+
 class DiceRoller(commands.Cog):
     """D&D & 크툴루의 부름 다이스 롤러 - 브라운 캐릭터 자동 적용"""
 
     def __init__(self, bot):
         self.bot = bot
         self.perplexity = PerplexityGenerator()
+        self.dice_engine = DiceEngine()
+        self.prefilter = MessagePrefilter()
+        # LLM 호출 앞단의 사용자/서버/전역 토큰 버킷
+        self.rate_limiter = RateLimiter()
+        # 주사위 개수/면체 상한 및 확률 계산 비용 상한
+        self.max_dice = int(os.getenv('DICE_MAX_COUNT', '1000'))
+        self.max_sides = int(os.getenv('DICE_MAX_SIDES', '100000'))
+        self.prob_max_cost = int(os.getenv('PROB_MAX_COST', '250000'))
+        # 비용 추정치가 이 값을 넘는 굴림/확률 계산은 작업 풀에서 실행 (그 이하는 바로 계산)
+        self.work_pool = WorkPool()
+        self.offload_roll_dice = int(os.getenv('OFFLOAD_ROLL_DICE', '5000'))
+        self.offload_prob_cost = int(os.getenv('OFFLOAD_PROB_COST', '20000'))
+        self.offload_timeout = float(os.getenv('OFFLOAD_TIMEOUT', '10'))
         self.cthulhu_difficulties = {
             'regular': 1.0,
             'hard': 0.5,
             'extreme': 0.2,
         }
+        # 한 메시지 안의 여러 굴림 동시 처리 설정
+        self.multi_roll_concurrency = int(os.getenv('MULTI_ROLL_CONCURRENCY', '4'))
+        self.multi_roll_deadline = float(os.getenv('MULTI_ROLL_DEADLINE', '12'))
+        # 메시지 하나에서 처리하는 굴림/확률 질의 최대 개수 (넘는 것은 건너뛰고 안내)
+        self.max_rolls_per_message = int(os.getenv('MAX_ROLLS_PER_MESSAGE', '10'))
+        # 여러 굴림의 대사를 API 1회로 묶어서 생성 (묶음당 최대 개수)
+        self.batch_narration = os.getenv('BATCH_NARRATION', '1') == '1'
+        self.batch_narration_size = int(os.getenv('BATCH_NARRATION_SIZE', '8'))
+        # 굴림 하나짜리 메시지는 결과를 먼저 답장하고 대사는 받는 대로 같은 메시지를 수정해 채움
+        # (수정 간격은 디스코드 메시지 수정 한도 - 채널당 5초에 5회 정도 - 안쪽으로 유지)
+        self.stream_narration = os.getenv('STREAM_NARRATION', '1') == '1'
+        self.stream_edit_interval = float(os.getenv('STREAM_EDIT_INTERVAL', '1.2'))
+        # 미리 생성해 둔 대사 풀 (비어 있으면 실시간 생성)
+        self.narration_pool = NarrationPool(self.perplexity) if os.getenv('NARRATION_POOL', '1') == '1' else None
+        # 굴림 기록 (SQLite, 백그라운드 일괄 기록)
+        self.history = RollHistory() if os.getenv('ROLL_HISTORY', '1') == '1' else None
+        # 0 이면 메시지 본문의 [NdN]/[운세] 를 보지 않음 (/roll, /fortune 만 사용)
+        # main.py 도 같은 값으로 message_content 인텐트를 끔
+        self.scan_messages = os.getenv('MESSAGE_CONTENT_SCAN', '1') == '1'
+
+    async def cog_load(self):
+        """Cog 로드 시 운세 캐시 파일 읽기, 대사 풀 보충/페르소나 감시 작업 시작 + /metrics 수집 함수 등록"""
+        await self.perplexity.fortune_cache.load()
+        if self.narration_pool is not None:
+            self.narration_pool.start()
+        self.perplexity.persona.start()
+        if self.history is not None:
+            await self.history.start()
+        REGISTRY.add_collector('dice_roller', self._collect_metrics)
+
+    async def cog_unload(self):
+        """Cog 언로드 시 백그라운드 작업 및 HTTP 세션 정리"""
+        REGISTRY.remove_collector('dice_roller')
+        if self.narration_pool is not None:
+            await self.narration_pool.stop()
+        if self.history is not None:
+            await self.history.close()
+        self.work_pool.shutdown()
+        await self.perplexity.close()
+
+    def _collect_metrics(self) -> list:
+        """각 구성 요소의 stats() 를 /metrics 형식으로 변환 (스크레이프 시점에만 계산)"""
+        families = [
+            ('dice_messages_scanned_total', 'counter', '사전 필터가 확인한 메시지 수',
+             {(): self.prefilter.scanned}),
+            ('dice_messages_matched_total', 'counter', '명령이 들어 있던 메시지 수',
+             {(): self.prefilter.matched}),
+            ('rate_limit_rejections_total', 'counter', '토큰 버킷에서 거절된 LLM 호출',
+             {(('scope', scope),): s['rejections'] for scope, s in self.rate_limiter.stats().items()}),
+            ('fortune_cache_requests_total', 'counter', '운세 캐시 조회',
+             {(('result', 'hit'),): self.perplexity.fortune_cache.hits,
+              (('result', 'miss'),): self.perplexity.fortune_cache.misses}),
+            ('narration_coalesced_total', 'counter', '공유 호출로 처리된 대사 요청',
+             {(): self.perplexity.coalescer.coalesced}),
+        ]
+        persona = self.perplexity.persona.stats()
+        families.append(('persona_version', 'gauge', '사용 중인 페르소나 데이터 버전 (다시 읽을 때마다 증가)',
+                         {(): persona['version']}))
+        families.append(('persona_reloads_total', 'counter', '페르소나 데이터 다시 읽기',
+                         {(('result', 'ok'),): persona['reloads'],
+                          (('result', 'invalid'),): persona['reload_failures']}))
+
+        if self.narration_pool is not None:
+            pool = self.narration_pool.stats()
+            families.append(('narration_pool_requests_total', 'counter', '대사 풀 조회',
+                             {(('result', 'hit'),): pool['hits'], (('result', 'miss'),): pool['misses']}))
+            families.append(('narration_pool_size', 'gauge', '판정 단계별 남은 대사 템플릿',
+                             {(('success_level', level),): size for level, size in pool['sizes'].items()}))
+
+        if self.history is not None:
+            history = self.history.stats()
+            families.append(('roll_history_written_total', 'counter', 'SQLite 에 기록된 굴림',
+                             {(): history['written']}))
+            families.append(('roll_history_dropped_total', 'counter', '대기열이 가득 찼거나 기록에 계속 실패해 버린 굴림',
+                             {(): history['dropped']}))
+            families.append(('roll_history_write_failures_total', 'counter', 'SQLite 배치 기록 실패 (재시도 포함)',
+                             {(): history['write_failures']}))
+            families.append(('roll_history_pending', 'gauge', '기록 대기 중인 굴림',
+                             {(): history['pending']}))
+
+        offload = self.work_pool.stats()
+        families.append(('offload_jobs_total', 'counter', '작업 풀로 넘긴 무거운 계산',
+                         {(('result', 'submitted'),): offload['submitted'],
+                          (('result', 'rejected'),): offload['rejected'],
+                          (('result', 'timeout'),): offload['timeouts']}))
+        families.append(('offload_in_use', 'gauge', '작업 풀에서 실행/대기 중인 계산', {(): offload['in_use']}))
+        families.append(('offload_saturation', 'gauge', '작업 풀 대기열 사용 비율 (1 이면 새 계산 거절)',
+                         {(): offload['saturation']}))
+        families.append(('offload_recycles_total', 'counter', '마감 초과 또는 작업자 비정상 종료로 작업 풀을 새로 만든 횟수',
+                         {(): offload['recycles']}))
+
+        router = self.perplexity.router.stats()
+        families.append(('llm_failovers_total', 'counter', '요청이 실패해 다음 제공자로 넘어간 횟수',
+                         {(): router['failovers']}))
+        families.append(('llm_skipped_open_total', 'counter', '회로가 열려 있어 요청 없이 건너뛴 제공자',
+                         {(): router['skipped_open']}))
+        families.append(('llm_circuit_open', 'gauge', '제공자 회로가 열려 있으면 1',
+                         {(('provider', name),): int(s['state'] != 'closed')
+                          for name, s in router['providers'].items()}))
+        return families
+
+    def memory_stats(self) -> dict:
+        """/debug/memory 용 - 사용자/채널 단위로 늘어나는 상태의 항목 수와 상한"""
+        fortune = self.perplexity.fortune_cache.stats()
+        caches = {
+            f'rate_limit_{scope}': {'entries': len(group.buckets), 'limit': group.max_buckets}
+            for scope, group in self.rate_limiter.groups.items()
+        }
+        caches['fortune_cache'] = {'entries': fortune['entries'], 'limit': self.perplexity.fortune_cache.max_entries,
+                                   'bytes': fortune['memory_bytes']}
+        caches['parse_cache'] = {'entries': parse_expression.cache_info().currsize, 'limit': PARSE_CACHE_SIZE}
+        caches['coalescer_in_flight'] = {'entries': self.perplexity.coalescer.stats()['in_flight']}
+        if self.narration_pool is not None:
+            caches['narration_pool'] = {'entries': sum(self.narration_pool.stats()['sizes'].values())}
+        if self.history is not None:
+            history = self.history.stats()
+            caches['roll_history_pending'] = {'entries': history['pending'], 'limit': self.history.max_pending}
+            caches['roll_history_sessions'] = {'entries': history['sessions_cached'],
+                                               'limit': self.history.session_cache_size}
+        return caches
+
+    async def _send_reply(self, message: discord.Message, text: str):
+        """답장 전송 (전송 지연 기록)"""
+        started = time.perf_counter()
+        await message.reply(text)
+        DISCORD_SEND.observe(time.perf_counter() - started)
 
     def parse_dice_notation(self, notation: str) -> dict | None:
-        """다이스 표기법 파싱 (에러 타입 세분화)"""
-        notation = notation.strip('[]')
-        pattern = r'^(\d+)d(\d+)([\+\-]\d+)?$'
-        match = re.match(pattern, notation)
+        """다이스 표기법 파싱 (에러 타입 세분화)
 
-        if not match:
+        지원: NdM±K, 생략형 dM, 여러 항(1d20+1d4+3), 유지/버리기(4d6kh3, 4d6dl1),
+        폭발(1d6!), 이점/불리(1d20adv, 1d20dis), CoC 보너스/패널티(1d100b, 1d100p2)
+        """
+        notation = notation.strip('[]')
+        try:
+            expression = parse_expression(notation)
+        except DiceSyntaxError:
             return None
 
-        num_dice = int(match.group(1))
-        dice_sides = int(match.group(2))
-        modifier = int(match.group(3)) if match.group(3) else 0
-
         # 1. 불가능한 주사위 (0)
-        if num_dice == 0 or dice_sides == 0:
+        if expression.is_impossible:
             return {'error': 'impossible', 'notation': notation}
 
-        # 2. 주사위 개수 초과 (예: 100개 초과)
-        if num_dice > 100:
-            return {'error': 'too_many_dice', 'limit': 100}
+        # 2. 주사위 개수 초과 (기본: 1000개 초과)
+        if expression.total_dice > self.max_dice:
+            return {'error': 'too_many_dice', 'limit': self.max_dice}
 
-        # 3. 주사위 면체 초과 (예: 1000면 초과)
-        if dice_sides > 1000:
-            return {'error': 'too_large_sides', 'limit': 1000}
+        # 3. 주사위 면체 초과 (기본: 100000면 초과)
+        if expression.max_sides > self.max_sides:
+            return {'error': 'too_large_sides', 'limit': self.max_sides}
 
         # 4. 정상
         return {
-            'num_dice': num_dice,
-            'dice_sides': dice_sides,
-            'modifier': modifier,
+            'expression': expression,
             'notation': notation
         }
 
     def roll_dice(self, num_dice: int, dice_sides: int) -> list:
         """주사위 굴리기"""
-        return [random.randint(1, dice_sides) for _ in range(num_dice)]
+        return self.dice_engine.roll(num_dice, dice_sides)
+
+    def determine_cthulhu_success(self, total: int, roll_list: list, dice_sides: int,
+                                  summary: dict | None = None) -> dict:
+        """크툴루의 부름 성공 판정
 
-    def determine_cthulhu_success(self, total: int, roll_list: list, dice_sides: int) -> dict:
-        """크툴루의 부름 성공 판정"""
+        summary: DiceExpression.evaluate 의 count/above/all_max - 큰 풀은 roll_list 에 앞부분만 있으므로
+        전체 눈의 집계는 여기서 받음 (없으면 roll_list 로 계산)
+        """
         result = {
             'total': total,
             'rolls': roll_list,
             'success_level': 'failure',
             'description': ''
         }
+        average = dice_sides / 2
+        if summary is None:
+            count = len(roll_list)
+            success_count = sum(1 for roll in roll_list if roll > average)
+            all_max = all(roll == dice_sides for roll in roll_list) and count > 0
+        else:
+            count, success_count, all_max = summary['count'], summary['above'], summary['all_max']
 
-        if 1 in roll_list and len(roll_list) == 1:
+        if 1 in roll_list and count == 1:
             result['success_level'] = 'critical_failure'
             result['description'] = '💀 대실패'
             return result
@@ -77,15 +249,12 @@ class DiceRoller(commands.Cog):
                 result['description'] = '🌟 대성공'
                 return result
 
-        if all(roll == dice_sides for roll in roll_list) and len(roll_list) > 0:
+        if all_max:
             result['success_level'] = 'critical_success'
             result['description'] = '🌟 대성공'
             return result
 
-        average = dice_sides / 2
-        success_count = sum(1 for roll in roll_list if roll > average)
-
-        if success_count >= len(roll_list) / 2:
+        if success_count >= count / 2:
             result['success_level'] = 'success'
             result['description'] = '👁️ 성공'
         else:
@@ -97,140 +266,548 @@ class DiceRoller(commands.Cog):
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         """메시지에서 [NdN] 패턴 감지하여 자동 롤"""
-        if message.author == self.bot.user:
+        if not self.scan_messages:
             return
+        # 봇/웹훅/비활성 채널 제외 + 명령 추출을 한 번에 (대부분의 메시지는 여기서 끝)
+        scan = self.prefilter.scan(message)
+        if scan is None:
+            return
+        received = time.perf_counter()
+
+        # 한도 초과 시 API 없이 대체 메시지로 응답 (타이핑 표시도 생략)
+        # 토큰은 대사 풀/운세 캐시에서 못 찾아 실제로 API 를 부를 때마다 (굴림/묶음당 1개) 차감됨
+        guild_id = message.guild.id if message.guild else None
+        allow_llm = self.rate_limiter.permit(message.author.id, guild_id)
+        show_typing = self.rate_limiter.available(message.author.id, guild_id)
+        typing = message.channel.typing() if show_typing else contextlib.nullcontext()
         
-        if message.content.strip() == "[운세]":
+        if scan['fortune']:
             #타이핑 효과(계산 중임을 알림)
-            async with message.channel.typing():
+            async with typing:
+                if show_typing:
+                    TIME_TO_TYPING.observe(time.perf_counter() - received)
                 try:
                     # API 호출
-                    fortune_msg = await self.perplexity.generate_fortune_message(message.author.display_name)
+                    fortune_msg = await self.perplexity.generate_fortune_message(
+                        message.author.display_name, message.author.id, allow_api=allow_llm
+                    )
 
                     #결과 출력
-                    await message.reply(f"## 🔮 브라운의 미스테리 운세 토크\n{fortune_msg}") 
+                    await self._send_reply(message, f"## 🔮 브라운의 미스테리 운세 토크\n{fortune_msg}")
                 except Exception as e:
                     logger.error(f"운세 출력 실패: {e}")
                     await message.reply("[치직... 방송 신호가 약하군요. 다시 시도해주세요.]")
+            E2E_LATENCY.observe(time.perf_counter() - received, 'fortune')
+            return
+
+        # 한 메시지로 채널과 작업 풀을 도배하지 않도록 앞에서부터 max_rolls_per_message 개만 처리
+        prob_matches = scan['probs'][:self.max_rolls_per_message]
+        matches = scan['rolls'][:self.max_rolls_per_message - len(prob_matches)]
+        skipped = len(scan['probs']) + len(scan['rolls']) - len(prob_matches) - len(matches)
+
+        # 확률 질의는 API 없이 바로 계산
+        responses = list(await asyncio.gather(*(self._safe_process_probability(*query) for query in prob_matches)))
+
+        if matches and self.stream_narration and len(matches) == 1 and not responses and not skipped:
+            await self._stream_dice_roll(message, matches[0], received, allow_llm)
+            E2E_LATENCY.observe(time.perf_counter() - received, 'roll')
             return
 
-        if '[' not in message.content:
+        if matches:
+            async with typing:
+                if show_typing:
+                    TIME_TO_TYPING.observe(time.perf_counter() - received)
+                responses += await self._process_dice_rolls(message, matches, allow_llm)
+
+        if skipped:
+            responses.append(f"[워워, 한 번에 너무 많군요! 주사위는 {self.max_rolls_per_message}개까지만 굴립니다. "
+                             f"나머지 {skipped}개는 다음 메시지로 보내주세요.]")
+
+        # 표기 순서대로 하나의 답장으로 합쳐서 전송 (길이 제한 시 분할)
+        for i, chunk in enumerate(self._merge_responses(responses)):
+            await self._send_reply(message, chunk)
+            if i == 0 and matches:
+                FIRST_REPLY.observe(time.perf_counter() - received, 'complete')
+        E2E_LATENCY.observe(time.perf_counter() - received, 'roll' if matches else 'prob')
+
+    @commands.command(name='stats')
+    async def roll_stats(self, ctx: commands.Context, member: discord.Member | None = None):
+        """!stats [@사용자] - 이 서버에서의 굴림 통계"""
+        if self.history is None:
+            return
+        member = member or ctx.author
+        stats = await self.history.user_stats(ctx.guild.id if ctx.guild else None, member.id)
+        if stats is None:
+            await ctx.reply(f"[{member.display_name}님은 아직 이 무대에서 주사위를 굴린 적이 없군요!]")
             return
 
-        pattern = r'\[(\d+d\d+[\+\-]?\d*)\]'
-        matches = re.findall(pattern, message.content)
+        lines = [
+            f"## 📈 {member.display_name}님의 굴림 기록",
+            f"> 굴림 **{stats['rolls']}**회 · 성공률 {stats['success_rate']:.0%} · "
+            f"대성공 {stats['crit_rate']:.1%} · 대실패 {stats['fumble_rate']:.1%}",
+        ]
+        if stats['average_vs_expected'] is not None:
+            lines.append(f"> 기댓값 대비 평균 **{stats['average_vs_expected']:+.2f}** "
+                         f"({stats['expected_rolls']}회 기준)")
+        current = '성공' if stats['streak_kind'] == 'success' else '실패'
+        lines.append(f"> 현재 연속 {current} {stats['streak']}회 · 최장 연속 성공 {stats['best_streak']}회 · "
+                     f"최장 연속 실패 {stats['worst_streak']}회")
+        await ctx.reply('\n'.join(lines))
+
+    @commands.command(name='session')
+    async def session_stats(self, ctx: commands.Context):
+        """!session - 이 채널의 현재 세션 굴림 통계"""
+        if self.history is None:
+            return
+        session = await self.history.session_stats(ctx.channel.id)
+        if session is None:
+            await ctx.reply("[지금 이 채널에서 진행 중인 쇼가 없군요. 주사위를 굴리면 바로 시작됩니다!]")
+            return
 
-        if not matches:
+        lines = [f"## 🎬 이번 세션 (<t:{int(session['started'])}:R> 시작)"]
+        for user_id, stats in session['users']:
+            expected = stats['average_vs_expected']
+            expected = f" · 기댓값 대비 {expected:+.2f}" if expected is not None else ''
+            lines.append(
+                f"> <@{user_id}> 굴림 {stats['rolls']}회 · 성공률 {stats['success_rate']:.0%} · "
+                f"대성공 {stats['crits']} · 대실패 {stats['fumbles']}{expected} · "
+                f"최장 연속 성공 {stats['best_streak']}"
+            )
+        await ctx.reply('\n'.join(lines)[:DISCORD_MESSAGE_LIMIT],
+                        allowed_mentions=discord.AllowedMentions.none())
+
+    @app_commands.command(name='roll', description='주사위를 굴립니다 (예: 1d20+5, 4d6kh3, 1d100b)')
+    @app_commands.describe(notation='주사위 표기 - 대괄호 없이 입력')
+    async def slash_roll(self, interaction: discord.Interaction,
+                         notation: app_commands.Range[str, 1, MAX_EXPRESSION_LENGTH]):
+        """/roll - 바로 응답을 미뤄 두고(생각 중 표시) 결과가 나오면 이어서 전송
+
+        스트리밍이 켜져 있으면 굴림 결과를 먼저 원래 응답에 채우고 대사는 받는 대로 수정
+        """
+        received = time.perf_counter()
+        await interaction.response.defer(thinking=True)
+        FIRST_REPLY.observe(time.perf_counter() - received, 'deferred')
+        try:
+            await self._slash_roll(interaction, notation, received)
+        except discord.HTTPException as e:
+            logger.error(f"/roll 응답 실패: {e}")
+        except Exception as e:
+            # 오류를 알리지 않으면 "생각 중..." 표시가 사용자에게 그대로 남음
+            logger.exception(f"/roll 처리 오류: {e!r}")
+            with contextlib.suppress(discord.HTTPException):
+                await interaction.followup.send(f"❌ [시스템 오류] 주사위를 굴리다 문제가 생겼군요: {str(e)}")
+        finally:
+            E2E_LATENCY.observe(time.perf_counter() - received, 'slash_roll')
+
+    async def _slash_roll(self, interaction: discord.Interaction, notation: str, received: float):
+        # 사용자 입력이 그대로 되돌아가는 답장이 있으므로 멘션은 모두 끔
+        send = functools.partial(interaction.followup.send, allowed_mentions=discord.AllowedMentions.none())
+
+        # _prepare_roll 은 메시지의 작성자/서버/채널만 쓰므로 상호작용으로 같은 모양을 만들어 재사용
+        source = SimpleNamespace(author=interaction.user, guild=interaction.guild, channel=interaction.channel)
+        prepared = await self._safe_prepare_roll(source, notation.strip().lower())
+        if prepared is None:
+            await send(f"[{discord.utils.escape_markdown(notation)} 는 제가 모르는 주사위군요! "
+                       f"예: `1d20+5`, `4d6kh3`, `1d100b`]")
+            return
+        if isinstance(prepared, str):
+            await send(prepared)
             return
 
-        for notation in matches:
-            await self._process_dice_roll(message, notation)
+        dice_result = prepared['dice_result']
+        pooled = self.narration_pool.take(dice_result) if self.narration_pool is not None else None
+        # 풀에서 꺼냈으면 API 를 부르지 않으므로 토큰도 쓰지 않음
+        guild_id = interaction.guild.id if interaction.guild else None
+        allow_llm = pooled is None and self.rate_limiter.acquire(interaction.user.id, guild_id)
+        if pooled is None and allow_llm and self.stream_narration:
+            await interaction.edit_original_response(content=self._format_roll(prepared, STREAMING_PLACEHOLDER))
+            FIRST_REPLY.observe(time.perf_counter() - received, 'streaming')
+            await self._stream_edits(prepared, interaction.edit_original_response)
+            return
 
-    async def _process_dice_roll(self, message: discord.Message, notation: str):
-        """주사위 롤 처리 및 에러 대응"""
+        # 풀은 위에서 이미 확인했으므로 다시 꺼내지 않음 (미스가 두 번 집계되지 않도록)
+        dynamic_message = pooled if pooled is not None else await self._narrate(
+            dice_result, asyncio.get_running_loop().time() + self.multi_roll_deadline, allow_llm, skip_pool=True
+        )
+        await send(self._format_roll(prepared, dynamic_message))
+        FIRST_REPLY.observe(time.perf_counter() - received, 'complete')
+
+    @app_commands.command(name='fortune', description='브라운의 미스테리 운세 토크')
+    async def slash_fortune(self, interaction: discord.Interaction):
+        """/fortune - [운세] 와 같은 운세 (캐시/레이트 리밋 공유)"""
+        received = time.perf_counter()
+        await interaction.response.defer(thinking=True)
+        FIRST_REPLY.observe(time.perf_counter() - received, 'deferred')
+
+        guild_id = interaction.guild.id if interaction.guild else None
+        allow_llm = self.rate_limiter.permit(interaction.user.id, guild_id)
         try:
-            dice_info = self.parse_dice_notation(notation)
-
-            # 1. 파싱 자체가 안 된 경우 (정규식 불일치) -> 무시
-            if not dice_info:
-                return
-
-            # 2. 에러 케이스 처리
-            if 'error' in dice_info:
-                error_type = dice_info['error']
-                response_msg = ""
-
-                # Case A: 불가능한 수치 (0) - API 사용
-                if error_type == 'impossible':
-                    async with message.channel.typing():
-                        dummy_result = {
-                            'success_level': 'impossible', 'total': 0,
-                            'notation': notation, 'username': message.author.display_name
-                        }
-                        response_msg = await self.perplexity.generate_brown_message(dummy_result)
-                        await message.reply(f"👻 {response_msg}")
-                    return
-
-                # Case B: 주사위 개수가 너무 많음
-                elif error_type == 'too_many_dice':
-                    quotes = [
-                        "[이런, 욕심이 과하시군요. 주사위는 100개까지만 허용됩니다. 그 이상은 스튜디오 바닥이 어지러워지거든요.]",
-                        "[잠시만요. 그렇게 많은 주사위를 한꺼번에 던지면 방송 사고가 납니다. 적당히 나눠서 굴리시죠?]",
-                        "[호. 손은 두 개뿐인데 주사위를 그렇게 많이 쥐시려고요? 100개 이하로 줄여주세요.]"
-                    ]
-                    response_msg = random.choice(quotes)
-
-                # Case C: 주사위 면체가 너무 큼
-                elif error_type == 'too_large_sides':
-                    quotes = [
-                        "[호. 1000면이 넘는 주사위라니? 그런 건 거의 구에 가깝죠. 굴러가다 영원히 멈추지 않을 겁니다.]",
-                        "[참가자분, 우리 스튜디오엔 그런 거대한 주사위가 없습니다. 1000면 이하의 상식적인 주사위를 사용해주세요.]",
-                        "[저런. 숫자가 너무 크군요. 그 정도 확률은 신의 영역에 맡겨두는 게 좋겠습니다.]"
-                    ]
-                    response_msg = random.choice(quotes)
-
-                # 에러 메시지 전송
-                await message.reply(response_msg)
-                return
-
-            # 3. 정상 처리
-            await self._roll_and_display(message, notation, dice_info)
+            fortune_msg = await self.perplexity.generate_fortune_message(
+                interaction.user.display_name, interaction.user.id, allow_api=allow_llm
+            )
+            # 대사에 사용자 이름이 들어가므로 멘션은 끔
+            await interaction.followup.send(f"## 🔮 브라운의 미스테리 운세 토크\n{fortune_msg}",
+                                            allowed_mentions=discord.AllowedMentions.none())
+        except Exception as e:
+            logger.error(f"운세 출력 실패: {e}")
+            await interaction.followup.send("[치직... 방송 신호가 약하군요. 다시 시도해주세요.]")
+        E2E_LATENCY.observe(time.perf_counter() - received, 'slash_fortune')
+
+    async def _process_dice_rolls(self, message: discord.Message, notations: list,
+                                  allow_llm: bool = True) -> list:
+        """여러 굴림을 처리해 표기 순서대로 답장 문구 반환
+
+        - 일괄 모드: 굴림을 먼저 모두 계산하고, 대사는 묶음당 API 1회로 생성
+        - 개별 모드: 굴림마다 API 호출 (동시 실행 수 제한)
+        두 경우 모두 전체 마감 시간을 넘기거나 allow_llm 이 거절하면 대체 메시지 사용
+        (allow_llm 은 API 호출마다 평가 - Permit 이면 호출/묶음마다 토큰 1개)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.multi_roll_deadline
+        semaphore = asyncio.Semaphore(self.multi_roll_concurrency)
+
+        if not self.batch_narration or len(notations) == 1:
+            async def _limited(notation: str):
+                async with semaphore:
+                    return await self._process_dice_roll(message, notation, deadline, allow_llm)
+
+            return await asyncio.gather(*(_limited(n) for n in notations))
+
+        prepared = await asyncio.gather(*(self._safe_prepare_roll(message, n) for n in notations))
+        pending = [p for p in prepared if isinstance(p, dict)]
+        batches = [
+            pending[i:i + self.batch_narration_size]
+            for i in range(0, len(pending), self.batch_narration_size)
+        ]
+
+        async def _narrate_batch(batch: list):
+            async with semaphore:
+                messages = await self._narrate_many([p['dice_result'] for p in batch], deadline, allow_llm)
+            for entry, dynamic_message in zip(batch, messages):
+                entry['text'] = self._format_roll(entry, dynamic_message)
+
+        await asyncio.gather(*(_narrate_batch(batch) for batch in batches))
+        return [p['text'] if isinstance(p, dict) else p for p in prepared]
+
+    async def _process_probability(self, num_dice: str, dice_sides: str, modifier: str,
+                                   comparator: str, target: str) -> str:
+        """[prob NdM+K>=X] 확률 계산 결과 문구"""
+        num_dice, dice_sides, target = int(num_dice), int(dice_sides), int(target)
+        modifier = int(modifier) if modifier else 0
+        expression = f"{num_dice}d{dice_sides}{modifier:+d}" if modifier else f"{num_dice}d{dice_sides}"
+        expression = f"{expression}{comparator}{target}"
+
+        if num_dice == 0 or dice_sides == 0:
+            return "[......존재하지 않는 주사위의 확률이라니. 그건 계산할 수 없는 영역입니다.]"
+        if probability_cost(num_dice, dice_sides) > self.prob_max_cost:
+            return f"[호. `{expression}` 의 확률은 계산기가 버티질 못하겠군요. 조금 더 작은 주사위로 물어봐 주세요.]"
 
+        query = (num_dice, dice_sides, modifier, comparator, target)
+        if probability_cost(num_dice, dice_sides) <= self.offload_prob_cost:
+            chance = probability(*query)
+        else:
+            try:
+                chance = await self.work_pool.run(probability_job, *query, timeout=self.offload_timeout)
+            except (asyncio.TimeoutError, WorkQueueFull, BrokenExecutor) as e:
+                logger.warning(f"확률 계산 포기 ({expression}): {e!r}")
+                return f"[아, 계산기가 과열됐군요! `{expression}` 은 잠시 후 다시 물어봐 주세요.]"
+        return (
+            f"## 📊 확률 계산\n"
+            f"> `{expression}` → **{float(chance) * 100:.2f}%** ({chance.numerator}/{chance.denominator})"
+        )
+
+    async def _safe_process_probability(self, *query) -> str:
+        """_process_probability 의 예외를 오류 문구로 변환 (질의 하나가 실패해도 나머지는 답장)"""
+        try:
+            return await self._process_probability(*query)
+        except Exception as e:
+            logger.error(f'확률 계산 오류: {e!r}')
+            return f'❌ [시스템 오류] 계산기에 문제가 생겼군요: {str(e)}'
+
+    def _merge_responses(self, responses: list) -> list:
+        """응답 목록을 디스코드 길이 제한에 맞게 묶음"""
+        chunks = []
+        current = ''
+        for text in responses:
+            if not text:
+                continue
+            if current and len(current) + 2 + len(text) > DISCORD_MESSAGE_LIMIT:
+                chunks.append(current)
+                current = ''
+            current = f"{current}\n\n{text}" if current else text
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _fallback_for(self, dice_result: dict) -> str:
+        """굴림 결과에 맞는 대체 메시지"""
+        return self.perplexity._get_fallback_message(
+            dice_result.get('success_level', 'success'),
+            dice_result.get('total', 0),
+            dice_result.get('username', '참가자')
+        )
+
+    async def _narrate(self, dice_result: dict, deadline: float | None, allow_llm: bool = True,
+                       skip_pool: bool = False) -> str:
+        """브라운 대사 생성 (풀 우선, 마감 시간 초과/호출 한도 초과 시 대체 메시지)
+
+        skip_pool: 호출 측에서 이미 풀을 확인했으면 True
+        """
+        if self.narration_pool is not None and not skip_pool:
+            pooled = self.narration_pool.take(dice_result)
+            if pooled is not None:
+                return pooled
+
+        if not allow_llm:
+            return self._fallback_for(dice_result)
+
+        if deadline is None:
+            return await self.perplexity.generate_brown_message(dice_result)
+
+        remaining = deadline - asyncio.get_running_loop().time()
+        try:
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            return await asyncio.wait_for(
+                self.perplexity.generate_brown_message(dice_result), timeout=remaining
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"대사 생성 마감 초과: {dice_result.get('notation')}")
+            return self._fallback_for(dice_result)
+
+    async def _narrate_many(self, dice_results: list, deadline: float, allow_llm: bool = True) -> list:
+        """여러 굴림의 대사 일괄 생성 (풀 우선, 마감 시간 초과/호출 한도 초과 시 대체 메시지)"""
+        messages = [
+            self.narration_pool.take(r) if self.narration_pool is not None else None
+            for r in dice_results
+        ]
+        missing = [i for i, m in enumerate(messages) if m is None]
+        if not missing:
+            return messages
+
+        if not allow_llm:
+            for i in missing:
+                messages[i] = self._fallback_for(dice_results[i])
+            return messages
+
+        remaining = deadline - asyncio.get_running_loop().time()
+        try:
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            generated = await asyncio.wait_for(
+                self.perplexity.generate_brown_messages([dice_results[i] for i in missing]),
+                timeout=remaining
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"일괄 대사 생성 마감 초과: {len(missing)}개")
+            generated = [self._fallback_for(dice_results[i]) for i in missing]
+
+        for i, message in zip(missing, generated):
+            messages[i] = message
+        return messages
+
+    async def _stream_dice_roll(self, message: discord.Message, notation: str, received: float,
+                                allow_llm=True):
+        """결과를 바로 답장한 뒤 스트리밍되는 대사로 같은 메시지를 수정
+
+        수정은 stream_edit_interval 마다 최대 한 번으로 모으고, 마감 시간을 넘기면 받은 데까지
+        (아무것도 못 받았으면 대체 메시지로) 마무리. 풀에 대사가 있거나 호출 한도를 넘었으면 한 번에 답장
+        """
+        prepared = await self._safe_prepare_roll(message, notation)
+        if not isinstance(prepared, dict):
+            if prepared:
+                await self._send_reply(message, prepared)
+            return
+
+        dice_result = prepared['dice_result']
+        pooled = self.narration_pool.take(dice_result) if self.narration_pool is not None else None
+        if pooled is None and not allow_llm:
+            pooled = self._fallback_for(dice_result)
+        if pooled is not None:
+            await self._send_reply(message, self._format_roll(prepared, pooled))
+            FIRST_REPLY.observe(time.perf_counter() - received, 'complete')
+            return
+
+        started = time.perf_counter()
+        reply = await message.reply(self._format_roll(prepared, STREAMING_PLACEHOLDER))
+        DISCORD_SEND.observe(time.perf_counter() - started)
+        FIRST_REPLY.observe(time.perf_counter() - received, 'streaming')
+        await self._stream_edits(prepared, reply.edit)
+
+    async def _stream_edits(self, prepared: dict, edit):
+        """스트리밍되는 대사를 edit(content=...) 로 반영 (이미 결과가 보이는 메시지 대상)"""
+        dice_result = prepared['dice_result']
+        loop = asyncio.get_running_loop()
+        text = ''
+        last_edit = loop.time()
+        try:
+            async with asyncio.timeout(self.multi_roll_deadline):
+                async for text in self.perplexity.stream_brown_message(dice_result):
+                    if loop.time() - last_edit >= self.stream_edit_interval:
+                        await edit(content=self._format_roll(prepared, f"{text}{STREAMING_PLACEHOLDER}"))
+                        last_edit = loop.time()
+        except TimeoutError:
+            logger.warning(f"스트리밍 대사 마감 초과: {dice_result.get('notation')}")
+        except discord.HTTPException as e:
+            logger.warning(f"스트리밍 중 메시지 수정 실패: {e}")
+
+        try:
+            await edit(content=self._format_roll(prepared, text.strip() or self._fallback_for(dice_result)))
+        except discord.HTTPException as e:
+            logger.error(f"스트리밍 결과 반영 실패: {e}")
+
+    async def _process_dice_roll(self, message: discord.Message, notation: str,
+                                 deadline: float | None = None, allow_llm: bool = True) -> str | None:
+        """주사위 롤 처리 및 에러 대응 (답장 문구 반환)"""
+        try:
+            prepared = await self._prepare_roll(message, notation)
+            if not isinstance(prepared, dict):
+                return prepared
+
+            dynamic_message = await self._narrate(prepared['dice_result'], deadline, allow_llm)
+            return self._format_roll(prepared, dynamic_message)
+
+        except Exception as e:
+            logger.error(f'다이스 롤 오류: {e}')
+            return f'❌ [시스템 오류] 방송 장비에 문제가 생겼군요: {str(e)}'
+
+    async def _safe_prepare_roll(self, message: discord.Message, notation: str) -> dict | str | None:
+        """_prepare_roll 의 예외를 오류 문구로 변환"""
+        try:
+            return await self._prepare_roll(message, notation)
         except Exception as e:
             logger.error(f'다이스 롤 오류: {e}')
-            await message.reply(f'❌ [시스템 오류] 방송 장비에 문제가 생겼군요: {str(e)}')
-
-    
-
-    async def _roll_and_display(self, message: discord.Message, notation: str, dice_info: dict):
-        """주사위를 굴리고 결과 표시 (Text 버전)"""
-        async with message.channel.typing():
-            # (로딩 메시지는 유지하거나 생략 가능)
-            
-            rolls = self.roll_dice(dice_info['num_dice'], dice_info['dice_sides'])
-            total = sum(rolls) + dice_info['modifier']
-            
-            success_info = self.determine_cthulhu_success(
-                total, rolls, dice_info['dice_sides']
+            return f'❌ [시스템 오류] 방송 장비에 문제가 생겼군요: {str(e)}'
+
+    async def _evaluate(self, expression) -> dict:
+        """표현식 굴림 - 주사위가 많으면 작업 풀에서 (마감 초과/대기열 포화 시 예외)
+
+        표시하지 않을 눈은 목록으로 만들지 않음 (ROLLS_DISPLAY_LIMIT 를 넘는 단순 항은 합계만)
+        """
+        if expression.total_dice < self.offload_roll_dice:
+            return expression.evaluate(self.dice_engine, ROLLS_DISPLAY_LIMIT)
+        return await self.work_pool.run(
+            evaluate_job, expression.text, self.dice_engine.spawn_seed(), self.dice_engine.use_numpy,
+            ROLLS_DISPLAY_LIMIT, timeout=self.offload_timeout
+        )
+
+    async def _prepare_roll(self, message: discord.Message, notation: str) -> dict | str | None:
+        """표기 해석 및 굴림 (대사 생성 전 단계)
+
+        반환값:
+        - None: 무시 (정규식 불일치)
+        - str: 대사 없이 바로 보낼 답장 (한도 초과 에러)
+        - dict: 대사 생성이 필요한 굴림 결과 ('dice_result' 포함)
+        """
+        dice_info = self.parse_dice_notation(notation)
+
+        # 1. 파싱 자체가 안 된 경우 (정규식 불일치) -> 무시
+        if not dice_info:
+            return None
+
+        # 2. 에러 케이스 처리
+        if 'error' in dice_info:
+            error_type = dice_info['error']
+
+            # Case A: 불가능한 수치 (0) - API 사용
+            if error_type == 'impossible':
+                return {
+                    'kind': 'impossible',
+                    'dice_result': {
+                        'success_level': 'impossible', 'total': 0,
+                        'notation': notation, 'username': message.author.display_name
+                    }
+                }
+
+            # Case B: 주사위 개수가 너무 많음
+            if error_type == 'too_many_dice':
+                quotes = [
+                    f"[이런, 욕심이 과하시군요. 주사위는 {dice_info['limit']}개까지만 허용됩니다. 그 이상은 스튜디오 바닥이 어지러워지거든요.]",
+                    "[잠시만요. 그렇게 많은 주사위를 한꺼번에 던지면 방송 사고가 납니다. 적당히 나눠서 굴리시죠?]",
+                    f"[호. 손은 두 개뿐인데 주사위를 그렇게 많이 쥐시려고요? {dice_info['limit']}개 이하로 줄여주세요.]"
+                ]
+                return random.choice(quotes)
+
+            # Case C: 주사위 면체가 너무 큼
+            if error_type == 'too_large_sides':
+                quotes = [
+                    f"[호. {dice_info['limit']}면이 넘는 주사위라니? 그런 건 거의 구에 가깝죠. 굴러가다 영원히 멈추지 않을 겁니다.]",
+                    f"[참가자분, 우리 스튜디오엔 그런 거대한 주사위가 없습니다. {dice_info['limit']}면 이하의 상식적인 주사위를 사용해주세요.]",
+                    "[저런. 숫자가 너무 크군요. 그 정도 확률은 신의 영역에 맡겨두는 게 좋겠습니다.]"
+                ]
+                return random.choice(quotes)
+
+            return ""
+
+        # 3. 정상 처리
+        expression = dice_info['expression']
+        try:
+            result = await self._evaluate(expression)
+        except (asyncio.TimeoutError, WorkQueueFull, BrokenExecutor) as e:
+            logger.warning(f"굴림 포기 ({notation}): {e!r}")
+            return "[잠깐, 주사위가 아직도 구르고 있군요…. 스튜디오가 너무 붐비니 잠시 후 다시 굴려주세요!]"
+        rolls = result['rolls']
+        total = result['total']
+
+        success_info = self.determine_cthulhu_success(
+            total, rolls, expression.max_sides, result
+        )
+
+        if self.history is not None:
+            self.history.record(
+                message.guild.id if message.guild else None, message.channel.id, message.author.id,
+                notation, total, expression.expected, success_info['success_level']
             )
-            
-            # AI 메시지 생성
-            dynamic_message = await self.perplexity.generate_brown_message({
+
+        return {
+            'kind': 'roll',
+            'notation': notation,
+            'rolls': rolls,
+            'roll_count': result['count'],
+            'detail': result['detail'],
+            'total': total,
+            'success_level': success_info['success_level'],
+            'username': message.author.display_name,
+            'dice_result': {
                 'total': total,
                 'rolls': rolls,
                 'notation': notation,
                 'success_level': success_info['success_level'],
                 'username': message.author.display_name
-            })
-            
-            # 결과 텍스트 포맷팅
-            rolls_str = ', '.join([str(r) for r in rolls])
-            
-            if dice_info['modifier'] != 0:
-                modifier_str = f"+ {dice_info['modifier']}" if dice_info['modifier'] > 0 else f"- {abs(dice_info['modifier'])}"
-                calculation = f"{sum(rolls)} {modifier_str} = **{total}**"
-            else:
-                calculation = f"{total}"
-
-            # 성공/실패 이모지
-            result_emoji = {
-                'critical_success': '🌟 대성공!',
-                'success': '👁️ 성공',
-                'failure': '🌑 실패',
-                'critical_failure': '💀 대실패...'
-            }.get(success_info['success_level'], '결과')
-
-            # [최종 메시지 조립]
-            # 1. 브라운의 대사 (인용구 처리 >)
-            # 2. 주사위 결과 요약
-            final_text = (
-                f"## 🎙️ {dynamic_message}\n"  # ##는 제목2 (적당히 큼)
-                f"> **{message.author.display_name}**님의 굴림: `{notation}`\n"
-                f"> ⚡ 결과: `[{rolls_str}]` → **{total}** ({result_emoji})"
-            )
-            
-            # 메시지 전송 (reply로 답장)
-            await message.reply(final_text)
+            }
+        }
+
+    def _format_roll(self, prepared: dict, dynamic_message: str) -> str:
+        """굴림 결과와 브라운 대사로 답장 문구 조립 (Text 버전)"""
+        if prepared['kind'] == 'impossible':
+            return f"👻 {dynamic_message}"
+
+        # 결과 텍스트 포맷팅
+        # 눈이 많으면 상세 표기 대신 유지된 눈 일부만 표시
+        # (큰 풀은 rolls 에 앞부분만 있으므로 개수는 roll_count 로)
+        rolls = prepared['rolls']
+        if prepared['roll_count'] > ROLLS_DISPLAY_LIMIT:
+            rolls_str = ', '.join([str(r) for r in rolls[:ROLLS_DISPLAY_LIMIT]])
+            rolls_str = f"[{rolls_str}, … (+{prepared['roll_count'] - ROLLS_DISPLAY_LIMIT}개)]"
+        else:
+            rolls_str = prepared['detail']
+
+        # 성공/실패 이모지
+        result_emoji = {
+            'critical_success': '🌟 대성공!',
+            'success': '👁️ 성공',
+            'failure': '🌑 실패',
+            'critical_failure': '💀 대실패...'
+        }.get(prepared['success_level'], '결과')
+
+        # [최종 메시지 조립]
+        # 1. 브라운의 대사 (인용구 처리 >)
+        # 2. 주사위 결과 요약
+        return (
+            f"## 🎙️ {dynamic_message}\n"  # ##는 제목2 (적당히 큼)
+            f"> **{prepared['username']}**님의 굴림: `{prepared['notation']}`\n"
+            f"> ⚡ 결과: `{rolls_str}` → **{prepared['total']}** ({result_emoji})"
+        )
 
     def _get_color_by_success(self, success_level: str) -> discord.Color:
         """성공 레벨에 따른 색상"""
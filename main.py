@@ -1,55 +1,232 @@
+import sys
+import time
+_PROCESS_STARTED = time.perf_counter()
+
 import discord
 from discord.ext import commands
 import logging
 import os
 from dotenv import load_dotenv
 import asyncio
+import signal
 from aiohttp import web
+import json
+from utils.metrics import REGISTRY
+from utils.loop_watchdog import LoopWatchdog
+from utils.health import HealthMonitor
+from utils.startup import StartupProfiler
+from utils.sharding import format_shard_ids, shard_config
+from utils import memory
+
+# python main.py --profile-startup: 준비 완료 시 단계별 소요 시간 출력
+startup = StartupProfiler(_PROCESS_STARTED, enabled='--profile-startup' in sys.argv)
+startup.mark('imports')
 
 load_dotenv()
-logging.basicConfig(level=logging.INFO)
+# supervisor.py 가 띄운 작업 프로세스면 로그 앞에 작업 번호 표시
+WORKER_ID = os.getenv('WORKER_ID')
+if WORKER_ID is not None:
+    logging.basicConfig(level=logging.INFO, format=f'[worker {WORKER_ID}] %(levelname)s:%(name)s:%(message)s')
+else:
+    logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 봇 설정
-intents = discord.Intents.default()
-intents.message_content = True
-bot = commands.Bot(command_prefix='!', intents=intents)
+# MEMORY_PROFILE=low: 작은 컨테이너용 (캐시 상한 축소, 인텐트/디스코드 캐시 최소화)
+# Cog 들이 환경 변수를 읽기 전에 적용해야 함
+MEMORY_PROFILE = memory.apply_memory_profile()
+# TRACEMALLOC_FRAMES>0 이면 시작부터 할당 추적 (/debug/memory 에 상위 할당 위치 표시)
+if int(os.getenv('TRACEMALLOC_FRAMES', '0')) > 0:
+    memory.start_tracing()
+
+COGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cogs')
+
+# 상태 확인/지표 웹 서버 포트 (작업 프로세스는 supervisor 가 프로세스마다 다른 포트를 지정)
+HEALTH_PORT = int(os.getenv('HEALTH_PORT', '8080'))
+
+# MESSAGE_CONTENT_SCAN=0: 메시지 본문 인텐트 없이 /roll, /fortune 만 사용
+#   (본문이 비어 오므로 !stats 등 접두사 명령은 봇 멘션으로: @브라운 !stats)
+MESSAGE_CONTENT_SCAN = os.getenv('MESSAGE_CONTENT_SCAN', '1') == '1'
+# APP_COMMANDS_SYNC=1: 시작 시 슬래시 명령 등록 (APP_COMMANDS_GUILD 를 주면 그 서버에만 - 즉시 반영되어 테스트용)
+#   명령 정의가 바뀐 배포에서만 켬 - 매 시작마다 등록하면 디스코드 요청 한도를 불필요하게 소모
+APP_COMMANDS_SYNC = os.getenv('APP_COMMANDS_SYNC', '0') == '1'
+APP_COMMANDS_GUILD = os.getenv('APP_COMMANDS_GUILD')
+
+# 봇 설정 - SHARD_COUNT(--shard-count) 를 지정하면 AutoShardedBot
+#   SHARD_COUNT=auto: 디스코드 권장 샤드 수 / SHARD_IDS=0-3: 이 프로세스가 맡을 샤드만
+client_options = memory.client_options(MEMORY_PROFILE, MESSAGE_CONTENT_SCAN)
+command_prefix = '!' if MESSAGE_CONTENT_SCAN else commands.when_mentioned_or('!')
+SHARD_COUNT, SHARD_IDS = shard_config(sys.argv[1:])
+if SHARD_COUNT is None:
+    bot = commands.Bot(command_prefix=command_prefix, **client_options)
+else:
+    bot = commands.AutoShardedBot(
+        command_prefix=command_prefix, **client_options,
+        shard_count=None if SHARD_COUNT == 'auto' else SHARD_COUNT,
+        shard_ids=SHARD_IDS,
+    )
+    shards = format_shard_ids(SHARD_IDS) if SHARD_IDS is not None else '전체'
+    logger.info(f"🧩 샤딩 모드: 샤드 {shards} / 총 {SHARD_COUNT}")
+if MEMORY_PROFILE != 'default':
+    logger.info(f"🪶 메모리 프로필: {MEMORY_PROFILE} (메시지 캐시 {client_options['max_messages'] or 0}개)")
 
 @bot.event
 async def on_ready():
     logger.info(f'✅ 봇이 준비되었습니다: {bot.user}')
+    startup.mark('gateway_ready')
+    startup.report_once()
 
 async def load_cogs():
-    for filename in os.listdir('./cogs'):
-        if filename.endswith('.py'):
+    """cogs 폴더의 모든 Cog 를 동시에 로드 (실행 위치와 무관하게 main.py 기준 경로)"""
+    async def _load(filename: str):
+        with startup.phase(f'cog:{filename[:-3]}'):
             await bot.load_extension(f'cogs.{filename[:-3]}')
-            logger.info(f'✓ Loaded cog: {filename}')
+        logger.info(f'✓ Loaded cog: {filename}')
+
+    filenames = sorted(f for f in os.listdir(COGS_DIR) if f.endswith('.py'))
+    await asyncio.gather(*(_load(f) for f in filenames))
+
+async def sync_app_commands():
+    """슬래시 명령 등록 - 작업 프로세스가 여럿이면 0번만 (같은 명령을 중복 등록하지 않도록)"""
+    if not APP_COMMANDS_SYNC or WORKER_ID not in (None, '0'):
+        return
+    try:
+        if APP_COMMANDS_GUILD:
+            guild = discord.Object(id=int(APP_COMMANDS_GUILD))
+            bot.tree.copy_global_to(guild=guild)
+            synced = await bot.tree.sync(guild=guild)
+        else:
+            synced = await bot.tree.sync()
+    except discord.HTTPException as e:
+        logger.error(f"❌ 슬래시 명령 등록 실패: {e}")
+        return
+    logger.info(f"✓ 슬래시 명령 {len(synced)}개 등록: {', '.join('/' + c.name for c in synced)}")
 
 # [웹 서버 핸들러]
 async def handle(request):
     return web.Response(text="I'm alive")
 
-async def main():
-    # 1. 봇 토큰 확인
-    token = os.getenv('DISCORD_TOKEN')
-    if not token:
-        logger.error('❌ DISCORD_TOKEN이 없습니다!')
-        return
+async def handle_livez(request):
+    """재시작이 필요한지 (루프 멈춤 / 클라이언트 종료)"""
+    status, body = request.app['health'].liveness()
+    return web.json_response(body, status=status)
+
+async def handle_readyz(request):
+    """트래픽을 받을 준비가 됐는지 (게이트웨이 연결, Cog, 루프 지연, LLM 상태)"""
+    status, body = request.app['health'].readiness()
+    return web.json_response(body, status=status)
+
+async def handle_metrics(request):
+    """Prometheus 스크레이프용 지표"""
+    return web.Response(text=REGISTRY.render(), content_type='text/plain', charset='utf-8')
 
-    # 2. 웹 서버 시작 (aiohttp) - 포트 8080
+async def handle_profiler(request):
+    """샘플링 프로파일러 제어 (ADMIN_TOKEN 헤더 필요, 미설정 시 비활성)
+
+    GET: 결과 조회 / POST ?action=start|stop: 켜고 끄기
+    """
+    admin_token = os.getenv('ADMIN_TOKEN')
+    if not admin_token or request.headers.get('X-Admin-Token') != admin_token:
+        raise web.HTTPNotFound()
+
+    watchdog = request.app['watchdog']
+    if request.method == 'POST':
+        action = request.query.get('action')
+        if action == 'start':
+            watchdog.start_profiler()
+        elif action == 'stop':
+            watchdog.stop_profiler()
+        else:
+            raise web.HTTPBadRequest(text="action 은 start 또는 stop")
+    return web.json_response(watchdog.profile_report(), dumps=lambda o: json.dumps(o, ensure_ascii=False))
+
+async def handle_memory(request):
+    """메모리 사용 현황 (ADMIN_TOKEN 헤더 필요, 미설정 시 비활성)
+
+    GET ?limit=N: RSS, 캐시별 항목 수, 객체 타입 상위 N, tracemalloc 상위 할당 위치
+    POST ?action=start|stop: tracemalloc 켜고 끄기 (켜 둔 동안 할당마다 비용이 붙음)
+    """
+    admin_token = os.getenv('ADMIN_TOKEN')
+    if not admin_token or request.headers.get('X-Admin-Token') != admin_token:
+        raise web.HTTPNotFound()
+
+    if request.method == 'POST':
+        action = request.query.get('action')
+        if action == 'start':
+            memory.start_tracing()
+        elif action == 'stop':
+            memory.stop_tracing()
+        else:
+            raise web.HTTPBadRequest(text="action 은 start 또는 stop")
+    try:
+        limit = int(request.query.get('limit', '20'))
+    except ValueError:
+        raise web.HTTPBadRequest(text="limit 은 정수")
+    report = await memory.memory_report(bot, MEMORY_PROFILE, limit)
+    return web.json_response(report, dumps=lambda o: json.dumps(o, ensure_ascii=False))
+
+async def start_web_server(watchdog: LoopWatchdog) -> web.AppRunner:
+    """상태 확인/지표 웹 서버 시작 (aiohttp) - 포트 HEALTH_PORT (기본 8080)"""
     app = web.Application()
+    app['watchdog'] = watchdog
+    app['health'] = HealthMonitor(bot, watchdog)
+    REGISTRY.add_collector('health', app['health'].collect_metrics)
+    REGISTRY.add_collector('memory', memory.collect_metrics)
     app.router.add_get('/', handle)
+    app.router.add_get('/livez', handle_livez)
+    app.router.add_get('/readyz', handle_readyz)
+    app.router.add_get('/metrics', handle_metrics)
+    app.router.add_get('/debug/profiler', handle_profiler)
+    app.router.add_post('/debug/profiler', handle_profiler)
+    app.router.add_get('/debug/memory', handle_memory)
+    app.router.add_post('/debug/memory', handle_memory)
     runner = web.AppRunner(app)
     await runner.setup()
     # 0.0.0.0으로 바인딩하여 외부 접속 허용
-    site = web.TCPSite(runner, '0.0.0.0', 8080)
+    site = web.TCPSite(runner, '0.0.0.0', HEALTH_PORT)
     await site.start()
-    logger.info("🌍 웹 서버가 8080 포트에서 시작되었습니다.")
+    logger.info(f"🌍 웹 서버가 {HEALTH_PORT} 포트에서 시작되었습니다.")
+    return runner
+
+async def main():
+    # 1. 봇 토큰 확인
+    token = os.getenv('DISCORD_TOKEN')
+    if not token:
+        logger.error('❌ DISCORD_TOKEN이 없습니다!')
+        return
 
-    # 3. 봇 실행
+    # 이벤트 루프 막힘 감시 + 루프 지연 측정 (관리 명령/HTTP 에서 프로파일러 제어)
+    watchdog = LoopWatchdog()
+    watchdog.start()
+    bot.loop_watchdog = watchdog
+
+    # 2. 웹 서버 시작 - 상태 확인이 가장 먼저 응답하도록
+    with startup.phase('health_server'):
+        await start_web_server(watchdog)
+
+    # 3. 봇 실행 - 로그인 후 게이트웨이 연결과 Cog 로드를 동시에 진행
+    #    (Cog 로드가 끝나기 전에는 /readyz 가 준비되지 않음으로 응답)
     async with bot:
-        await load_cogs()
-        await bot.start(token)
+        # SIGTERM(컨테이너 중지, supervisor 의 terminate)이면 bot.close() 로 정상 종료
+        #   (Cog 언로드로 기록 버퍼/운세 캐시를 쓰고 게이트웨이를 닫음)
+        closing = []
+
+        def on_sigterm():
+            logger.info("⏹️ 종료 신호 - 봇 종료 중")
+            closing.append(asyncio.create_task(bot.close()))
+
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, on_sigterm)
+        with startup.phase('login'):
+            await bot.login(token)
+        gateway = asyncio.create_task(bot.connect())
+        try:
+            with startup.phase('cogs'):
+                await load_cogs()
+            with startup.phase('app_commands'):
+                await sync_app_commands()
+            await gateway
+        finally:
+            gateway.cancel()
+            await asyncio.gather(*closing)
 
 if __name__ == '__main__':
     try:
@@ -0,0 +1,261 @@
+"""여러 작업 프로세스로 샤드를 나눠 실행하는 관리 프로세스
+
+사용법:
+    python supervisor.py --shard-count 8 --processes 2
+    (또는 SHARD_COUNT=8 WORKER_PROCESSES=2 python supervisor.py)
+
+- 샤드 0..N-1 을 연속 구간으로 나눠 프로세스마다 `python main.py` 를 띄움
+  (SHARD_COUNT/SHARD_IDS/WORKER_ID/WORKER_COUNT/HEALTH_PORT 환경 변수로 전달)
+- 전역 LLM 호출 한도(RATE_LIMIT_GLOBAL_*)는 WORKER_COUNT 로 나눠 프로세스마다 같은 몫을 씀
+- 작업 프로세스는 각자 WORKER_BASE_PORT + 번호 포트에서 /livez, /readyz, /metrics 제공
+- 이 프로세스는 기존 포트(HEALTH_PORT, 기본 8080)에서 전체를 모아 응답
+  /livez: 관리 프로세스가 살아 있으면 200 (죽은 작업 프로세스는 여기서 재시작)
+  /readyz: 모든 작업 프로세스가 준비돼야 200
+  /metrics: 작업 프로세스 지표에 worker 라벨을 붙여 합친 것 + 관리 프로세스 지표
+- 작업 프로세스가 종료되면 지수 백오프(최대 60초)로 다시 띄움
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+from dotenv import load_dotenv
+
+from utils.metrics import Registry
+from utils.sharding import format_shard_ids, merge_metrics, split_shards
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO, format='[supervisor] %(levelname)s:%(name)s:%(message)s')
+logger = logging.getLogger(__name__)
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+DISCORD_GATEWAY_BOT_URL = 'https://discord.com/api/v10/gateway/bot'
+
+# 관리 프로세스 자체 지표 (작업 프로세스 지표와 합쳐서 노출)
+REGISTRY = Registry()
+WORKER_UP = REGISTRY.gauge('supervisor_worker_up', '작업 프로세스 실행 여부', ('worker',))
+WORKER_RESTARTS = REGISTRY.counter('supervisor_worker_restarts_total', '작업 프로세스 재시작 횟수', ('worker',))
+
+
+class Worker:
+    """작업 프로세스 하나 - 샤드 구간과 상태 확인 포트를 가지고, 종료되면 다시 띄움"""
+
+    def __init__(self, worker_id: int, shard_ids: list, shard_count: int, port: int, worker_count: int = 1):
+        self.id = worker_id
+        self.worker_count = worker_count
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.port = port
+        self.process: asyncio.subprocess.Process | None = None
+        self.restarts = 0
+        self.started_at: float | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.port}'
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    def _env(self) -> dict:
+        return {
+            **os.environ,
+            'SHARD_COUNT': str(self.shard_count),
+            'SHARD_IDS': format_shard_ids(self.shard_ids),
+            'WORKER_ID': str(self.id),
+            'WORKER_COUNT': str(self.worker_count),
+            'HEALTH_PORT': str(self.port),
+        }
+
+    async def _spawn(self):
+        self.process = await asyncio.create_subprocess_exec(sys.executable, MAIN_SCRIPT, env=self._env())
+        self.started_at = time.monotonic()
+        WORKER_UP.set(1, str(self.id))
+        logger.info(f"▶ worker {self.id} 시작 (pid {self.process.pid}, 샤드 {format_shard_ids(self.shard_ids)}, "
+                    f"포트 {self.port})")
+
+    async def _run(self):
+        backoff = 1.0
+        while not self._stopping:
+            await self._spawn()
+            code = await self.process.wait()
+            WORKER_UP.set(0, str(self.id))
+            if self._stopping:
+                break
+            # 한동안 잘 돌았으면 백오프 초기화
+            if time.monotonic() - self.started_at > 60:
+                backoff = 1.0
+            self.restarts += 1
+            WORKER_RESTARTS.inc(str(self.id))
+            logger.warning(f"⚠️ worker {self.id} 종료 (코드 {code}) - {backoff:.0f}초 후 재시작")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10):
+        self._stopping = True
+        if self.running:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def summary(self) -> dict:
+        return {
+            'pid': self.process.pid if self.process else None,
+            'running': self.running,
+            'shards': format_shard_ids(self.shard_ids),
+            'port': self.port,
+            'restarts': self.restarts,
+        }
+
+
+class Supervisor:
+    def __init__(self, workers: list, probe_timeout: float):
+        self.workers = workers
+        self.probe_timeout = probe_timeout
+        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=probe_timeout))
+
+    async def start(self, stagger: float):
+        for index, worker in enumerate(self.workers):
+            if index:
+                # 디스코드 IDENTIFY 한도(기본 5초에 1회)에 걸리지 않도록 앞 작업의 샤드 수만큼 간격을 둠
+                await asyncio.sleep(stagger * len(self.workers[index - 1].shard_ids))
+            worker.start()
+
+    async def stop(self):
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+        await self._session.close()
+
+    async def _fetch(self, worker: Worker, path: str) -> tuple:
+        """(HTTP 상태, 본문 텍스트) - 연결 실패/시간 초과면 (None, 오류)"""
+        if not worker.running:
+            return None, 'not running'
+        try:
+            async with self._session.get(worker.url + path) as response:
+                return response.status, await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return None, repr(e)
+
+    async def _probe_all(self, path: str) -> list:
+        return await asyncio.gather(*(self._fetch(worker, path) for worker in self.workers))
+
+    async def readiness(self) -> tuple:
+        results = await self._probe_all('/readyz')
+        workers = {}
+        ready = True
+        for worker, (status, text) in zip(self.workers, results):
+            try:
+                body = json.loads(text) if status is not None else {'status': 'unreachable', 'error': text}
+            except json.JSONDecodeError:
+                body = {'status': 'invalid', 'error': text[:200]}
+            ready = ready and status == 200
+            workers[str(worker.id)] = {**worker.summary(), 'health': body}
+        return (200 if ready else 503), {'status': 'ok' if ready else 'fail', 'workers': workers}
+
+    def liveness(self) -> tuple:
+        return 200, {
+            'status': 'ok',
+            'workers': {str(w.id): w.summary() for w in self.workers},
+        }
+
+    async def metrics(self) -> str:
+        results = await self._probe_all('/metrics')
+        texts = {str(worker.id): text for worker, (status, text) in zip(self.workers, results) if status == 200}
+        return merge_metrics(texts) + REGISTRY.render()
+
+
+async def handle(request):
+    return web.Response(text="I'm alive")
+
+
+async def handle_livez(request):
+    status, body = request.app['supervisor'].liveness()
+    return web.json_response(body, status=status)
+
+
+async def handle_readyz(request):
+    status, body = await request.app['supervisor'].readiness()
+    return web.json_response(body, status=status, dumps=lambda o: json.dumps(o, ensure_ascii=False))
+
+
+async def handle_metrics(request):
+    return web.Response(text=await request.app['supervisor'].metrics(), content_type='text/plain', charset='utf-8')
+
+
+async def recommended_shards(token: str) -> int:
+    """디스코드 권장 샤드 수 (GET /gateway/bot)"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(DISCORD_GATEWAY_BOT_URL, headers={'Authorization': f'Bot {token}'}) as response:
+            response.raise_for_status()
+            return int((await response.json())['shards'])
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='샤드를 여러 작업 프로세스로 나눠 실행')
+    parser.add_argument('--shard-count', default=os.getenv('SHARD_COUNT', 'auto'),
+                        help="전체 샤드 수 또는 auto (디스코드 권장값)")
+    parser.add_argument('--processes', type=int, default=int(os.getenv('WORKER_PROCESSES', '2')))
+    parser.add_argument('--port', type=int, default=int(os.getenv('HEALTH_PORT', '8080')))
+    parser.add_argument('--base-port', type=int, default=int(os.getenv('WORKER_BASE_PORT', '8081')))
+    args = parser.parse_args()
+
+    if args.shard_count == 'auto':
+        token = os.getenv('DISCORD_TOKEN')
+        if not token:
+            logger.error('❌ DISCORD_TOKEN이 없습니다!')
+            return
+        shard_count = await recommended_shards(token)
+        logger.info(f"✓ 디스코드 권장 샤드 수: {shard_count}")
+    else:
+        shard_count = int(args.shard_count)
+
+    groups = split_shards(shard_count, args.processes)
+    workers = [Worker(i, ids, shard_count, args.base_port + i, len(groups)) for i, ids in enumerate(groups)]
+    supervisor = Supervisor(workers, probe_timeout=float(os.getenv('WORKER_PROBE_TIMEOUT', '2')))
+
+    app = web.Application()
+    app['supervisor'] = supervisor
+    app.router.add_get('/', handle)
+    app.router.add_get('/livez', handle_livez)
+    app.router.add_get('/readyz', handle_readyz)
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '0.0.0.0', args.port).start()
+    logger.info(f"🌍 관리 웹 서버가 {args.port} 포트에서 시작되었습니다. (작업 {len(workers)}개, 샤드 {shard_count}개)")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    starting = asyncio.create_task(supervisor.start(float(os.getenv('WORKER_START_STAGGER', '5'))))
+    await stop.wait()
+    logger.info("⏹️ 종료 신호 - 작업 프로세스 정리 중")
+    starting.cancel()
+    await supervisor.stop()
+    await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+# 테스트용 Cog 기본 설정 - 네트워크/디스크/백그라운드 작업 없이 (개별 테스트에서 덮어씀)
+COG_ENV = {
+    'LLM_PROVIDERS': 'offline',
+    'NARRATION_POOL': '0',
+    'ROLL_HISTORY': '0',
+    'PERSONA_RELOAD_INTERVAL': '0',
+    'FORTUNE_CACHE_PATH': '',
+    'OFFLOAD_MODE': 'thread',
+    'STREAM_NARRATION': '0',
+    'COALESCE_WINDOW': '0',
+    'RATE_LIMIT': '0',
+}
+
+
+class CallCounter:
+    """LLMRouter 의 generate/stream 호출 횟수 (제공자에 실제로 보낸 요청 수)"""
+
+    def __init__(self, router):
+        self.calls = 0
+        generate, stream = router.generate, router.stream
+
+        async def counted_generate(messages, params):
+            self.calls += 1
+            return await generate(messages, params)
+
+        def counted_stream(messages, params):
+            self.calls += 1
+            return stream(messages, params)
+
+        router.generate = counted_generate
+        router.stream = counted_stream
+
+
+@pytest.fixture
+def make_cog(monkeypatch):
+    """환경 변수를 덮어써 DiceRoller 생성 → (cog, CallCounter)"""
+    cogs = []
+
+    def _make(**env):
+        for key, value in {**COG_ENV, **env}.items():
+            monkeypatch.setenv(key, value)
+        from cogs.dice_roller import DiceRoller
+        cog = DiceRoller(SimpleNamespace(user=None))
+        cogs.append(cog)
+        return cog, CallCounter(cog.perplexity.router)
+
+    yield _make
+    for cog in cogs:
+        cog.work_pool.shutdown()
+        asyncio.run(cog.perplexity.close())
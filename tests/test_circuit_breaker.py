@@ -0,0 +1,125 @@
+import pytest
+
+from utils import circuit_breaker
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, percentile
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(monkeypatch, clock):
+    monkeypatch.setenv('BREAKER_WINDOW', '10')
+    monkeypatch.setenv('BREAKER_MIN_CALLS', '4')
+    monkeypatch.setenv('BREAKER_ERROR_RATE', '0.5')
+    monkeypatch.setenv('BREAKER_P95_LATENCY', '5')
+    monkeypatch.setenv('BREAKER_COOLDOWN', '30')
+    return CircuitBreaker('test', max_timeout=10)
+
+
+def open_breaker(breaker):
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+
+
+def test_percentile():
+    assert percentile([], 0.95) == 0.0
+    assert percentile([1, 2, 3, 4], 0.5) == 2
+    assert percentile(list(range(1, 101)), 0.95) == 95
+
+
+def test_stays_closed_below_min_calls(breaker):
+    for _ in range(3):
+        breaker.record_failure(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_opens_on_error_rate(breaker):
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CLOSED
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 1
+
+
+def test_opens_on_p95_latency(breaker):
+    for _ in range(3):
+        breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    breaker.record_success(6)
+    assert breaker.state == OPEN
+
+
+def test_open_short_circuits_until_cooldown(breaker, clock):
+    open_breaker(breaker)
+    assert not breaker.allow_request()
+    clock.now += 29
+    assert not breaker.allow_request()
+    assert breaker.short_circuits == 2
+    clock.now += 1
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+
+
+def test_half_open_allows_a_single_probe(breaker, clock):
+    open_breaker(breaker)
+    clock.now += 30
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+
+
+def test_probe_success_closes_and_resets_window(breaker, clock):
+    open_breaker(breaker)
+    clock.now += 30
+    breaker.allow_request()
+    breaker.record_success(0.2)
+    assert breaker.state == CLOSED
+    assert breaker.error_rate() == 0.0
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def test_probe_failure_reopens(breaker, clock):
+    open_breaker(breaker)
+    clock.now += 30
+    breaker.allow_request()
+    breaker.record_failure(0.2)
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+    assert not breaker.allow_request()
+    clock.now += 30
+    assert breaker.allow_request()
+
+
+def test_cancelled_probe_releases_slot(breaker, clock):
+    open_breaker(breaker)
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_cancelled()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_adaptive_timeout(breaker):
+    assert breaker.current_timeout() == 10
+    assert breaker.hedge_delay() is None
+    for latency in (1, 1, 1, 2):
+        breaker.record_success(latency)
+    assert breaker.hedge_delay() == 2
+    assert breaker.current_timeout() == 4
@@ -0,0 +1,70 @@
+from fractions import Fraction
+
+import pytest
+
+from utils.dice_engine import ROLL_CHUNK, DiceEngine, probability, sum_distribution
+from utils.dice_parser import parse_expression
+
+
+def python_engine(seed: int = 3) -> DiceEngine:
+    return DiceEngine(seed=seed, use_numpy=False)
+
+
+def test_roll_range():
+    rolls = python_engine().roll(1000, 6)
+    assert len(rolls) == 1000
+    assert set(rolls) == set(range(1, 7))
+
+
+@pytest.mark.parametrize('num_dice', [1, 10, ROLL_CHUNK + 5])
+def test_roll_sum_matches_roll_with_same_seed(num_dice):
+    rolls = python_engine().roll(num_dice, 20)
+    total, above = python_engine().roll_sum(num_dice, 20, 10)
+    assert total == sum(rolls)
+    assert above == sum(1 for r in rolls if r > 10)
+    assert python_engine().roll_sum(num_dice, 20) == (total, 0)
+
+
+def test_sum_distribution_counts():
+    assert sum_distribution(2, 6) == (1, 2, 3, 4, 5, 6, 5, 4, 3, 2, 1)
+    assert sum(sum_distribution(4, 10)) == 10 ** 4
+
+
+@pytest.mark.parametrize('comparator, target, expected', [
+    ('>=', 7, Fraction(21, 36)),
+    ('<=', 2, Fraction(1, 36)),
+    ('==', 7, Fraction(6, 36)),
+    ('>', 12, Fraction(0)),
+])
+def test_probability(comparator, target, expected):
+    assert probability(2, 6, 0, comparator, target) == expected
+
+
+@pytest.mark.parametrize('notation', ['500d6', '20d6+40d20+3', '10d8-300d4', '4d6kh3+200d6', '100d6+1d6!'])
+def test_preview_summary_matches_full_evaluation(notation):
+    expression = parse_expression(notation)
+    full = expression.evaluate(python_engine())
+    preview = expression.evaluate(python_engine(), 30)
+
+    assert preview['total'] == full['total']
+    for key in ('count', 'above', 'all_max'):
+        assert preview[key] == full[key], key
+    assert full['count'] == len(full['rolls'])
+    assert preview['rolls'][:30] == full['rolls'][:30]  # 표시되는 앞부분은 같음
+
+
+def test_preview_only_summarizes_truncated_plain_terms():
+    expression = parse_expression('3d6+2d20')
+    assert expression.evaluate(python_engine(), 30) == expression.evaluate(python_engine())
+
+
+def test_all_max_summary():
+    class MaxEngine:
+        def roll(self, num_dice, dice_sides):
+            return [dice_sides] * num_dice
+
+        def roll_sum(self, num_dice, dice_sides, above=None):
+            return num_dice * dice_sides, num_dice if above is not None and dice_sides > above else 0
+
+    assert parse_expression('100d6').evaluate(MaxEngine(), 30)['all_max']
+    assert not parse_expression('100d6+1d8').evaluate(MaxEngine(), 30)['all_max']
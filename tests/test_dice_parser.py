@@ -0,0 +1,158 @@
+import pytest
+
+from utils.dice_engine import DiceEngine
+from utils.dice_parser import (
+    MAX_EXPLOSIONS, MAX_EXPRESSION_LENGTH, MAX_NUMBER_DIGITS, MAX_TERMS,
+    DiceSyntaxError, DiceTerm, parse_expression,
+)
+
+
+def only_term(text: str) -> DiceTerm:
+    (term,) = parse_expression(text).dice_terms
+    return term
+
+
+@pytest.mark.parametrize('text, count, sides', [
+    ('1d20', 1, 20),
+    ('d6', 1, 6),
+    ('3d6', 3, 6),
+    ('10d100', 10, 100),
+])
+def test_plain_dice(text, count, sides):
+    term = only_term(text)
+    assert (term.count, term.sides, term.keep, term.explode, term.coc) == (count, sides, None, False, 0)
+
+
+def test_multiple_terms_and_constants():
+    expression = parse_expression('1d20+1d4-2+3')
+    assert [sign for sign, _ in expression.terms] == [1, 1, -1, 1]
+    assert expression.total_dice == 2
+    assert expression.max_sides == 20
+    assert expression.expected == pytest.approx(10.5 + 2.5 - 2 + 3)
+
+
+def test_leading_minus():
+    assert parse_expression('-1d4+5').terms[0][0] == -1
+
+
+@pytest.mark.parametrize('text, keep, keep_count, count', [
+    ('4d6kh3', 'kh', 3, 4),
+    ('4d6k3', 'kh', 3, 4),
+    ('2d20kl1', 'kl', 1, 2),
+    ('4d6dl1', 'kh', 3, 4),
+    ('4d6dh1', 'kl', 3, 4),
+    ('4d6kh9', 'kh', 4, 4),
+    ('1d20adv', 'kh', 1, 2),
+    ('1d20dis', 'kl', 1, 2),
+])
+def test_keep_and_drop(text, keep, keep_count, count):
+    term = only_term(text)
+    assert (term.keep, term.keep_count, term.count) == (keep, keep_count, count)
+
+
+def test_explode():
+    term = only_term('3d6!')
+    assert term.explode
+    assert term.expected == pytest.approx(3 * 3.5 * 6 / 5)
+
+
+@pytest.mark.parametrize('text, coc', [
+    ('1d100b', 1),
+    ('1d100b2', 2),
+    ('1d100p', -1),
+    ('1d100p3', -3),
+])
+def test_bonus_penalty(text, coc):
+    term = only_term(text)
+    assert term.coc == coc
+    assert term.expected is None
+
+
+@pytest.mark.parametrize('text', [
+    '',
+    'd',
+    '1d',
+    'abc',
+    '1d20+',
+    '1d20 + 3',
+    '1d20x',
+    '3+4',
+    '2d20adv',
+    '1d1!',
+    '1d20b',
+    '2d100p',
+    '1d100b0',
+    '1d100p0',
+    '1d100!b',
+    '1d100!p2',
+])
+def test_rejects(text):
+    with pytest.raises(DiceSyntaxError):
+        parse_expression(text)
+
+
+def test_expression_length_cap():
+    text = '1d6' + '+1' * MAX_EXPRESSION_LENGTH
+    with pytest.raises(DiceSyntaxError, match='표현식이 너무 깁니다'):
+        parse_expression(text[:MAX_EXPRESSION_LENGTH + 1])
+
+
+def test_term_count_cap():
+    parse_expression('+'.join(['1d6'] * MAX_TERMS))
+    with pytest.raises(DiceSyntaxError):
+        parse_expression('+'.join(['1d6'] * (MAX_TERMS + 1)))
+
+
+def test_number_digits_cap():
+    parse_expression(f"1d{'9' * MAX_NUMBER_DIGITS}")
+    with pytest.raises(DiceSyntaxError):
+        parse_expression(f"1d{'9' * (MAX_NUMBER_DIGITS + 1)}")
+
+
+def test_zero_dice_is_impossible_not_an_error():
+    assert parse_expression('0d6').is_impossible
+    assert parse_expression('1d0').is_impossible
+
+
+def test_parse_cache_shares_expression():
+    assert parse_expression('2d8+1') is parse_expression('2d8+1')
+
+
+class MaxEngine:
+    """항상 최대 눈 (폭발 상한 확인용)"""
+
+    def roll(self, num_dice, dice_sides):
+        return [dice_sides] * num_dice
+
+
+def test_explosion_cap():
+    total, kept, _ = only_term('1d6!').evaluate(MaxEngine())
+    assert len(kept) == 1 + MAX_EXPLOSIONS
+    assert total == 6 * (1 + MAX_EXPLOSIONS)
+
+
+def test_keep_evaluation_marks_dropped_dice():
+    class Fixed:
+        def roll(self, num_dice, dice_sides):
+            return [3, 6, 1, 5][:num_dice]
+
+    total, kept, label = only_term('4d6kh3').evaluate(Fixed())
+    assert total == 14
+    assert kept == [3, 6, 5]
+    assert label == '[3, 6, (1), 5]'
+
+
+def test_seeded_evaluation_is_reproducible():
+    expression = parse_expression('4d6kh3+1d8!+2')
+    first = expression.evaluate(DiceEngine(seed=42, use_numpy=False))
+    second = expression.evaluate(DiceEngine(seed=42, use_numpy=False))
+    assert first == second
+    assert first['total'] == sum(first['rolls']) + 2
+
+
+def test_coc_result_in_range():
+    engine = DiceEngine(seed=1, use_numpy=False)
+    for text in ('1d100b2', '1d100p2'):
+        for _ in range(200):
+            result = parse_expression(text).evaluate(engine)
+            assert 1 <= result['total'] <= 100
@@ -0,0 +1,123 @@
+import asyncio
+from types import SimpleNamespace
+
+from benchmarks.fake_discord import FakeMessage
+
+
+def roll(cog, content: str) -> FakeMessage:
+    message = FakeMessage(content, author_id=1, guild_id=1)
+    asyncio.run(cog.on_message(message))
+    return message
+
+
+def test_multi_roll_replies_in_notation_order(make_cog):
+    cog, counter = make_cog(BATCH_NARRATION='1')
+    message = roll(cog, '[1d20+5] 공격 [2d6+3] 피해 [prob 3d6>=15]')
+    (reply,) = message.replies
+    assert reply.index('확률 계산') < reply.index('`1d20+5`') < reply.index('`2d6+3`')
+    assert counter.calls == 1
+
+
+def test_rolls_per_message_are_capped(make_cog):
+    cog, counter = make_cog(MAX_ROLLS_PER_MESSAGE='3', BATCH_NARRATION='0')
+    message = roll(cog, ' '.join(['[1d6]'] * 20) + ' [prob 1d6>=3]')
+    text = '\n'.join(message.replies)
+    assert text.count('확률 계산') == 1
+    assert text.count('`1d6`') == 2
+    assert '3개까지만' in text and '나머지 18개' in text
+    assert counter.calls == 2
+
+
+def test_cap_skips_streaming_so_the_notice_is_sent(make_cog):
+    cog, counter = make_cog(MAX_ROLLS_PER_MESSAGE='1', STREAM_NARRATION='1')
+    message = roll(cog, '[1d6] [1d8]')
+    assert not message.edits
+    text = '\n'.join(message.replies)
+    assert '`1d6`' in text and '`1d8`' not in text
+    assert '나머지 1개' in text
+
+
+def test_large_pool_shows_prefix_and_full_count(make_cog):
+    cog, _ = make_cog()
+    (reply,) = roll(cog, '[500d6]').replies
+    assert '(+470개)' in reply
+
+
+def test_success_judgement_uses_the_whole_pool(make_cog):
+    from utils.dice_engine import DiceEngine
+    from utils.dice_parser import parse_expression
+
+    cog, _ = make_cog()
+    expression = parse_expression('200d6+50d8')
+    for seed in range(20):
+        full = expression.evaluate(DiceEngine(seed, use_numpy=False))
+        summary = expression.evaluate(DiceEngine(seed, use_numpy=False), 30)
+        expected = cog.determine_cthulhu_success(full['total'], full['rolls'], expression.max_sides)
+        actual = cog.determine_cthulhu_success(summary['total'], summary['rolls'], expression.max_sides, summary)
+        assert actual['success_level'] == expected['success_level']
+
+
+def test_streamed_single_rolls_join_in_flight_narration(make_cog):
+    cog, counter = make_cog(STREAM_NARRATION='1', COALESCE_WINDOW='0.01', COALESCE_MAX_WAITERS='20')
+    provider = cog.perplexity.router.providers[0]
+    request = provider._request
+
+    async def slow_request(messages, params):
+        await asyncio.sleep(0.05)
+        return await request(messages, params)
+
+    provider._request = slow_request
+    messages = [FakeMessage('[1d20]', author_id=i, guild_id=1) for i in range(20)]
+
+    async def run():
+        await asyncio.gather(*(cog.on_message(m) for m in messages))
+
+    asyncio.run(run())
+    # 판정 단계(최대 4개)마다 스트리밍 선두 1회 + 뒤따른 요청의 묶음 호출 1회
+    assert counter.calls <= 8
+    assert all(len(m.replies) == 1 and m.edits for m in messages)
+
+
+def test_failing_probability_query_gets_an_error_reply(make_cog):
+    cog, _ = make_cog()
+    original = cog._process_probability
+
+    async def flaky(num_dice, *rest):
+        if num_dice == '2':
+            raise RuntimeError('boom')
+        return await original(num_dice, *rest)
+
+    cog._process_probability = flaky
+    message = roll(cog, '[prob 2d6>=7] [prob 1d6>=4]')
+    text = '\n'.join(message.replies)
+    assert '시스템 오류' in text and 'boom' in text
+    assert text.count('확률 계산') == 1
+
+
+class FakeInteraction:
+    def __init__(self):
+        self.user = SimpleNamespace(id=1, display_name='tester')
+        self.guild = None
+        self.channel = FakeMessage('', author_id=1).channel
+        self.followups = []
+        self.response = SimpleNamespace(defer=self._defer)
+        self.followup = SimpleNamespace(send=self._send)
+
+    async def _defer(self, **kwargs):
+        pass
+
+    async def _send(self, content, **kwargs):
+        self.followups.append(content)
+
+
+def test_slash_roll_reports_unexpected_errors(make_cog):
+    cog, _ = make_cog()
+
+    async def broken(*args):
+        raise RuntimeError('boom')
+
+    cog._slash_roll = broken
+    interaction = FakeInteraction()
+    asyncio.run(cog.slash_roll.callback(cog, interaction, '1d6'))
+    (reply,) = interaction.followups
+    assert '시스템 오류' in reply and 'boom' in reply
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import time
+
+from utils.fortune_cache import FortuneCache, FortuneEntry
+
+
+def test_hit_after_put_and_miss_for_others():
+    cache = FortuneCache(max_entries=10, ttl=60, path='')
+    assert cache.get(1) is None
+    cache.put(1, '대길')
+    assert cache.get(1) == '대길'
+    assert cache.get(2) is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 1)
+
+
+def test_expired_and_yesterdays_entries_are_dropped():
+    cache = FortuneCache(max_entries=10, ttl=60, path='')
+    cache.put(1, '대길')
+    cache._entries[1].expires_at = time.time() - 1
+    assert cache.get(1) is None
+    cache._store(2, FortuneEntry('흉', '2000-01-01', time.time() + 60))
+    assert cache.get(2) is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_lru_evicts_least_recently_used():
+    cache = FortuneCache(max_entries=2, ttl=60, path='')
+    cache.put(1, 'a')
+    cache.put(2, 'b')
+    assert cache.get(1) == 'a'
+    cache.put(3, 'c')
+    assert cache.get(2) is None
+    assert cache.get(1) == 'a' and cache.get(3) == 'c'
+    assert cache.evictions == 1
+
+
+def test_file_is_compacted_on_load(tmp_path):
+    path = tmp_path / 'fortune.jsonl'
+    today = FortuneCache(path=str(path)).today()
+    later = time.time() + 60
+    records = [
+        {'user_id': 1, 'date': today, 'value': 'old', 'expires_at': later},
+        {'user_id': 2, 'date': '2000-01-01', 'value': 'stale', 'expires_at': later},
+        {'user_id': 3, 'date': today, 'value': 'expired', 'expires_at': time.time() - 1},
+        {'user_id': 1, 'date': today, 'value': 'new', 'expires_at': later},
+    ]
+    path.write_text(''.join(json.dumps(r) + '\n' for r in records) + 'not json\n', encoding='utf-8')
+
+    cache = FortuneCache(max_entries=10, ttl=60, path=str(path))
+    asyncio.run(cache.load())
+    assert cache.get(1) == 'new'
+    assert cache.get(2) is None and cache.get(3) is None
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)['value'] for line in lines] == ['new']
+
+
+def test_buffered_appends_survive_restart(tmp_path):
+    path = str(tmp_path / 'fortune.jsonl')
+
+    async def write():
+        cache = FortuneCache(max_entries=10, ttl=60, path=path)
+        await cache.load()
+        for user_id in range(5):
+            cache.put(user_id, f'운세 {user_id}')
+        await cache.close()
+
+    asyncio.run(write())
+    cache = FortuneCache(max_entries=10, ttl=60, path=path)
+    asyncio.run(cache.load())
+    assert [cache.get(user_id) for user_id in range(5)] == [f'운세 {i}' for i in range(5)]
+
+
+def test_put_during_load_wins_and_is_kept(tmp_path):
+    path = tmp_path / 'fortune.jsonl'
+    today = FortuneCache(path=str(path)).today()
+    path.write_text(json.dumps(
+        {'user_id': 1, 'date': today, 'value': 'file', 'expires_at': time.time() + 60}) + '\n', encoding='utf-8')
+
+    async def run():
+        cache = FortuneCache(max_entries=10, ttl=60, path=str(path))
+        # 루프 안의 첫 조회는 파일을 기다리지 않고 미스 처리, 읽기는 스레드에서 진행
+        assert cache.get(1) is None
+        cache.put(1, 'fresh')
+        await cache.load()
+        assert cache.get(1) == 'fresh'
+        await cache.close()
+
+    asyncio.run(run())
+    cache = FortuneCache(max_entries=10, ttl=60, path=str(path))
+    asyncio.run(cache.load())
+    assert cache.get(1) == 'fresh'
+
+
+def test_load_outside_loop_reads_synchronously(tmp_path):
+    path = str(tmp_path / 'fortune.jsonl')
+    FortuneCache(max_entries=10, ttl=60, path=path).put(7, '평')
+    assert FortuneCache(max_entries=10, ttl=60, path=path).get(7) == '평'
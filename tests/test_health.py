@@ -0,0 +1,131 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.health import HealthMonitor
+from utils.metrics import LOOP_LAG_LAST
+
+
+class FakeBot:
+    def __init__(self, cogs=('DiceRoller',)):
+        self.listeners = {}
+        self.latency = 0.05
+        self.ready = True
+        self.closed = False
+        self.cogs = {name: SimpleNamespace() for name in cogs}
+
+    def add_listener(self, func, name):
+        self.listeners.setdefault(name, []).append(func)
+
+    def dispatch(self, name, *args):
+        for func in self.listeners.get(name, []):
+            asyncio.run(func(*args))
+
+    def is_ready(self):
+        return self.ready
+
+    def is_closed(self):
+        return self.closed
+
+    def get_cog(self, name):
+        return None
+
+
+class FakeShardedBot(FakeBot):
+    def __init__(self, shard_ids):
+        super().__init__()
+        self.shards = {}
+        self.shard_ids = shard_ids
+        self.shard_count = 8
+        self.latencies = [(i, 0.05) for i in shard_ids]
+
+
+class FakeWatchdog:
+    def __init__(self):
+        self.stalled_for = 0.0
+
+    def stats(self):
+        return {'stalled_for': self.stalled_for}
+
+
+@pytest.fixture(autouse=True)
+def no_loop_lag():
+    LOOP_LAG_LAST.set(0)
+    yield
+    LOOP_LAG_LAST.set(0)
+
+
+def test_ready_only_after_gateway_connects():
+    bot = FakeBot()
+    health = HealthMonitor(bot, FakeWatchdog())
+    status, body = health.readiness()
+    assert status == 503 and body['problems'] == ['gateway_disconnected']
+
+    bot.dispatch('on_connect')
+    status, body = health.readiness()
+    assert status == 200 and body['status'] == 'ok'
+
+    bot.dispatch('on_disconnect')
+    status, body = health.readiness()
+    assert status == 503 and body['gateway']['disconnects'] == 1
+    assert body['gateway']['disconnected_for'] is not None
+
+
+def test_missing_cog_and_loop_lag_fail_readiness(monkeypatch):
+    monkeypatch.setenv('READYZ_MAX_LOOP_LAG', '0.5')
+    bot = FakeBot(cogs=())
+    health = HealthMonitor(bot, FakeWatchdog())
+    bot.dispatch('on_connect')
+    LOOP_LAG_LAST.set(0.8)
+    status, body = health.readiness()
+    assert status == 503
+    assert body['problems'] == ['cogs_missing', 'event_loop_lagging']
+    assert body['cogs']['missing'] == ['DiceRoller']
+
+
+def test_liveness_fails_on_stall_or_closed_client(monkeypatch):
+    monkeypatch.setenv('LIVEZ_MAX_STALL', '5')
+    bot = FakeBot()
+    watchdog = FakeWatchdog()
+    health = HealthMonitor(bot, watchdog)
+    assert health.liveness()[0] == 200
+
+    # 연결 전에 닫혀 있는 건 시작 중이므로 정상
+    bot.closed = True
+    assert health.liveness()[0] == 200
+    bot.dispatch('on_connect')
+    assert health.liveness()[1]['problems'] == ['client_closed']
+
+    bot.closed = False
+    watchdog.stalled_for = 6
+    status, body = health.liveness()
+    assert status == 503 and body['problems'] == ['event_loop_stalled']
+
+
+def test_saturated_offload_is_degraded_not_failed(make_cog):
+    cog, _ = make_cog()
+    bot = FakeBot()
+    bot.get_cog = lambda name: cog
+    health = HealthMonitor(bot, FakeWatchdog())
+    bot.dispatch('on_connect')
+    cog.work_pool.stats = lambda: {'saturation': 1.0, 'stale': 0}
+    status, body = health.readiness()
+    assert status == 200 and body['status'] == 'degraded'
+    assert body['degraded'] == ['offload_saturated']
+
+
+def test_sharded_bot_is_ready_when_all_its_shards_connect():
+    bot = FakeShardedBot([2, 3])
+    health = HealthMonitor(bot, FakeWatchdog())
+    bot.dispatch('on_shard_connect', 2)
+    assert health.readiness()[1]['problems'] == ['gateway_disconnected']
+
+    bot.dispatch('on_shard_connect', 3)
+    status, body = health.readiness()
+    assert status == 200 and set(body['gateway']['shards']) == {2, 3}
+
+    bot.dispatch('on_shard_disconnect', 3)
+    assert health.readiness()[0] == 503
+    connected = dict(health.collect_metrics()[0][3])
+    assert connected == {(('shard', '2'),): 1, (('shard', '3'),): 0}
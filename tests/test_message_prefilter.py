@@ -0,0 +1,47 @@
+import asyncio
+
+from benchmarks.fake_discord import FakeChannel, FakeMessage
+from utils.message_prefilter import MessagePrefilter
+
+
+def message(content: str, channel_id: int = 0) -> FakeMessage:
+    return FakeMessage(content, author_id=1, channel=FakeChannel(channel_id))
+
+
+def test_extracts_rolls_and_probs_in_one_scan():
+    scan = MessagePrefilter(set()).scan(message('공격 [1d20+5] 피해 [2d6+3] [prob 3d6>=15] [1d6x]'))
+    assert scan == {'fortune': False, 'rolls': ['1d20+5', '2d6+3'],
+                    'probs': [('3', '6', '', '>=', '15')]}
+
+
+def test_fortune_only_when_it_is_the_whole_message():
+    prefilter = MessagePrefilter(set())
+    assert prefilter.scan(message('  [운세] '))['fortune']
+    assert prefilter.scan(message('오늘 [운세] 어때')) is None
+
+
+def test_skips_bots_webhooks_disabled_channels_and_plain_text():
+    prefilter = MessagePrefilter({7})
+    bot = message('[1d6]')
+    bot.author.bot = True
+    webhook = message('[1d6]')
+    webhook.webhook_id = 99
+    for skipped in (bot, webhook, message('[1d6]', channel_id=7), message('그냥 대화'), message('[잡담]')):
+        assert prefilter.scan(skipped) is None
+    assert prefilter.scan(message('[1d6]', channel_id=8)) is not None
+    assert prefilter.stats() == {'scanned': 6, 'matched': 1}
+
+
+def test_disabled_channels_from_env(monkeypatch):
+    monkeypatch.setenv('DICE_DISABLED_CHANNELS', '3, 4,')
+    assert MessagePrefilter().disabled_channels == {3, 4}
+
+
+def test_gated_messages_get_no_reply(make_cog):
+    cog, counter = make_cog(DICE_DISABLED_CHANNELS='5')
+    gated = [message('[1d6]', channel_id=5), message('그냥 대화')]
+    gated[1].author.bot = True
+    for m in gated:
+        asyncio.run(cog.on_message(m))
+        assert not m.replies and m.channel.typing_count == 0
+    assert counter.calls == 0
@@ -0,0 +1,60 @@
+from utils.metrics import Registry
+
+
+def test_counter_and_gauge_render_per_label():
+    registry = Registry()
+    rolls = registry.counter('rolls_total', '굴림 수', ('kind',))
+    rolls.inc('dice')
+    rolls.inc('dice', amount=2)
+    rolls.inc('prob')
+    registry.gauge('queue_depth', '대기 작업').set(0.5)
+    assert registry.counter('rolls_total', '다른 설명') is rolls
+
+    lines = registry.render().splitlines()
+    assert lines[:4] == ['# HELP rolls_total 굴림 수', '# TYPE rolls_total counter',
+                         'rolls_total{kind="dice"} 3', 'rolls_total{kind="prob"} 1']
+    assert lines[-1] == 'queue_depth 0.5'
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', '지연', ('mode',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, 'fast')
+    assert latency.count('fast') == 4
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{mode="fast",le="0.1"} 2',
+        'latency_seconds_bucket{mode="fast",le="1"} 3',
+        'latency_seconds_bucket{mode="fast",le="+Inf"} 4',
+        'latency_seconds_sum{mode="fast"} 3.65',
+        'latency_seconds_count{mode="fast"} 4',
+    ]
+
+
+def test_collectors_render_at_scrape_time_and_failures_are_skipped():
+    registry = Registry()
+    state = {'entries': 1}
+    registry.add_collector('cache', lambda: [
+        ('cache_entries', 'gauge', '캐시 항목', {(): state['entries'], (('name', 'a"b\n'),): 2}),
+    ])
+
+    def broken():
+        raise RuntimeError('boom')
+
+    registry.add_collector('broken', broken)
+    state['entries'] = 7
+    assert registry.render().splitlines() == [
+        '# HELP cache_entries 캐시 항목', '# TYPE cache_entries gauge',
+        'cache_entries 7', 'cache_entries{name="a\\"b\\n"} 2',
+    ]
+    registry.remove_collector('cache')
+    assert registry.render() == '\n'
+
+
+def test_dice_roller_collector_renders(make_cog):
+    cog, _ = make_cog()
+    registry = Registry()
+    registry.add_collector('dice_roller', cog._collect_metrics)
+    text = registry.render()
+    assert '# TYPE offload_recycles_total counter' in text
+    assert 'fortune_cache_requests_total{result="hit"} 0' in text
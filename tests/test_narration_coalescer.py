@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from utils.narration_coalescer import NarrationCoalescer, coalesce_key
+
+
+class FakeGenerator:
+    """개별 생성/템플릿 생성 호출을 기록하는 가짜 생성기"""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.single_calls = 0
+        self.template_calls = []
+
+    async def _generate_brown_message(self, dice_result: dict) -> str:
+        self.single_calls += 1
+        await asyncio.sleep(self.latency)
+        return f"[{dice_result['username']} 개별]"
+
+    async def generate_brown_templates(self, success_level: str, count: int) -> list:
+        self.template_calls.append(count)
+        await asyncio.sleep(self.latency)
+        return [f"[{{username}}님 {{total}}점 #{i}]" for i in range(count)]
+
+    def _get_fallback_message(self, success_level: str, total: int, username: str) -> str:
+        return f"[{username} 대체]"
+
+
+def result(username: str, notation: str = '1d20', level: str = 'success', total: int = 12) -> dict:
+    return {'username': username, 'notation': notation, 'success_level': level, 'total': total}
+
+
+@pytest.fixture
+def coalescer(monkeypatch):
+    monkeypatch.setenv('COALESCE_WINDOW', '0.02')
+    monkeypatch.setenv('COALESCE_MAX_WAITERS', '8')
+    generator = FakeGenerator()
+    return NarrationCoalescer(generator), generator
+
+
+def test_key_normalizes_notation():
+    assert coalesce_key(result('a', '1D20 + 5')) == coalesce_key(result('b', '1d20+5'))
+    assert coalesce_key(result('a', '1d20', 'failure')) != coalesce_key(result('a', '1d20'))
+
+
+def test_lone_request_starts_immediately(coalescer):
+    coalescer, generator = coalescer
+    generator.latency = 0
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        text = await coalescer.narrate(result('a'))
+        return text, loop.time() - started
+
+    text, elapsed = asyncio.run(run())
+    assert text == '[a 개별]'
+    assert elapsed < coalescer.window
+    assert generator.single_calls == 1
+    assert coalescer.stats()['in_flight'] == 0
+
+
+def test_burst_shares_one_template_call(coalescer):
+    coalescer, generator = coalescer
+
+    async def run():
+        return await asyncio.gather(*(coalescer.narrate(result(f'u{i}', total=i)) for i in range(6)))
+
+    texts = asyncio.run(run())
+    assert texts[0] == '[u0 개별]'
+    assert generator.single_calls == 1
+    assert generator.template_calls == [5]
+    assert sorted(t.split('#')[1] for t in texts[1:]) == ['0]', '1]', '2]', '3]', '4]']
+    assert all(f'u{i}님 {i}점' in texts[i] for i in range(1, 6))
+    assert coalescer.stats()['coalesced'] == 5
+
+
+def test_different_keys_are_not_shared(coalescer):
+    coalescer, generator = coalescer
+
+    async def run():
+        return await asyncio.gather(coalescer.narrate(result('a', '1d20')), coalescer.narrate(result('b', '1d6')))
+
+    assert asyncio.run(run()) == ['[a 개별]', '[b 개별]']
+    assert generator.single_calls == 2
+    assert generator.template_calls == []
+
+
+def test_full_flight_closes_and_opens_a_new_one(coalescer):
+    coalescer, generator = coalescer
+    coalescer.max_waiters = 3
+
+    async def run():
+        return await asyncio.gather(*(coalescer.narrate(result(f'u{i}')) for i in range(8)))
+
+    asyncio.run(run())
+    assert generator.template_calls == [3, 3]
+    assert generator.single_calls == 2  # 선두 + 혼자 남은 묶음
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call(coalescer):
+    coalescer, generator = coalescer
+
+    async def run():
+        leader = asyncio.create_task(coalescer.narrate(result('a')))
+        await asyncio.sleep(0)
+        impatient = asyncio.create_task(coalescer.narrate(result('b')))
+        patient = asyncio.create_task(coalescer.narrate(result('c')))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        return await leader, await patient
+
+    leader, patient = asyncio.run(run())
+    assert leader == '[a 개별]'
+    assert patient == '[c 개별]'  # 취소된 요청을 빼고 혼자 남아 개별 생성
+    assert generator.single_calls == 2
+
+
+def test_leading_makes_requests_join(coalescer):
+    coalescer, generator = coalescer
+
+    async def run():
+        with coalescer.leading(result('streamer')):
+            assert coalescer.in_flight(result('other'))
+            texts = await asyncio.gather(coalescer.narrate(result('a')), coalescer.narrate(result('b')))
+        assert not coalescer.in_flight(result('other'))
+        return texts
+
+    texts = asyncio.run(run())
+    assert generator.single_calls == 0
+    assert generator.template_calls == [2]
+    assert len(set(texts)) == 2
+
+
+def test_template_failure_falls_back_per_request(coalescer):
+    coalescer, generator = coalescer
+
+    async def broken(success_level, count):
+        raise RuntimeError('provider down')
+
+    generator.generate_brown_templates = broken
+
+    async def run():
+        with coalescer.leading(result('x')):
+            return await asyncio.gather(coalescer.narrate(result('a')), coalescer.narrate(result('b')))
+
+    assert asyncio.run(run()) == ['[a 대체]', '[b 대체]']
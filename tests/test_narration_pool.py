@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from utils.narration_pool import SUCCESS_LEVELS, NarrationPool
+
+RESULT = {'success_level': 'success', 'username': '브라운', 'total': 17, 'notation': '1d20'}
+
+
+class FakeGenerator:
+    def __init__(self, templates=None):
+        self.templates = templates
+        self.calls = []
+
+    async def generate_brown_templates(self, success_level: str, count: int) -> list:
+        self.calls.append((success_level, count))
+        if self.templates is not None:
+            return self.templates
+        return [f'{success_level} {{username}} {{total}} #{i}' for i in range(count)]
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv('NARRATION_POOL_TARGET', '4')
+    monkeypatch.setenv('NARRATION_POOL_LOW_WATER', '2')
+    monkeypatch.setenv('NARRATION_POOL_INTERVAL', '60')
+    monkeypatch.setenv('NARRATION_POOL_START_DELAY', '60')
+    return NarrationPool(FakeGenerator())
+
+
+def test_render_fills_placeholders_and_keeps_other_braces():
+    text = NarrationPool.render('{username} 님 {total}! ({notation}) {}', RESULT)
+    assert text == '브라운 님 17! (1d20) {}'
+
+
+def test_only_known_placeholders_are_valid():
+    assert NarrationPool.is_valid_template('{username} 님 {total}')
+    assert not NarrationPool.is_valid_template('{user} 님')
+    assert not NarrationPool.is_valid_template('   ')
+
+
+def test_add_filters_invalid_and_stops_at_target(pool):
+    added = pool.add('success', ['{bad}', ' a ', 'b', 'c', 'd', 'e'])
+    assert added == 4
+    assert list(pool.buckets['success']) == ['a', 'b', 'c', 'd']
+
+
+def test_take_counts_hits_and_misses_and_wakes_refill(pool):
+    pool.add('success', ['{username} 1', '{username} 2', '{username} 3'])
+    assert pool.take(RESULT) == '브라운 1'
+    assert not pool._wakeup.is_set()
+    assert pool.take(RESULT) == '브라운 2'
+    assert pool._wakeup.is_set()  # 최저 수위 아래
+    pool._wakeup.clear()
+    assert pool.take({**RESULT, 'success_level': 'failure'}) is None
+    assert pool._wakeup.is_set()
+    assert (pool.stats()['hits'], pool.stats()['misses']) == (2, 1)
+
+
+def test_refill_once_tops_up_only_low_buckets(pool):
+    pool.add('success', ['a', 'b', 'c'])
+    pool.add('failure', ['a'])
+    asyncio.run(pool.refill_once())
+    assert ('success', 1) not in pool.generator.calls
+    assert ('failure', 3) in pool.generator.calls
+    assert pool.stats()['sizes']['failure'] == 4
+    assert pool.stats()['sizes']['success'] == 3
+    assert pool.refills == len(SUCCESS_LEVELS) - 1
+
+
+def test_refill_once_raises_when_generation_fails(pool):
+    pool.generator = FakeGenerator(templates=[])
+    with pytest.raises(RuntimeError):
+        asyncio.run(pool.refill_once())
+
+
+def test_miss_starts_refill_before_the_start_delay(pool):
+    async def run():
+        pool.start()
+        assert pool.take(RESULT) is None
+        for _ in range(100):
+            await asyncio.sleep(0)
+            if pool.stats()['sizes']['success']:
+                break
+        await pool.stop()
+        return pool.take(RESULT)
+
+    assert asyncio.run(run()) == 'success 브라운 17 #0'
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import BrokenExecutor
+
+import pytest
+
+from utils.offload import WorkPool, WorkQueueFull, evaluate_job, probability_job
+
+
+def slow(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def crash():
+    os._exit(1)
+
+
+def test_runs_jobs_in_threads():
+    pool = WorkPool(mode='thread', workers=2, max_queued=4)
+
+    async def run():
+        return await asyncio.gather(
+            pool.run(probability_job, 2, 6, 0, '>=', 7),
+            pool.run(evaluate_job, '40d6', 1, False, 30),
+            pool.run(threading.current_thread),
+        )
+
+    try:
+        chance, result, thread = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert chance.numerator / chance.denominator == pytest.approx(21 / 36)
+    assert result['count'] == 40 and len(result['rolls']) == 30
+    assert thread.name.startswith('offload')
+    assert pool.stats()['in_use'] == 0
+
+
+def test_queue_limit_rejects():
+    pool = WorkPool(mode='thread', workers=1, max_queued=1)
+
+    async def run():
+        first = asyncio.create_task(pool.run(slow, 0.05))
+        await asyncio.sleep(0)
+        assert pool.saturation == 1
+        with pytest.raises(WorkQueueFull):
+            await pool.run(slow, 0)
+        return await first
+
+    try:
+        assert asyncio.run(run()) == 0.05
+    finally:
+        pool.shutdown()
+    assert pool.stats()['rejected'] == 1
+
+
+def test_timeout_recycles_the_pool():
+    pool = WorkPool(mode='thread', workers=1, max_queued=4)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(slow, 0.3, timeout=0.05)
+        # 마감을 넘긴 작업이 작업자를 붙잡고 있어도 새 풀에서 바로 실행
+        started = time.perf_counter()
+        assert await pool.run(slow, 0, timeout=0.1) == 0
+        return time.perf_counter() - started
+
+    try:
+        assert asyncio.run(run()) < 0.1
+        stats = pool.stats()
+        assert (stats['timeouts'], stats['recycles'], stats['broken']) == (1, 1, 0)
+        assert stats['stale'] == 1
+        time.sleep(0.35)
+        assert pool.stale == 0
+    finally:
+        pool.shutdown()
+
+
+def test_crashed_worker_process_is_replaced():
+    pool = WorkPool(mode='process', workers=1, max_queued=4)
+
+    async def run():
+        with pytest.raises(BrokenExecutor):
+            await pool.run(crash, timeout=10)
+        return await pool.run(probability_job, 1, 6, 0, '>=', 4, timeout=10)
+
+    try:
+        chance = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert chance.numerator / chance.denominator == pytest.approx(0.5)
+    assert pool.stats()['broken'] == 1
+
+
+def test_pool_broken_while_idle_is_replaced_on_submit():
+    pool = WorkPool(mode='process', workers=1, max_queued=4)
+
+    async def run():
+        assert await pool.run(slow, 0, timeout=10) == 0
+        for process in list(pool._executor._processes.values()):
+            process.kill()
+            process.join()
+        await asyncio.sleep(0.2)  # 풀 관리 스레드가 작업자 종료를 감지할 시간
+        return await pool.run(slow, 0, timeout=10)
+
+    try:
+        assert asyncio.run(run()) == 0
+    finally:
+        pool.shutdown()
+    assert pool.stats()['broken'] == 1
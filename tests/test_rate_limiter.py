@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+
+from utils.rate_limiter import BucketGroup, RateLimiter
+
+
+def test_bucket_starts_full_and_rejects_when_empty():
+    group = BucketGroup(rate=1, burst=3, max_buckets=10)
+    for _ in range(3):
+        bucket = group.check('a', now=0)
+        assert bucket is not None
+        bucket.tokens -= 1
+    assert group.check('a', now=0) is None
+    assert group.rejections == 1
+
+
+def test_refill_is_proportional_to_elapsed_time():
+    group = BucketGroup(rate=0.5, burst=2, max_buckets=10)
+    group.check('a', now=0).tokens = 0
+    assert group.check('a', now=1) is None
+    assert group.buckets['a'].tokens == pytest.approx(0.5)
+    assert group.check('a', now=2) is not None
+    assert group.buckets['a'].tokens == pytest.approx(1)
+
+
+def test_refill_is_capped_at_burst():
+    group = BucketGroup(rate=10, burst=2, max_buckets=10)
+    group.check('a', now=0).tokens = 0
+    group.check('a', now=100)
+    assert group.buckets['a'].tokens == 2
+
+
+def test_peek_does_not_change_state():
+    group = BucketGroup(rate=1, burst=1, max_buckets=10)
+    assert group.peek('a', now=0)
+    assert 'a' not in group.buckets
+    group.check('a', now=0).tokens = 0
+    assert not group.peek('a', now=0.5)
+    assert group.peek('a', now=1)
+    assert group.buckets['a'].tokens == 0
+    assert group.rejections == 0
+
+
+def test_eviction_removes_least_recently_used_first():
+    group = BucketGroup(rate=1, burst=100, max_buckets=3)
+    for key in ('a', 'b', 'c'):
+        group.check(key, now=0)
+    group.check('a', now=1)  # a 를 최근 사용으로
+    group.check('d', now=1)
+    assert list(group.buckets) == ['b', 'c', 'a', 'd']
+
+    group.evict(now=1)
+    assert list(group.buckets) == ['c', 'a', 'd']
+    group.check('e', now=1)
+    group.evict(now=1)
+    assert list(group.buckets) == ['a', 'd', 'e']
+
+
+def test_eviction_drops_idle_buckets():
+    group = BucketGroup(rate=1, burst=2, max_buckets=10)
+    group.check('a', now=0)
+    group.check('b', now=1)
+    group.check('c', now=5)
+    group.evict(now=2.5)  # a 만 idle_after(2초) 경과
+    assert list(group.buckets) == ['b', 'c']
+    group.evict(now=3)
+    assert list(group.buckets) == ['c']
+
+
+def test_eviction_checks_a_constant_number_per_call():
+    group = BucketGroup(rate=1, burst=1, max_buckets=100)
+    for i in range(10):
+        group.check(i, now=0)
+    group.evict(now=100)
+    assert len(group.buckets) == 8
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setenv('RATE_LIMIT', '1')
+    monkeypatch.setenv('RATE_LIMIT_USER_RATE', '0.001')
+    monkeypatch.setenv('RATE_LIMIT_USER_BURST', '2')
+    monkeypatch.setenv('RATE_LIMIT_GUILD_RATE', '0.001')
+    monkeypatch.setenv('RATE_LIMIT_GUILD_BURST', '3')
+    monkeypatch.setenv('RATE_LIMIT_GLOBAL_RATE', '0.001')
+    monkeypatch.setenv('RATE_LIMIT_GLOBAL_BURST', '100')
+    return RateLimiter()
+
+
+def test_acquire_takes_from_every_scope(limiter):
+    assert limiter.acquire(1, 10)
+    assert limiter.acquire(1, 10)
+    assert not limiter.acquire(1, 10)
+    assert limiter.acquire(2, 10)
+    assert not limiter.acquire(3, 10)  # 서버 버킷 소진
+    assert limiter.acquire(3, None)
+    stats = limiter.stats()
+    assert stats['user']['rejections'] == 1
+    assert stats['guild']['rejections'] == 1
+
+
+def test_rejected_acquire_does_not_spend_other_scopes(limiter):
+    limiter.acquire(1, 10)
+    limiter.acquire(1, 10)
+    assert not limiter.acquire(1, 10)
+    assert limiter.acquire(2, 10)  # 거절된 요청이 서버 토큰을 쓰지 않았으면 남은 1개로 허용
+
+
+def test_permit_takes_a_token_per_evaluation(limiter):
+    permit = limiter.permit(1, 10)
+    unused = limiter.permit(1, 10)
+    assert limiter.available(1, 10)
+    assert permit and permit
+    assert permit.granted == 2
+    assert not permit
+    assert not limiter.available(1, 10)
+    assert not unused
+
+
+def test_permit_stays_denied_for_the_rest_of_the_message(limiter, monkeypatch):
+    permit = limiter.permit(1, 10)
+    assert permit and permit and not permit
+    clock = iter([1e9, 1e9])
+    monkeypatch.setattr('utils.rate_limiter.time.monotonic', lambda: next(clock))
+    assert not permit  # 토큰이 충전됐어도 같은 메시지에서는 다시 허용하지 않음
+    assert limiter.permit(1, 10)
+
+
+@pytest.mark.parametrize('batch', ['0', '1'])
+def test_one_token_per_llm_call_in_a_message(make_cog, batch):
+    from benchmarks.fake_discord import FakeMessage
+
+    cog, counter = make_cog(RATE_LIMIT='1', RATE_LIMIT_USER_BURST='2', RATE_LIMIT_USER_RATE='0.001',
+                            BATCH_NARRATION=batch, BATCH_NARRATION_SIZE='8', MAX_ROLLS_PER_MESSAGE='40')
+    message = FakeMessage(' '.join(['[1d6]'] * 40), author_id=1, guild_id=1)
+    asyncio.run(cog.on_message(message))
+
+    assert counter.calls == 2
+    assert cog.rate_limiter.stats()['user']['rejections'] == 1
+    assert sum(reply.count('1d6') for reply in message.replies) == 40
+
+
+def test_disabled_limiter_allows_everything(monkeypatch):
+    monkeypatch.setenv('RATE_LIMIT', '0')
+    limiter = RateLimiter()
+    assert all(limiter.acquire(1, 10) for _ in range(100))
+    assert limiter.available(1, 10)
+
+
+def test_global_budget_is_split_across_worker_processes(monkeypatch):
+    monkeypatch.setenv('RATE_LIMIT', '1')
+    monkeypatch.setenv('RATE_LIMIT_GLOBAL_RATE', '8')
+    monkeypatch.setenv('RATE_LIMIT_GLOBAL_BURST', '100')
+    monkeypatch.setenv('WORKER_COUNT', '4')
+    limiter = RateLimiter()
+    assert limiter.groups['global'].rate == 2
+    assert sum(limiter.acquire(user_id) for user_id in range(30)) == 25
+    assert limiter.stats()['global']['rejections'] == 5
@@ -0,0 +1,159 @@
+import asyncio
+import random
+import sqlite3
+
+import pytest
+
+from utils import roll_history
+from utils.roll_history import STATS_COLUMNS, RollHistory
+
+LEVELS = ('critical_success', 'success', 'failure', 'critical_failure')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def recompute(path: str) -> dict:
+    """rolls 테이블 전체를 다시 읽어 (scope, scope_id, user_id) 별 집계 계산"""
+    conn = sqlite3.connect(path)
+    rows = conn.execute(
+        'SELECT guild_id, user_id, session_id, total, expected, success_level FROM rolls ORDER BY id'
+    ).fetchall()
+    conn.close()
+
+    stats = {}
+    for guild_id, user_id, session_id, total, expected, level in rows:
+        for key in (('guild', guild_id or 0, user_id), ('session', session_id, user_id)):
+            s = stats.setdefault(key, {
+                'rolls': 0, 'crits': 0, 'fumbles': 0, 'successes': 0, 'sum_total': 0,
+                'expected_rolls': 0, 'sum_total_expected': 0, 'sum_expected': 0.0,
+                'kinds': [],
+            })
+            s['rolls'] += 1
+            s['sum_total'] += total
+            s['crits'] += level == 'critical_success'
+            s['fumbles'] += level == 'critical_failure'
+            s['successes'] += level in ('success', 'critical_success')
+            if expected is not None:
+                s['expected_rolls'] += 1
+                s['sum_total_expected'] += total
+                s['sum_expected'] += expected
+            s['kinds'].append('success' if level in ('success', 'critical_success') else 'failure')
+
+    for s in stats.values():
+        runs = []  # (종류, 길이)
+        for kind in s.pop('kinds'):
+            if runs and runs[-1][0] == kind:
+                runs[-1][1] += 1
+            else:
+                runs.append([kind, 1])
+        s['streak_kind'], s['streak'] = runs[-1]
+        s['best_streak'] = max((n for kind, n in runs if kind == 'success'), default=0)
+        s['worst_streak'] = max((n for kind, n in runs if kind == 'failure'), default=0)
+    return stats
+
+
+def stored(path: str) -> dict:
+    conn = sqlite3.connect(path)
+    rows = conn.execute(f'SELECT scope, scope_id, user_id, {", ".join(STATS_COLUMNS)} FROM roll_stats').fetchall()
+    conn.close()
+    return {tuple(row[:3]): dict(zip(STATS_COLUMNS, row[3:])) for row in rows}
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    monkeypatch.setenv('ROLL_HISTORY_BATCH', '7')
+    monkeypatch.setenv('ROLL_SESSION_GAP', '3600')
+    monkeypatch.setenv('ROLL_SESSION_CACHE', '2')  # 채널 세션이 캐시에서 밀려나 DB 에서 다시 읽히도록
+    clock = Clock()
+    monkeypatch.setattr(roll_history.time, 'time', clock)
+    return RollHistory(str(tmp_path / 'rolls.sqlite3')), clock
+
+
+def test_roll_stats_match_full_recompute(history):
+    history, clock = history
+    rng = random.Random(7)
+
+    async def run():
+        await history.start()
+        for i in range(500):
+            clock.now += rng.choice((5, 60, 600, 5000))  # 가끔 세션 간격을 넘김
+            guild_id = rng.choice((None, 1, 2))
+            history.record(
+                guild_id, rng.randrange(4) + (guild_id or 0) * 10, rng.randrange(5),
+                '1d100', rng.randint(1, 100), rng.choice((None, 50.5, 10.5)), rng.choice(LEVELS),
+            )
+            if i % 37 == 0:
+                await history.flush()
+        await history.close()
+
+    asyncio.run(run())
+
+    assert history.written == 500
+    assert history.dropped == 0
+    expected = recompute(history.path)
+    actual = stored(history.path)
+    assert actual.keys() == expected.keys()
+    assert sum(scope == 'session' for scope, _, _ in expected) > 20
+    for key, stats in expected.items():
+        sum_expected = stats.pop('sum_expected')
+        assert actual[key].pop('sum_expected') == pytest.approx(sum_expected), key
+        assert actual[key] == stats, key
+
+
+def test_user_stats_include_pending_rolls(history):
+    history, clock = history
+
+    async def run():
+        await history.start()
+        history.record(1, 10, 99, '1d20', 20, 10.5, 'critical_success')
+        history.record(1, 10, 99, '1d20', 3, 10.5, 'failure')
+        stats = await history.user_stats(1, 99)
+        session = await history.session_stats(10)
+        await history.close()
+        return stats, session
+
+    stats, session = asyncio.run(run())
+    assert stats['rolls'] == 2
+    assert stats['crit_rate'] == 0.5
+    assert stats['average'] == 11.5
+    assert stats['average_vs_expected'] == pytest.approx(1.0)
+    assert stats['streak_kind'] == 'failure'
+    assert [user_id for user_id, _ in session['users']] == [99]
+
+
+def test_failed_batch_is_retried_then_dropped(history, monkeypatch):
+    history, clock = history
+    history.max_retries = 2
+    failures = [True, False, True, True]
+
+    async def run():
+        await history.start()
+        write = history._write_batch
+
+        def flaky(batch):
+            if failures.pop(0):
+                raise sqlite3.OperationalError('database is locked')
+            write(batch)
+
+        monkeypatch.setattr(history, '_write_batch', flaky)
+        history.record(1, 10, 1, '1d6', 4, 3.5, 'success')
+        await history.flush()  # 실패 - 대기열로 되돌림
+        assert history.stats()['pending'] == 1
+        await history.flush()  # 재시도 성공
+        assert history.written == 1
+
+        history.record(1, 10, 1, '1d6', 4, 3.5, 'success')
+        await history.flush()
+        await history.flush()  # 연속 2회 실패 - 버림
+        assert history.stats()['pending'] == 0
+        await history.close()
+
+    asyncio.run(run())
+    assert history.write_failures == 3
+    assert history.dropped == 1
@@ -0,0 +1,63 @@
+import pytest
+
+from utils.sharding import format_shard_ids, merge_metrics, parse_shard_ids, shard_config, split_shards
+
+WORKER_0 = """# HELP rolls_total 굴림 수
+# TYPE rolls_total counter
+rolls_total{kind="dice"} 3
+# HELP latency_seconds 지연
+# TYPE latency_seconds histogram
+latency_seconds_bucket{le="0.1"} 1
+latency_seconds_bucket{le="+Inf"} 2
+latency_seconds_sum 0.3
+latency_seconds_count 2
+"""
+
+WORKER_1 = """# HELP rolls_total 굴림 수
+# TYPE rolls_total counter
+rolls_total{kind="dice"} 5
+# HELP up 실행 여부
+# TYPE up gauge
+up 1
+"""
+
+
+def test_shard_ids_round_trip():
+    ids = parse_shard_ids('8, 0-3,10-11,2')
+    assert ids == [0, 1, 2, 3, 8, 10, 11]
+    assert format_shard_ids(ids) == '0-3,8,10-11'
+
+
+def test_split_shards_is_even_and_contiguous():
+    assert split_shards(10, 3) == [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    assert split_shards(2, 5) == [[0], [1]]
+
+
+def test_shard_config_validates_ids(monkeypatch):
+    monkeypatch.delenv('SHARD_COUNT', raising=False)
+    monkeypatch.delenv('SHARD_IDS', raising=False)
+    assert shard_config([]) == (None, None)
+    assert shard_config(['--shard-count', 'auto']) == ('auto', None)
+    assert shard_config(['--shard-count', '4', '--shard-ids', '2-3']) == (4, [2, 3])
+    with pytest.raises(ValueError):
+        shard_config(['--shard-count', '4', '--shard-ids', '3-4'])
+    with pytest.raises(ValueError):
+        shard_config(['--shard-ids', '0'])
+
+
+def test_merge_metrics_groups_families_and_labels_workers():
+    merged = merge_metrics({'0': WORKER_0, '1': WORKER_1}).splitlines()
+    assert merged.count('# TYPE rolls_total counter') == 1
+    start = merged.index('# TYPE rolls_total counter')
+    assert merged[start + 1:start + 3] == [
+        'rolls_total{worker="0",kind="dice"} 3',
+        'rolls_total{worker="1",kind="dice"} 5',
+    ]
+    histogram = merged[merged.index('# TYPE latency_seconds histogram') + 1:][:4]
+    assert histogram == [
+        'latency_seconds_bucket{worker="0",le="0.1"} 1',
+        'latency_seconds_bucket{worker="0",le="+Inf"} 2',
+        'latency_seconds_sum{worker="0"} 0.3',
+        'latency_seconds_count{worker="0"} 2',
+    ]
+    assert 'up{worker="1"} 1' in merged
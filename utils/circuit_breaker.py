@@ -0,0 +1,146 @@
+import logging
+import os
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """회로가 열려 있어 요청을 보내지 않음"""
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """정렬된 목록의 백분위수 (최근접 순위 방식)"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class CircuitBreaker:
+    """LLM 백엔드용 회로 차단기 - 최근 호출의 오류율과 지연 백분위수 기반
+
+    - closed: 정상. 최근 window 개 호출 중 오류율 또는 p95 지연이 기준을 넘으면 open
+    - open: cooldown 동안 요청을 보내지 않고 바로 대체 메시지로 처리
+    - half_open: 시험 요청 하나만 통과. 성공하면 closed, 실패하면 다시 open
+    타임아웃은 관측된 p95 지연에 맞춰 조정되고, 헤지 요청 시점도 p95 를 기준으로 함
+    """
+
+    def __init__(self, name: str = 'llm', max_timeout: float | None = None):
+        self.name = name
+        self.window = int(os.getenv('BREAKER_WINDOW', '50'))
+        self.min_calls = int(os.getenv('BREAKER_MIN_CALLS', '10'))
+        self.error_threshold = float(os.getenv('BREAKER_ERROR_RATE', '0.5'))
+        self.latency_threshold = float(os.getenv('BREAKER_P95_LATENCY', '8'))
+        self.cooldown = float(os.getenv('BREAKER_COOLDOWN', '30'))
+        # 적응형 타임아웃: p95 * 배수, [최소, 최대] 범위
+        self.timeout_multiplier = float(os.getenv('BREAKER_TIMEOUT_MULTIPLIER', '2'))
+        self.min_timeout = float(os.getenv('BREAKER_MIN_TIMEOUT', '2'))
+        if max_timeout is None:
+            max_timeout = float(os.getenv('PERPLEXITY_TIMEOUT', '10'))
+        self.max_timeout = max_timeout
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._outcomes = deque(maxlen=self.window)  # (성공 여부, 지연)
+        self.times_opened = 0
+        self.short_circuits = 0
+
+    def allow_request(self) -> bool:
+        """요청을 보내도 되는지 확인 (open 이면 cooldown 후 half_open 으로 전환)"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown:
+                self.short_circuits += 1
+                return False
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+            logger.info(f"🔌 [{self.name}] 회로 half-open: 시험 요청 허용")
+
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                self.short_circuits += 1
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self, latency: float):
+        self._outcomes.append((True, latency))
+        if self.state == HALF_OPEN:
+            self.state = CLOSED
+            self._probe_in_flight = False
+            self._outcomes.clear()
+            self._outcomes.append((True, latency))
+            logger.info(f"✅ [{self.name}] 회로 closed: 백엔드 회복")
+            return
+        self._evaluate()
+
+    def record_failure(self, latency: float):
+        self._outcomes.append((False, latency))
+        if self.state == HALF_OPEN:
+            self._open('시험 요청 실패')
+            return
+        self._evaluate()
+
+    def record_cancelled(self):
+        """호출이 결과 없이 취소됨 (시험 요청이었다면 다른 요청이 시험할 수 있게 해제)"""
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+
+    def _evaluate(self):
+        if self.state != CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        error_rate = self.error_rate()
+        p95 = self.latency_percentile(0.95)
+        if error_rate >= self.error_threshold:
+            self._open(f'오류율 {error_rate:.0%}')
+        elif p95 >= self.latency_threshold:
+            self._open(f'p95 지연 {p95:.2f}s')
+
+    def _open(self, reason: str):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self.times_opened += 1
+        logger.warning(f"⚠️ [{self.name}] 회로 open ({reason}) - {self.cooldown:.0f}초간 대체 메시지 사용")
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for ok, _ in self._outcomes if not ok) / len(self._outcomes)
+
+    def latency_percentile(self, fraction: float) -> float:
+        """성공한 호출의 지연 백분위수"""
+        return percentile(sorted(latency for ok, latency in self._outcomes if ok), fraction)
+
+    def _has_latency_samples(self) -> bool:
+        return sum(1 for ok, _ in self._outcomes if ok) >= self.min_calls
+
+    def current_timeout(self) -> float:
+        """관측된 p95 에 맞춘 요청 타임아웃 (표본이 부족하면 최대값)"""
+        if not self._has_latency_samples():
+            return self.max_timeout
+        adaptive = self.latency_percentile(0.95) * self.timeout_multiplier
+        return min(self.max_timeout, max(self.min_timeout, adaptive))
+
+    def hedge_delay(self) -> float | None:
+        """헤지 요청을 보낼 시점 (p95). 표본이 부족하면 None"""
+        if not self._has_latency_samples():
+            return None
+        return self.latency_percentile(0.95)
+
+    def stats(self) -> dict:
+        return {
+            'state': self.state,
+            'error_rate': self.error_rate(),
+            'p50': self.latency_percentile(0.5),
+            'p95': self.latency_percentile(0.95),
+            'timeout': self.current_timeout(),
+            'times_opened': self.times_opened,
+            'short_circuits': self.short_circuits,
+        }
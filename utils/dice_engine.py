@@ -0,0 +1,149 @@
+import logging
+import os
+import random
+from fractions import Fraction
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# 큰 풀을 합산할 때 한 번에 생성하는 주사위 수 (메모리 사용량 상한)
+ROLL_CHUNK = 65536
+
+# 확률 비교 연산자
+COMPARATORS = {
+    '>=': lambda total, target: total >= target,
+    '<=': lambda total, target: total <= target,
+    '>': lambda total, target: total > target,
+    '<': lambda total, target: total < target,
+    '=': lambda total, target: total == target,
+    '==': lambda total, target: total == target,
+}
+
+# NumPy 모듈 (None: 아직 import 안 함, False: 설치되지 않음)
+_numpy = None
+
+
+def load_numpy():
+    """NumPy 를 처음 필요할 때 import (없으면 None) - 시작 시 import 비용을 피하기 위함"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:  # NumPy 가 없으면 순수 파이썬으로 동작
+            _numpy = False
+    return _numpy or None
+
+
+class DiceEngine:
+    """주사위 굴림 엔진 - 시드 지정 가능, NumPy 사용 가능 시 일괄 생성
+
+    - roll: 개별 눈 목록 (표시용)
+    - roll_sum: 합계(와 기준 초과 눈 개수)만 필요할 때 청크 단위로 생성해 추가 메모리 O(1)
+    - 난수 생성기(와 NumPy import)는 첫 굴림 때 만듦
+    """
+
+    def __init__(self, seed: int | None = None, use_numpy: bool | None = None):
+        if seed is None and os.getenv('DICE_SEED'):
+            seed = int(os.getenv('DICE_SEED'))
+        if use_numpy is None:
+            use_numpy = os.getenv('DICE_USE_NUMPY', '1') == '1'
+
+        self._seed = seed
+        self._want_numpy = bool(use_numpy)
+        self._np = None
+        self._rng = None
+
+    @property
+    def rng(self):
+        if self._rng is None:
+            self._np = load_numpy() if self._want_numpy else None
+            if self._np is not None:
+                self._rng = self._np.random.default_rng(self._seed)
+            else:
+                self._rng = random.Random(self._seed)
+        return self._rng
+
+    @property
+    def use_numpy(self) -> bool:
+        self.rng
+        return self._np is not None
+
+    @property
+    def backend(self) -> str:
+        return 'numpy' if self.use_numpy else 'python'
+
+    def spawn_seed(self) -> int:
+        """다른 엔진(작업 프로세스 등)에 넘겨줄 시드 - DICE_SEED 를 지정하면 이것도 재현 가능"""
+        if self.use_numpy:
+            return int(self.rng.integers(0, 2 ** 63))
+        return self.rng.getrandbits(63)
+
+    def roll(self, num_dice: int, dice_sides: int) -> list:
+        """주사위 num_dice 개의 눈 목록"""
+        if self.use_numpy:
+            return self.rng.integers(1, dice_sides + 1, size=num_dice).tolist()
+        randint = self.rng.randint
+        return [randint(1, dice_sides) for _ in range(num_dice)]
+
+    def roll_sum(self, num_dice: int, dice_sides: int, above: float | None = None) -> tuple:
+        """주사위 num_dice 개의 (합계, above 보다 큰 눈 개수) - 목록을 만들지 않고 청크 단위로 합산
+
+        above 가 None 이면 개수는 세지 않음 (0)
+        """
+        total = 0
+        hits = 0
+        remaining = num_dice
+        while remaining > 0:
+            size = min(remaining, ROLL_CHUNK)
+            if self.use_numpy:
+                chunk = self.rng.integers(1, dice_sides + 1, size=size, dtype=self._np.int64)
+                total += int(chunk.sum())
+                if above is not None:
+                    hits += int((chunk > above).sum())
+            else:
+                randint = self.rng.randint
+                if above is None:
+                    total += sum(randint(1, dice_sides) for _ in range(size))
+                else:
+                    for _ in range(size):
+                        roll = randint(1, dice_sides)
+                        total += roll
+                        hits += roll > above
+            remaining -= size
+        return total, hits
+
+
+def probability_cost(num_dice: int, dice_sides: int) -> int:
+    """분포 계산 비용 추정치 (단순 DP 연산 횟수)"""
+    return num_dice * num_dice * dice_sides
+
+
+@lru_cache(maxsize=128)
+def sum_distribution(num_dice: int, dice_sides: int) -> tuple:
+    """NdM 합계의 경우의 수 분포 (인덱스 i = 합계 num_dice + i)
+
+    주사위를 하나씩 더하며 누적합으로 슬라이딩 윈도우 합을 구함 (정수 연산이라 정확함)
+    """
+    counts = [1] * dice_sides
+    for _ in range(num_dice - 1):
+        prefix = [0]
+        for c in counts:
+            prefix.append(prefix[-1] + c)
+        length = len(counts) + dice_sides - 1
+        counts = [
+            prefix[min(i + 1, len(counts))] - prefix[max(0, i - dice_sides + 1)]
+            for i in range(length)
+        ]
+    return tuple(counts)
+
+
+def probability(num_dice: int, dice_sides: int, modifier: int, comparator: str, target: int) -> Fraction:
+    """P(NdM + K <op> target) 의 정확한 값"""
+    compare = COMPARATORS[comparator]
+    counts = sum_distribution(num_dice, dice_sides)
+    hits = sum(
+        count for i, count in enumerate(counts)
+        if compare(num_dice + i + modifier, target)
+    )
+    return Fraction(hits, dice_sides ** num_dice)
@@ -0,0 +1,288 @@
+import logging
+import os
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# 입력 크기 상한 - 모든 검사가 입력 길이에 선형이 되도록 제한
+MAX_EXPRESSION_LENGTH = 100
+MAX_TERMS = 10
+MAX_NUMBER_DIGITS = 7
+# 폭발 주사위가 항 하나에서 추가로 굴릴 수 있는 최대 횟수
+MAX_EXPLOSIONS = 100
+
+PARSE_CACHE_SIZE = int(os.getenv('DICE_PARSE_CACHE_SIZE', '512'))
+
+
+class DiceSyntaxError(ValueError):
+    """주사위 표현식 문법 오류"""
+
+
+class Constant:
+    """고정 수치 항 (예: +3)"""
+    __slots__ = ('value',)
+
+    def __init__(self, value: int):
+        self.value = value
+
+    @property
+    def expected(self) -> float:
+        return float(self.value)
+
+    def evaluate(self, engine) -> tuple:
+        return self.value, [], str(self.value)
+
+
+class DiceTerm:
+    """주사위 항 (예: 4d6kh3, 1d6!, 1d20adv, 1d100b2)
+
+    - keep: 'kh'(높은 것 유지) / 'kl'(낮은 것 유지) / None
+    - explode: 최대 눈이 나오면 한 번 더 굴려 더함
+    - coc: 크툴루의 부름 보너스(+n)/패널티(-n) 주사위 개수 (1d100 전용)
+    """
+    __slots__ = ('count', 'sides', 'keep', 'keep_count', 'explode', 'coc')
+
+    def __init__(self, count: int, sides: int, keep: str | None = None, keep_count: int = 0,
+                 explode: bool = False, coc: int = 0):
+        self.count = count
+        self.sides = sides
+        self.keep = keep
+        self.keep_count = keep_count
+        self.explode = explode
+        self.coc = coc
+
+    @property
+    def is_plain(self) -> bool:
+        """유지/폭발/CoC 없이 모든 눈을 그대로 더하는 항 (합계만 구해도 되는 항)"""
+        return not self.keep and not self.explode and not self.coc
+
+    @property
+    def expected(self) -> float | None:
+        """기댓값 (유지/버리기, CoC 보너스/패널티처럼 간단한 식이 없으면 None)"""
+        if self.keep or self.coc or self.sides == 0:
+            return None
+        mean = (self.sides + 1) / 2
+        if self.explode:
+            # 최대 눈이 나올 때마다 한 번 더: 기하급수 합 (폭발 횟수 상한은 무시)
+            mean *= self.sides / (self.sides - 1)
+        return self.count * mean
+
+    def evaluate(self, engine) -> tuple:
+        """(합계, 유지된 눈 목록, 표시 문자열)"""
+        if self.coc:
+            return self._evaluate_coc(engine)
+
+        rolls = engine.roll(self.count, self.sides)
+        labels = [str(r) for r in rolls]
+
+        if self.explode:
+            explosions = 0
+            i = 0
+            while i < len(rolls) and explosions < MAX_EXPLOSIONS:
+                if rolls[i] == self.sides:
+                    extra = engine.roll(1, self.sides)[0]
+                    labels[i] += '!'
+                    rolls.append(extra)
+                    labels.append(str(extra))
+                    explosions += 1
+                i += 1
+
+        kept_indexes = range(len(rolls))
+        if self.keep:
+            order = sorted(range(len(rolls)), key=rolls.__getitem__, reverse=self.keep == 'kh')
+            kept_indexes = sorted(order[:self.keep_count])
+            kept_set = set(kept_indexes)
+            labels = [label if i in kept_set else f"({label})" for i, label in enumerate(labels)]
+
+        kept = [rolls[i] for i in kept_indexes]
+        return sum(kept), kept, f"[{', '.join(labels)}]"
+
+    def _evaluate_coc(self, engine) -> tuple:
+        units = engine.roll(1, 10)[0] - 1
+        tens = [t - 1 for t in engine.roll(abs(self.coc) + 1, 10)]
+        candidates = [(t * 10 + units) or 100 for t in tens]
+        value = min(candidates) if self.coc > 0 else max(candidates)
+        tens_str = ', '.join(str(t * 10) for t in tens)
+        return value, [value], f"[십의 자리: {tens_str} / 일의 자리: {units}]"
+
+
+class DiceExpression:
+    """주사위 항과 상수 항의 합 (예: 1d20+1d4+3)"""
+    __slots__ = ('terms', 'text')
+
+    def __init__(self, terms: list, text: str):
+        self.terms = tuple(terms)  # (부호, 항) 목록 - 캐시 공유를 위해 불변
+        self.text = text
+
+    @property
+    def dice_terms(self) -> list:
+        return [term for _, term in self.terms if isinstance(term, DiceTerm)]
+
+    @property
+    def total_dice(self) -> int:
+        return sum(term.count + abs(term.coc) for term in self.dice_terms)
+
+    @property
+    def max_sides(self) -> int:
+        return max((term.sides for term in self.dice_terms), default=0)
+
+    @property
+    def expected(self) -> float | None:
+        """표현식 전체의 기댓값 (한 항이라도 계산할 수 없으면 None)"""
+        total = 0.0
+        for sign, term in self.terms:
+            value = term.expected
+            if value is None:
+                return None
+            total += sign * value
+        return total
+
+    @property
+    def is_impossible(self) -> bool:
+        return any(term.count == 0 or term.sides == 0 for term in self.dice_terms)
+
+    def evaluate(self, engine, preview: int | None = None) -> dict:
+        """표현식을 굴려 합계, 유지된 눈 목록, 표시 문자열과 판정용 집계 반환
+
+        - count: 유지된 눈 개수 / above: 그중 max_sides 의 절반보다 큰 눈 개수
+          all_max: 유지된 눈이 모두 max_sides 인지
+        - preview: 눈을 이 개수까지만 표시하는 경우 - 유지/폭발/CoC 가 없는 항은 표시할 눈만 목록으로
+          굴리고 나머지는 DiceEngine.roll_sum 으로 합계/집계만 구함 (rolls 는 앞부분만 들어 있음)
+        """
+        threshold = self.max_sides / 2
+        total = 0
+        kept = []
+        count = above = 0
+        all_max = True
+        parts = []
+        for sign, term in self.terms:
+            if (preview is not None and isinstance(term, DiceTerm) and term.is_plain
+                    and len(kept) + term.count > preview):
+                shown = engine.roll(max(0, preview - len(kept)), term.sides)
+                rest, rest_above = engine.roll_sum(term.count - len(shown), term.sides, threshold)
+                value = sum(shown) + rest
+                term_kept = shown
+                term_count = term.count
+                term_above = rest_above + sum(1 for r in shown if r > threshold)
+                term_all_max = term.sides == self.max_sides and value == term.count * term.sides
+                label = f"[{', '.join(map(str, shown))}, … (+{term.count - len(shown)}개)]"
+            else:
+                value, term_kept, label = term.evaluate(engine)
+                term_count = len(term_kept)
+                term_above = sum(1 for r in term_kept if r > threshold)
+                term_all_max = all(r == self.max_sides for r in term_kept)
+            total += sign * value
+            kept.extend(term_kept)
+            count += term_count
+            above += term_above
+            all_max = all_max and term_all_max
+            if parts:
+                parts.append('+' if sign > 0 else '-')
+            elif sign < 0:
+                parts.append('-')
+            parts.append(label)
+        return {'total': total, 'rolls': kept, 'detail': ' '.join(parts),
+                'count': count, 'above': above, 'all_max': all_max and count > 0}
+
+
+class _Parser:
+    """재귀 하강 파서 - 입력을 한 번만 앞으로 훑으며 역추적 없음"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def peek(self, literal: str) -> bool:
+        return self.text.startswith(literal, self.pos)
+
+    def accept(self, literal: str) -> bool:
+        if self.peek(literal):
+            self.pos += len(literal)
+            return True
+        return False
+
+    def number(self, required: bool = True) -> int | None:
+        start = self.pos
+        while self.pos < len(self.text) and self.text[self.pos].isdigit():
+            self.pos += 1
+            if self.pos - start > MAX_NUMBER_DIGITS:
+                raise DiceSyntaxError('숫자가 너무 깁니다')
+        if start == self.pos:
+            if required:
+                raise DiceSyntaxError(f'{self.pos}번째 위치에 숫자가 필요합니다')
+            return None
+        return int(self.text[start:self.pos])
+
+    def parse(self) -> DiceExpression:
+        terms = [(1 if not self.accept('-') else -1, self.term())]
+        while self.pos < len(self.text):
+            if self.accept('+'):
+                sign = 1
+            elif self.accept('-'):
+                sign = -1
+            else:
+                raise DiceSyntaxError(f'알 수 없는 문자: {self.text[self.pos]!r}')
+            terms.append((sign, self.term()))
+            if len(terms) > MAX_TERMS:
+                raise DiceSyntaxError('항이 너무 많습니다')
+        if not any(isinstance(term, DiceTerm) for _, term in terms):
+            raise DiceSyntaxError('주사위 항이 없습니다')
+        return DiceExpression(terms, self.text)
+
+    def term(self):
+        count = self.number(required=False)
+        if not self.accept('d'):
+            if count is None:
+                raise DiceSyntaxError(f'{self.pos}번째 위치에 항이 필요합니다')
+            return Constant(count)
+
+        count = 1 if count is None else count
+        sides = self.number()
+        term = DiceTerm(count, sides)
+
+        # 수식어 (각각 최대 한 번)
+        if self.accept('!'):
+            if sides == 1:
+                raise DiceSyntaxError('1면체는 폭발시킬 수 없습니다')
+            term.explode = True
+
+        if self.accept('adv') or self.accept('dis'):
+            if count != 1:
+                raise DiceSyntaxError('이점/불리는 주사위 1개에만 쓸 수 있습니다')
+            term.keep = 'kh' if self.text[self.pos - 3:self.pos] == 'adv' else 'kl'
+            term.count, term.keep_count = 2, 1
+        elif self.accept('kh') or self.accept('kl') or self.accept('k'):
+            term.keep = 'kl' if self.text[self.pos - 1] == 'l' else 'kh'
+            term.keep_count = min(self.number(), count)
+        elif self.accept('dh') or self.accept('dl'):
+            # 높은/낮은 것 버리기 = 반대쪽 유지
+            drop_high = self.text[self.pos - 1] == 'h'
+            drop = min(self.number(), count)
+            term.keep = 'kl' if drop_high else 'kh'
+            term.keep_count = count - drop
+        elif self.peek('b') or self.peek('p'):
+            penalty = self.text[self.pos] == 'p'
+            self.pos += 1
+            if count != 1 or sides != 100:
+                raise DiceSyntaxError('보너스/패널티 주사위는 1d100 에만 쓸 수 있습니다')
+            if term.explode:
+                # CoC 판정은 십의 자리 주사위 중 하나를 고르는 방식이라 폭발과 함께 쓸 수 없음
+                raise DiceSyntaxError('폭발 주사위에는 보너스/패널티를 쓸 수 없습니다')
+            amount = self.number(required=False)
+            if amount == 0:
+                raise DiceSyntaxError('보너스/패널티 주사위는 1개 이상이어야 합니다')
+            amount = amount or 1
+            term.coc = -amount if penalty else amount
+
+        return term
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_expression(text: str) -> DiceExpression:
+    """주사위 표현식 파싱 (자주 쓰는 표기는 LRU 캐시에서 재사용)
+
+    잘못된 입력은 DiceSyntaxError - 길이 상한 덕분에 최악의 경우에도 선형 시간
+    """
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise DiceSyntaxError('표현식이 너무 깁니다')
+    return _Parser(text).parse()
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class FortuneEntry:
+    """캐시 항목 하나 - (사용자, 날짜) 튜플 키와 (값, 만료) 튜플 대신 사용자 ID 키 + 슬롯 객체
+
+    날짜 문자열은 intern 해서 같은 날 항목끼리 공유
+    """
+    __slots__ = ('value', 'date', 'expires_at')
+
+    def __init__(self, value: str, date: str, expires_at: float):
+        self.value = value
+        self.date = date
+        self.expires_at = expires_at
+
+
+class FortuneCache:
+    """(사용자 ID, 현지 날짜) 단위 운세 캐시 - LRU + TTL
+
+    - 같은 날 같은 사용자는 같은 운세를 받음 (재요청 시 API 호출 없음)
+    - 최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 제거
+    - 경로를 지정하면 JSON-lines 파일에 기록해 재시작 후에도 유지
+      파일은 Cog 로드 때 (load) 스레드에서 읽고 압축 (이벤트 루프를 막지 않음, 읽는 동안의 조회는 캐시 미스)
+      추가 기록은 메모리에 모았다가 백그라운드 작업이 스레드에서 한꺼번에 씀 (운세 요청이 디스크를 기다리지 않음)
+    """
+
+    def __init__(self, max_entries: int | None = None, ttl: float | None = None, path: str | None = None):
+        self.max_entries = max_entries or int(os.getenv('FORTUNE_CACHE_SIZE', '5000'))
+        self.ttl = ttl or float(os.getenv('FORTUNE_CACHE_TTL', str(24 * 60 * 60)))
+        self.path = path if path is not None else os.getenv('FORTUNE_CACHE_PATH', '')
+        # 운세 날짜 기준 시간대 (기본: 한국 표준시, UTC+9)
+        self.tz = timezone(timedelta(hours=float(os.getenv('FORTUNE_UTC_OFFSET_HOURS', '9'))))
+
+        self._entries: OrderedDict = OrderedDict()  # 사용자 ID -> FortuneEntry (사용자당 오늘 것 하나)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._loaded = not self.path
+        self._buffer: list = []  # 아직 파일에 쓰지 않은 줄
+        self._writer: asyncio.Task | None = None
+        self._loader: asyncio.Task | None = None
+
+    def today(self) -> str:
+        """현지 달력 기준 오늘 날짜"""
+        return sys.intern(datetime.now(self.tz).date().isoformat())
+
+    def get(self, user_id: int) -> str | None:
+        """오늘 캐시된 운세 반환 (없거나 만료되면 None)"""
+        self._ensure_loaded()
+        entry = self._entries.get(user_id)
+        if entry is None or entry.date != self.today() or entry.expires_at <= time.time():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry.value
+
+    def put(self, user_id: int, value: str):
+        """오늘의 운세 저장"""
+        self._ensure_loaded()
+        entry = FortuneEntry(value, self.today(), time.time() + self.ttl)
+        self._store(user_id, entry)
+        if self.path:
+            self._append(user_id, entry)
+
+    def _store(self, user_id: int, entry: FortuneEntry):
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _record(user_id: int, entry: FortuneEntry) -> str:
+        return json.dumps({
+            'user_id': user_id, 'date': entry.date, 'value': entry.value, 'expires_at': entry.expires_at
+        }, ensure_ascii=False) + '\n'
+
+    def _append(self, user_id: int, entry: FortuneEntry):
+        self._buffer.append(self._record(user_id, entry))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 루프 밖(스크립트 등)에서는 바로 기록
+            self._write_lines(self._take_buffer())
+            return
+        if self._writer is None or self._writer.done():
+            self._writer = loop.create_task(self._write_buffered())
+
+    def _take_buffer(self) -> list:
+        lines, self._buffer = self._buffer, []
+        return lines
+
+    async def _write_buffered(self):
+        # 압축(파일 교체)이 끝난 뒤에 덧붙여야 기록이 사라지지 않음
+        if self._loader is not None:
+            await self._loader
+        # 쓰는 동안 들어온 줄은 다음 차례에 함께 기록
+        while self._buffer:
+            await asyncio.to_thread(self._write_lines, self._take_buffer())
+
+    def _write_lines(self, lines: list):
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+        except OSError as e:
+            logger.warning(f"⚠️ 운세 캐시 기록 실패 ({len(lines)}개): {e}")
+
+    async def close(self):
+        """남은 기록을 파일에 씀"""
+        if self._loader is not None:
+            await self._loader
+        if self._writer is not None:
+            await self._writer
+            self._writer = None
+        if self._buffer:
+            await asyncio.to_thread(self._write_lines, self._take_buffer())
+
+    async def load(self):
+        """파일을 스레드에서 읽고 압축 (Cog 로드 시 호출)"""
+        self._ensure_loaded()
+        if self._loader is not None:
+            await self._loader
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 루프 밖(스크립트 등)에서는 바로 읽음
+            self._loaded = True
+            self._merge(self._read_file())
+            return
+        if self._loader is None:
+            self._loader = loop.create_task(self._load_in_thread())
+
+    async def _load_in_thread(self):
+        records = await asyncio.to_thread(self._read_file)
+        self._merge(records)
+        self._loaded = True
+
+    def _merge(self, records: list):
+        """파일 항목을 읽는 동안 저장된 항목보다 오래된 쪽(LRU 앞)에 합침"""
+        recent = self._entries
+        self._entries = OrderedDict(records)
+        for user_id, entry in recent.items():
+            self._store(user_id, entry)
+        if records:
+            logger.info(f"✓ 운세 캐시 로드 완료: {len(records)}개")
+
+    def _read_file(self) -> list:
+        """파일에서 만료되지 않은 오늘 항목만 읽고, 파일을 그 내용으로 압축 (스레드에서 실행)"""
+        if not os.path.exists(self.path):
+            return []
+
+        now = time.time()
+        today = self.today()
+        entries: OrderedDict = OrderedDict()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if record.get('date') == today and record.get('expires_at', 0) > now:
+                        entries[record['user_id']] = FortuneEntry(record['value'], today, record['expires_at'])
+                        entries.move_to_end(record['user_id'])
+                        if len(entries) > self.max_entries:
+                            entries.popitem(last=False)
+
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for user_id, entry in entries.items():
+                    f.write(self._record(user_id, entry))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"⚠️ 운세 캐시 로드 실패: {e}")
+        return list(entries.items())
+
+    def memory_bytes(self) -> int:
+        """캐시 항목이 차지하는 대략적인 메모리 (바이트)"""
+        size = sys.getsizeof(self._entries)
+        for user_id, entry in self._entries.items():
+            size += sys.getsizeof(user_id) + sys.getsizeof(entry) + sys.getsizeof(entry.value)
+        return size
+
+    def stats(self) -> dict:
+        """적중률, 제거 수, 메모리 사용량"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'memory_bytes': self.memory_bytes(),
+        }
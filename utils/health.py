@@ -0,0 +1,183 @@
+import logging
+import math
+import os
+import time
+
+from utils.metrics import LOOP_LAG_LAST
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """/livez, /readyz 판단 - 게이트웨이 이벤트로 연결 상태를 추적하고 나머지는 속성만 읽음
+
+    - livez: 프로세스를 재시작해야 하는지 (루프가 멈췄거나 봇 클라이언트가 닫힘)
+    - readyz: 트래픽을 받아도 되는지 (게이트웨이 연결 + 필수 Cog 로드 + 루프 지연 정상)
+    LLM 회로가 열리거나 연결 풀/무거운 계산 작업 풀이 포화돼도 대체 메시지나 오류 답장으로
+    응답할 수 있으므로 준비 상태는 유지하고 degraded 로만 표시
+    AutoShardedBot 이면 샤드별로 연결 상태를 추적하고, 맡은 샤드가 모두 연결돼야 준비 완료
+    """
+
+    def __init__(self, bot, watchdog=None):
+        self.bot = bot
+        self.watchdog = watchdog
+        self.required_cogs = tuple(
+            c.strip() for c in os.getenv('REQUIRED_COGS', 'DiceRoller').split(',') if c.strip()
+        )
+        self.live_max_stall = float(os.getenv('LIVEZ_MAX_STALL', '10'))
+        self.ready_max_lag = float(os.getenv('READYZ_MAX_LOOP_LAG', '1'))
+        self.started = False
+        self.connected = False
+        self.disconnected_at: float | None = None
+        self.disconnects = 0
+        self.shards = {}  # 샤드 ID -> {'connected', 'disconnected_at', 'disconnects'}
+
+        bot.add_listener(self._on_connect, 'on_connect')
+        bot.add_listener(self._on_connect, 'on_resumed')
+        bot.add_listener(self._on_disconnect, 'on_disconnect')
+        bot.add_listener(self._on_shard_connect, 'on_shard_connect')
+        bot.add_listener(self._on_shard_connect, 'on_shard_resumed')
+        bot.add_listener(self._on_shard_disconnect, 'on_shard_disconnect')
+
+    async def _on_connect(self):
+        self.started = True
+        self.connected = True
+        self.disconnected_at = None
+
+    async def _on_disconnect(self):
+        if self.connected:
+            self.disconnects += 1
+            self.disconnected_at = time.monotonic()
+        self.connected = False
+
+    async def _on_shard_connect(self, shard_id: int):
+        shard = self.shards.setdefault(shard_id, {'connected': False, 'disconnected_at': None, 'disconnects': 0})
+        shard['connected'] = True
+        shard['disconnected_at'] = None
+
+    async def _on_shard_disconnect(self, shard_id: int):
+        shard = self.shards.setdefault(shard_id, {'connected': False, 'disconnected_at': None, 'disconnects': 0})
+        if shard['connected']:
+            shard['disconnects'] += 1
+            shard['disconnected_at'] = time.monotonic()
+        shard['connected'] = False
+
+    def _expected_shards(self) -> list:
+        """이 프로세스가 맡은 샤드 ID (샤딩하지 않으면 빈 목록)"""
+        if not hasattr(self.bot, 'shards'):
+            return []
+        if self.bot.shard_ids is not None:
+            return list(self.bot.shard_ids)
+        return list(range(self.bot.shard_count or 0))
+
+    def _shards(self) -> dict:
+        latencies = dict(self.bot.latencies) if hasattr(self.bot, 'latencies') else {}
+        now = time.monotonic()
+        return {
+            shard_id: {
+                'connected': self.shards.get(shard_id, {}).get('connected', False),
+                'latency': latencies[shard_id] if math.isfinite(latencies.get(shard_id, math.nan)) else None,
+                'disconnected_for': (now - self.shards[shard_id]['disconnected_at'])
+                if self.shards.get(shard_id, {}).get('disconnected_at') else None,
+                'disconnects': self.shards.get(shard_id, {}).get('disconnects', 0),
+            }
+            for shard_id in self._expected_shards()
+        }
+
+    def _loop(self) -> dict:
+        lag = LOOP_LAG_LAST.value()
+        stalled = self.watchdog.stats()['stalled_for'] if self.watchdog is not None else 0.0
+        return {'lag': lag, 'stalled_for': stalled}
+
+    def _gateway(self) -> dict:
+        latency = self.bot.latency
+        gateway = {
+            'connected': self.connected and self.bot.is_ready() and not self.bot.is_closed(),
+            'latency': latency if math.isfinite(latency) else None,
+            'disconnected_for': (time.monotonic() - self.disconnected_at) if self.disconnected_at else None,
+            'disconnects': self.disconnects,
+        }
+        shards = self._shards()
+        if shards:
+            gateway['connected'] = (all(s['connected'] for s in shards.values())
+                                    and self.bot.is_ready() and not self.bot.is_closed())
+            gateway['disconnects'] = sum(s['disconnects'] for s in shards.values())
+            gateway['shards'] = shards
+        return gateway
+
+    def collect_metrics(self) -> list:
+        """샤드별 연결 상태/지연 (/metrics 수집 함수)"""
+        shards = self._shards()
+        if not shards:
+            return []
+        return [
+            ('discord_shard_connected', 'gauge', '샤드 게이트웨이 연결 여부',
+             {(('shard', str(i)),): int(s['connected']) for i, s in shards.items()}),
+            ('discord_shard_latency_seconds', 'gauge', '샤드 게이트웨이 heartbeat 지연',
+             {(('shard', str(i)),): s['latency'] for i, s in shards.items() if s['latency'] is not None}),
+        ]
+
+    def _llm(self) -> dict:
+        cog = self.bot.get_cog('DiceRoller')
+        if cog is None:
+            return {}
+        return cog.perplexity.router.health()
+
+    def _offload(self) -> dict:
+        cog = self.bot.get_cog('DiceRoller')
+        if cog is None:
+            return {}
+        return cog.work_pool.stats()
+
+    def liveness(self) -> tuple:
+        """(HTTP 상태 코드, 본문)"""
+        loop = self._loop()
+        problems = []
+        if loop['stalled_for'] > self.live_max_stall:
+            problems.append('event_loop_stalled')
+        if self.started and self.bot.is_closed():
+            problems.append('client_closed')
+        body = {'status': 'fail' if problems else 'ok', 'problems': problems, 'loop': loop}
+        return (503 if problems else 200), body
+
+    def readiness(self) -> tuple:
+        """(HTTP 상태 코드, 본문)"""
+        gateway = self._gateway()
+        loop = self._loop()
+        loaded = sorted(self.bot.cogs)
+        llm = self._llm()
+        offload = self._offload()
+
+        problems = []
+        if not gateway['connected']:
+            problems.append('gateway_disconnected')
+        missing = [name for name in self.required_cogs if name not in self.bot.cogs]
+        if missing:
+            problems.append('cogs_missing')
+        if max(loop['lag'], loop['stalled_for']) > self.ready_max_lag:
+            problems.append('event_loop_lagging')
+
+        degraded = [
+            f'{name}_{reason}'
+            for name, health in llm.items()
+            for reason, bad in (('circuit_open', health['state'] != 'closed'),
+                                ('pool_saturated', health['saturation'] >= 1))
+            if bad
+        ]
+        if offload.get('saturation', 0) >= 1:
+            degraded.append('offload_saturated')
+        if offload.get('stale'):
+            degraded.append('offload_stale_threads')
+
+        status = 'fail' if problems else ('degraded' if degraded else 'ok')
+        body = {
+            'status': status,
+            'problems': problems,
+            'degraded': degraded,
+            'gateway': gateway,
+            'cogs': {'loaded': loaded, 'missing': missing},
+            'loop': loop,
+            'llm': llm,
+            'offload': offload,
+        }
+        return (503 if problems else 200), body
@@ -0,0 +1,461 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+import aiohttp
+
+from utils.circuit_breaker import OPEN, CircuitBreaker, CircuitOpenError
+from utils.metrics import LLM_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+class LLMProvider:
+    """LLM 제공자 공통 인터페이스
+
+    generate(messages, params) -> 텍스트
+    stream(messages, params) -> 생성되는 대로 텍스트 조각을 내보내는 비동기 반복자
+    - messages: [{'role': 'system'|'user', 'content': ...}] (OpenAI chat 형식)
+    - params: max_tokens, temperature, 그리고 JSON 배열 응답을 원할 때 items(원소 개수)
+      success_level 은 지연 지표의 라벨로만 쓰임 (제공자가 모르는 키는 무시)
+    제공자마다 회로 차단기를 하나씩 가지며, 상태와 지연 통계를 stats() 로 노출
+    """
+
+    name = 'provider'
+    # True 면 다른 제공자가 모두 실패했을 때만 사용 (라우터가 항상 마지막에 시도)
+    fallback_only = False
+
+    def __init__(self, max_timeout: float | None = None):
+        self.breaker = CircuitBreaker(self.name, max_timeout)
+        self.calls = 0
+        self.failures = 0
+        self.in_flight = 0
+
+    async def generate(self, messages: list, params: dict) -> str:
+        """회로 차단기를 거쳐 요청 (회로가 열려 있으면 CircuitOpenError)"""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f'{self.name} 회로 open')
+
+        self.calls += 1
+        level = params.get('success_level', 'none')
+        started = time.monotonic()
+        try:
+            text = await self._request(messages, params)
+        except asyncio.CancelledError:
+            self.breaker.record_cancelled()
+            raise
+        except Exception:
+            self.failures += 1
+            elapsed = time.monotonic() - started
+            self.breaker.record_failure(elapsed)
+            LLM_LATENCY.observe(elapsed, self.name, level, 'error')
+            raise
+        elapsed = time.monotonic() - started
+        self.breaker.record_success(elapsed)
+        LLM_LATENCY.observe(elapsed, self.name, level, 'ok')
+        return text
+
+    async def stream(self, messages: list, params: dict):
+        """generate 의 스트리밍판 - 회로 차단기/지연 기록은 응답 전체가 끝난 시점 기준"""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f'{self.name} 회로 open')
+
+        self.calls += 1
+        level = params.get('success_level', 'none')
+        started = time.monotonic()
+        try:
+            async for chunk in self._stream(messages, params):
+                yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            self.breaker.record_cancelled()
+            raise
+        except Exception:
+            self.failures += 1
+            elapsed = time.monotonic() - started
+            self.breaker.record_failure(elapsed)
+            LLM_LATENCY.observe(elapsed, self.name, level, 'error')
+            raise
+        elapsed = time.monotonic() - started
+        self.breaker.record_success(elapsed)
+        LLM_LATENCY.observe(elapsed, self.name, level, 'ok')
+
+    async def _request(self, messages: list, params: dict) -> str:
+        raise NotImplementedError
+
+    async def _stream(self, messages: list, params: dict):
+        """스트리밍을 지원하지 않는 제공자는 전체 응답을 한 조각으로 전달"""
+        yield await self._request(messages, params)
+
+    async def close(self):
+        pass
+
+    def is_available(self) -> bool:
+        """회로가 열려 있지 않은지 (cooldown 이 지난 open 은 시험 요청 대상이므로 사용 가능)"""
+        if self.breaker.state != OPEN:
+            return True
+        return time.monotonic() - self.breaker.opened_at >= self.breaker.cooldown
+
+    def score(self) -> float:
+        """라우팅 점수 (낮을수록 우선) - 최근 p50 지연에 오류율 가중"""
+        return self.breaker.latency_percentile(0.5) * (1 + 4 * self.breaker.error_rate())
+
+    def saturation(self) -> float:
+        """연결 풀 사용률 (풀이 없는 제공자는 0)"""
+        return 0.0
+
+    def health(self) -> dict:
+        """상태 확인용 요약 - 백분위수 계산 없이 속성만 읽음"""
+        return {'state': self.breaker.state, 'in_flight': self.in_flight, 'saturation': self.saturation()}
+
+    def stats(self) -> dict:
+        return {'calls': self.calls, 'failures': self.failures, **self.breaker.stats()}
+
+
+class HTTPProvider(LLMProvider):
+    """aiohttp 공유 세션 기반 제공자 (연결 풀, 요청별 타임아웃, 선택적 헤지 요청)"""
+
+    env_prefix = ''
+
+    def __init__(self):
+        prefix = self.env_prefix
+        super().__init__(float(os.getenv(f'{prefix}_TIMEOUT', '10')))
+        self.pool_size = int(os.getenv(f'{prefix}_POOL_SIZE', '20'))
+        self.connect_timeout = float(os.getenv(f'{prefix}_CONNECT_TIMEOUT', '3'))
+        self.hedging = os.getenv(f'{prefix}_HEDGE', '0') == '1'
+        self.hedged_requests = 0
+        self._session: aiohttp.ClientSession | None = None
+
+    def _headers(self) -> dict:
+        return {'Content-Type': 'application/json'}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """공유 ClientSession 반환 (keep-alive 연결 풀 재사용)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, headers=self._headers())
+        return self._session
+
+    async def close(self):
+        """세션 종료"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _build_request(self, messages: list, params: dict) -> tuple:
+        """(url, json 본문) 반환"""
+        raise NotImplementedError
+
+    def _parse_response(self, data: dict) -> str:
+        raise NotImplementedError
+
+    def _build_stream_request(self, messages: list, params: dict) -> tuple:
+        """스트리밍(SSE) 요청의 (url, json 본문)"""
+        raise NotImplementedError
+
+    def _parse_stream_event(self, data: dict) -> str:
+        """SSE 이벤트 하나에서 새로 생성된 텍스트 조각"""
+        raise NotImplementedError
+
+    async def _stream(self, messages: list, params: dict):
+        """SSE(data: {...}) 줄을 읽어 텍스트 조각 전달 (헤지 요청 없음)"""
+        url, body = self._build_stream_request(messages, params)
+        session = self._get_session()
+        request_timeout = aiohttp.ClientTimeout(total=self.breaker.current_timeout(), connect=self.connect_timeout)
+        self.in_flight += 1
+        try:
+            async with session.post(url, json=body, timeout=request_timeout) as response:
+                response.raise_for_status()
+                async for line in response.content:
+                    line = line.strip()
+                    if not line.startswith(b'data:'):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == b'[DONE]':
+                        break
+                    chunk = self._parse_stream_event(json.loads(payload))
+                    if chunk:
+                        yield chunk
+        finally:
+            self.in_flight -= 1
+
+    async def _send_once(self, url: str, body: dict, timeout: float) -> str:
+        session = self._get_session()
+        request_timeout = aiohttp.ClientTimeout(total=timeout, connect=self.connect_timeout)
+        self.in_flight += 1
+        try:
+            async with session.post(url, json=body, timeout=request_timeout) as response:
+                response.raise_for_status()
+                data = await response.json()
+        finally:
+            self.in_flight -= 1
+        return self._parse_response(data).strip()
+
+    def saturation(self) -> float:
+        return self.in_flight / self.pool_size if self.pool_size else 0.0
+
+    async def _request(self, messages: list, params: dict) -> str:
+        """p95 를 넘기도록 응답이 없으면 같은 요청을 하나 더 보내 먼저 성공한 쪽 사용"""
+        url, body = self._build_request(messages, params)
+        timeout = self.breaker.current_timeout()
+        delay = self.breaker.hedge_delay() if self.hedging else None
+        if delay is None:
+            return await self._send_once(url, body, timeout)
+
+        tasks = [asyncio.ensure_future(self._send_once(url, body, timeout))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return tasks[0].result()
+
+            self.hedged_requests += 1
+            tasks.append(asyncio.ensure_future(self._send_once(url, body, timeout)))
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        return {**super().stats(), 'hedged_requests': self.hedged_requests}
+
+
+class PerplexityProvider(HTTPProvider):
+    """Perplexity chat/completions (OpenAI 호환 형식)"""
+
+    name = 'perplexity'
+    env_prefix = 'PERPLEXITY'
+
+    def __init__(self):
+        super().__init__()
+        self.api_key = os.getenv('PERPLEXITY_API_KEY')
+        self.api_url = os.getenv('PERPLEXITY_API_URL', 'https://api.perplexity.ai/chat/completions')
+        self.model = os.getenv('PERPLEXITY_MODEL', 'sonar')
+
+    def _headers(self) -> dict:
+        return {'Authorization': f'Bearer {self.api_key}', 'Content-Type': 'application/json'}
+
+    def _build_request(self, messages: list, params: dict) -> tuple:
+        return self.api_url, {
+            'model': self.model,
+            'messages': messages,
+            'max_tokens': params.get('max_tokens', 300),
+            'temperature': params.get('temperature', 0.7),
+        }
+
+    def _parse_response(self, data: dict) -> str:
+        return data['choices'][0]['message']['content']
+
+    def _build_stream_request(self, messages: list, params: dict) -> tuple:
+        url, body = self._build_request(messages, params)
+        return url, {**body, 'stream': True}
+
+    def _parse_stream_event(self, data: dict) -> str:
+        choices = data.get('choices') or [{}]
+        return choices[0].get('delta', {}).get('content') or ''
+
+
+class GeminiProvider(HTTPProvider):
+    """Gemini generateContent REST API (SDK 없이 aiohttp 로 호출)"""
+
+    name = 'gemini'
+    env_prefix = 'GEMINI'
+
+    def __init__(self):
+        super().__init__()
+        self.api_key = os.getenv('GEMINI_API_KEY')
+        self.model = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+        self.api_base = os.getenv('GEMINI_API_URL', 'https://generativelanguage.googleapis.com/v1beta')
+
+    def _headers(self) -> dict:
+        return {'x-goog-api-key': self.api_key or '', 'Content-Type': 'application/json'}
+
+    def _build_request(self, messages: list, params: dict) -> tuple:
+        system = "\n\n".join(m['content'] for m in messages if m['role'] == 'system')
+        contents = [
+            {'role': 'user' if m['role'] == 'user' else 'model', 'parts': [{'text': m['content']}]}
+            for m in messages if m['role'] != 'system'
+        ]
+        body = {
+            'contents': contents,
+            'generationConfig': {
+                'maxOutputTokens': params.get('max_tokens', 300),
+                'temperature': params.get('temperature', 0.7),
+            },
+        }
+        if system:
+            body['system_instruction'] = {'parts': [{'text': system}]}
+        return f"{self.api_base}/models/{self.model}:generateContent", body
+
+    def _parse_response(self, data: dict) -> str:
+        parts = data['candidates'][0]['content']['parts']
+        return ''.join(part.get('text', '') for part in parts)
+
+    def _build_stream_request(self, messages: list, params: dict) -> tuple:
+        _, body = self._build_request(messages, params)
+        return f"{self.api_base}/models/{self.model}:streamGenerateContent?alt=sse", body
+
+    def _parse_stream_event(self, data: dict) -> str:
+        candidates = data.get('candidates') or []
+        if not candidates:
+            return ''
+        return ''.join(part.get('text', '') for part in candidates[0].get('content', {}).get('parts', []))
+
+
+class OfflineProvider(LLMProvider):
+    """네트워크 없이 샘플 대사를 돌려주는 제공자 - 다른 제공자가 모두 실패했을 때의 최후 수단"""
+
+    name = 'offline'
+    fallback_only = True
+
+    DEFAULT_SAMPLES = ['[좋습니다, 좋아요!]', '[아, 이런….]', '[놀랍습니다, 놀라워요!]']
+
+    def __init__(self, samples=None):
+        """samples: 대사 목록, 또는 요청마다 판정(success_level)을 받아 대사 목록을 돌려주는 함수
+        (페르소나 데이터를 늦게 읽고, 다시 읽은 내용을 바로 반영하기 위함)"""
+        super().__init__()
+        self._samples = samples
+
+    def samples(self, success_level: str | None = None):
+        samples = self._samples(success_level) if callable(self._samples) else self._samples
+        return samples or self.DEFAULT_SAMPLES
+
+    async def _request(self, messages: list, params: dict) -> str:
+        samples = self.samples(params.get('success_level'))
+        items = params.get('items')
+        if items:
+            return json.dumps([random.choice(samples) for _ in range(items)], ensure_ascii=False)
+        return random.choice(samples)
+
+
+PROVIDER_CLASSES = {
+    'perplexity': PerplexityProvider,
+    'gemini': GeminiProvider,
+    'offline': OfflineProvider,
+}
+
+
+class NoProviderAvailable(Exception):
+    """사용 가능한 제공자가 없음"""
+
+
+class LLMRouter:
+    """요청마다 최근 지연/오류율이 가장 좋은 제공자를 골라 호출, 실패 시 다음 제공자로 자동 전환
+
+    - failovers: 제공자가 실제로 요청을 보냈다가 실패해서 다음 제공자로 넘어간 횟수
+    - skipped_open: 회로가 열려 있어 요청 없이 건너뛴 횟수 (장애 중에는 이쪽이 늘어남)
+    """
+
+    def __init__(self, providers: list):
+        self.providers = providers
+        self.failovers = 0
+        self.skipped_open = 0
+
+    @classmethod
+    def from_env(cls, samples=None) -> 'LLMRouter':
+        """LLM_PROVIDERS (예: 'perplexity,gemini,offline') 로 구성
+
+        지정하지 않으면 perplexity, 그리고 GEMINI_API_KEY 가 있으면 gemini 를 추가
+        """
+        names = os.getenv('LLM_PROVIDERS', '')
+        if names:
+            names = [n.strip() for n in names.split(',') if n.strip()]
+        else:
+            names = ['perplexity'] + (['gemini'] if os.getenv('GEMINI_API_KEY') else [])
+
+        providers = []
+        for name in names:
+            if name not in PROVIDER_CLASSES:
+                logger.warning(f"⚠️ 알 수 없는 LLM 제공자: {name}")
+                continue
+            providers.append(OfflineProvider(samples) if name == 'offline' else PROVIDER_CLASSES[name]())
+        logger.info(f"✓ LLM 제공자: {', '.join(p.name for p in providers)}")
+        return cls(providers)
+
+    def ranked(self, allow_fallback: bool = True) -> list:
+        """시도 순서 - 사용 가능한 일반 제공자(점수순) → 회로가 열린 제공자 → 최후 수단 제공자
+
+        지연 표본이 없는 제공자는 점수 0 으로 취급해 먼저 시도 (설정 순서 유지)
+        allow_fallback 이 False 면 일반 제공자가 하나라도 있을 때 최후 수단 제공자는 제외
+        """
+        primary = [p for p in self.providers if not p.fallback_only]
+        available = sorted((p for p in primary if p.is_available()), key=lambda p: p.score())
+        unavailable = [p for p in primary if not p.is_available()]
+        fallback = [p for p in self.providers if p.fallback_only]
+        if primary and not allow_fallback:
+            fallback = []
+        return available + unavailable + fallback
+
+    async def generate(self, messages: list, params: dict) -> str:
+        """params['allow_fallback'] 가 False 면 캐시/풀에 남는 결과이므로 최후 수단 제공자를 쓰지 않음"""
+        error = None
+        failed = False
+        for provider in self.ranked(params.get('allow_fallback', True)):
+            if failed:
+                self.failovers += 1
+                failed = False
+            try:
+                return await provider.generate(messages, params)
+            except CircuitOpenError as e:
+                self.skipped_open += 1
+                error = e
+            except Exception as e:
+                logger.warning(f"⚠️ [{provider.name}] 요청 실패, 다음 제공자로 전환: {e!r}")
+                error = e
+                failed = True
+        raise error or NoProviderAvailable('LLM 제공자가 없습니다')
+
+    async def stream(self, messages: list, params: dict):
+        """generate 와 같은 순서로 시도하되, 첫 조각을 받은 뒤 실패하면 전환하지 않고 예외 전달
+        (이미 사용자에게 보인 문장에 다른 제공자의 응답을 이어 붙일 수 없으므로)"""
+        error = None
+        failed = False
+        for provider in self.ranked(params.get('allow_fallback', True)):
+            if failed:
+                self.failovers += 1
+                failed = False
+            started = False
+            try:
+                async for chunk in provider.stream(messages, params):
+                    started = True
+                    yield chunk
+                return
+            except CircuitOpenError as e:
+                self.skipped_open += 1
+                error = e
+            except Exception as e:
+                if started:
+                    raise
+                logger.warning(f"⚠️ [{provider.name}] 스트리밍 요청 실패, 다음 제공자로 전환: {e!r}")
+                error = e
+                failed = True
+        raise error or NoProviderAvailable('LLM 제공자가 없습니다')
+
+    async def close(self):
+        for provider in self.providers:
+            await provider.close()
+
+    def health(self) -> dict:
+        return {p.name: p.health() for p in self.providers}
+
+    def stats(self) -> dict:
+        return {
+            'failovers': self.failovers,
+            'skipped_open': self.skipped_open,
+            'providers': {p.name: p.stats() for p in self.providers},
+        }
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter as _StackCounter
+
+from utils.metrics import LOOP_LAG, LOOP_LAG_LAST, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LOOP_BLOCKED = REGISTRY.counter(
+    'event_loop_blocked_total', '이벤트 루프가 기준 시간 이상 막힌 횟수')
+PROFILER_SAMPLES = REGISTRY.counter(
+    'loop_profiler_samples_total', '샘플링 프로파일러가 수집한 표본 수')
+
+# 표본 스택에서 남길 최대 프레임 수 (가장 안쪽 기준)
+PROFILE_STACK_DEPTH = 12
+
+# 이 폴더 아래 파일은 상대 경로(cogs/dice_roller.py)로, 나머지는 파일 이름만 표시
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PROJECT_PREFIXES = ('cogs/', 'utils/')
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(PROJECT_ROOT):
+        filename = os.path.relpath(filename, PROJECT_ROOT).replace(os.sep, '/')
+    else:
+        filename = os.path.basename(filename)
+    return f'{filename}:{code.co_name}:{frame.f_lineno}'
+
+
+def collapse_stack(frame, depth: int = PROFILE_STACK_DEPTH) -> str:
+    """프레임을 'a;b;c' 형태(바깥 → 안쪽)로 접음"""
+    labels = []
+    while frame is not None and len(labels) < depth:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class LoopWatchdog:
+    """이벤트 루프 감시 - 루프 안의 심장 박동 작업 + 루프 밖의 감시 스레드
+
+    - 박동마다 예정보다 늦게 깨어난 시간을 이벤트 루프 지연(event_loop_lag_seconds)으로 기록
+      (루프 지연 측정은 이 박동 하나뿐 - /readyz 도 같은 값을 사용)
+    - 루프가 LOOP_BLOCK_THRESHOLD 초 이상 박동을 못 하면, 감시 스레드가 그 순간
+      루프 스레드의 스택(막고 있는 콜백)을 로그로 남기고 지표에 집계 (막힘 1회당 1번)
+    - 샘플링 프로파일러(선택): 켜 두는 동안 루프 스레드 스택을 주기적으로 수집해
+      어느 코루틴/함수가 루프를 오래 잡고 있는지 집계 (런타임에 켜고 끔)
+      GIL 전환 주기(기본 5ms)보다 짧은 콜백은 덜 잡히므로 긴 점유를 찾는 용도
+    """
+
+    def __init__(self, threshold: float | None = None, interval: float | None = None):
+        self.threshold = threshold if threshold is not None else float(os.getenv('LOOP_BLOCK_THRESHOLD', '0.5'))
+        self.interval = interval if interval is not None else float(os.getenv('LOOP_WATCHDOG_INTERVAL', '0.1'))
+        self.profile_interval = float(os.getenv('PROFILER_INTERVAL', '0.005'))
+        self.profile_max_seconds = float(os.getenv('PROFILER_MAX_SECONDS', '120'))
+
+        self.blocked = 0
+        self.longest_block = 0.0
+        self._last_beat = time.monotonic()
+        self._reported_beat = None
+        self._loop_thread_id = None
+        self._heartbeat: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+        self._profiling = False
+        self._profile_started = 0.0
+        self._profile_samples = _StackCounter()
+        self._profile_lock = threading.Lock()
+
+    def start(self):
+        """루프 안에서 호출 - 심장 박동 작업과 감시 스레드 시작"""
+        if self._heartbeat is not None and not self._heartbeat.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat = asyncio.create_task(self._beat())
+        self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    async def _beat(self):
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._last_beat - self.interval)
+            LOOP_LAG.observe(lag)
+            LOOP_LAG_LAST.set(lag)
+
+    def _loop_frame(self):
+        return sys._current_frames().get(self._loop_thread_id)
+
+    def _watch(self):
+        """감시 스레드 본체 - 막힘 감지, 프로파일링 중이면 표본 수집"""
+        next_check = 0.0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if self._profiling:
+                self._sample(now)
+            if now >= next_check:
+                self._check(now)
+                next_check = now + self.interval
+            self._stop.wait(self.profile_interval if self._profiling else self.interval)
+
+    def _check(self, now: float):
+        beat = self._last_beat
+        stalled = now - beat
+        if stalled < self.threshold:
+            return
+        self.longest_block = max(self.longest_block, stalled)
+        if self._reported_beat == beat:
+            return
+        self._reported_beat = beat
+        self.blocked += 1
+        LOOP_BLOCKED.inc()
+
+        frame = self._loop_frame()
+        stack = ''.join(traceback.format_stack(frame)) if frame is not None else '(스택 없음)'
+        logger.warning(f"🐢 이벤트 루프가 {stalled:.2f}초째 막혀 있습니다. 루프 스레드 스택:\n{stack}")
+
+    def _sample(self, now: float):
+        if now - self._profile_started > self.profile_max_seconds:
+            self._profiling = False
+            logger.info(f"⏱️ 프로파일러 자동 종료 ({self.profile_max_seconds:.0f}초 경과)")
+            return
+        frame = self._loop_frame()
+        if frame is None:
+            return
+        stack = collapse_stack(frame)
+        with self._profile_lock:
+            self._profile_samples[stack] += 1
+        PROFILER_SAMPLES.inc()
+
+    # 프로파일러 제어 (관리 명령 / HTTP 경로에서 호출)
+
+    @property
+    def profiling(self) -> bool:
+        return self._profiling
+
+    def start_profiler(self):
+        """표본을 비우고 프로파일링 시작"""
+        with self._profile_lock:
+            self._profile_samples.clear()
+        self._profile_started = time.monotonic()
+        self._profiling = True
+        logger.info("⏱️ 샘플링 프로파일러 시작")
+
+    def stop_profiler(self):
+        self._profiling = False
+        logger.info("⏱️ 샘플링 프로파일러 종료")
+
+    def profile_report(self, limit: int = 15) -> dict:
+        """가장 자주 관측된 스택과 함수(가장 안쪽 프레임) 순위
+
+        대기 중인 루프(selector.select)의 표본은 idle 로 따로 집계하고,
+        top_project 는 각 표본에서 가장 안쪽의 cogs/ 또는 utils/ 프레임 기준
+        """
+        with self._profile_lock:
+            samples = dict(self._profile_samples)
+        total = sum(samples.values())
+        idle = sum(count for stack, count in samples.items() if ':select:' in stack.rsplit(';', 1)[-1])
+
+        leaves = _StackCounter()
+        project = _StackCounter()
+        for stack, count in samples.items():
+            frames = stack.split(';')
+            leaves[frames[-1]] += count
+            owner = next((f for f in reversed(frames) if f.startswith(_PROJECT_PREFIXES)), None)
+            if owner is not None:
+                project[owner] += count
+
+        return {
+            'profiling': self._profiling,
+            'samples': total,
+            'idle_ratio': idle / total if total else 0.0,
+            'top_functions': leaves.most_common(limit),
+            'top_project': project.most_common(limit),
+            'top_stacks': _StackCounter(samples).most_common(limit),
+        }
+
+    def stats(self) -> dict:
+        return {
+            'blocked': self.blocked,
+            'longest_block': self.longest_block,
+            'stalled_for': max(0.0, time.monotonic() - self._last_beat),
+            'profiling': self._profiling,
+        }
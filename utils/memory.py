@@ -0,0 +1,167 @@
+import asyncio
+import gc
+import logging
+import os
+import sys
+import tracemalloc
+from collections import Counter
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# MEMORY_PROFILE=low: 작은 컨테이너(무료 호스팅 등)용 기본값
+# 직접 지정한 환경 변수가 항상 우선 (여기 값은 비어 있는 것만 채움)
+MEMORY_PROFILES = {
+    'default': {},
+    'low': {
+        'FORTUNE_CACHE_SIZE': '1000',
+        'RATE_LIMIT_MAX_BUCKETS': '2000',
+        'ROLL_HISTORY_QUEUE': '2000',
+        'ROLL_SESSION_CACHE': '500',
+        'DICE_PARSE_CACHE_SIZE': '128',
+        'NARRATION_POOL_TARGET': '4',
+        'NARRATION_POOL_LOW_WATER': '1',
+        'PERPLEXITY_POOL_SIZE': '8',
+        'GEMINI_POOL_SIZE': '8',
+        # 프로세스 풀은 작업자마다 인터프리터 사본이 하나씩 - 스레드 1개로 대체
+        'OFFLOAD_MODE': 'thread',
+        'OFFLOAD_WORKERS': '1',
+        'OFFLOAD_QUEUE': '8',
+        # 디스코드 메시지 캐시 끔 (답장/수정은 보낸 메시지 객체를 직접 쓰므로 캐시가 필요 없음)
+        'DISCORD_MAX_MESSAGES': '0',
+    },
+}
+
+
+def apply_memory_profile(profile: str | None = None) -> str:
+    """MEMORY_PROFILE 의 기본값을 환경 변수에 채움 - 구성 요소가 환경 변수를 읽기 전에 호출"""
+    profile = (profile or os.getenv('MEMORY_PROFILE', 'default')).strip().lower()
+    if profile not in MEMORY_PROFILES:
+        raise ValueError(f"MEMORY_PROFILE 은 {', '.join(MEMORY_PROFILES)} 중 하나여야 합니다: {profile}")
+    for key, value in MEMORY_PROFILES[profile].items():
+        os.environ.setdefault(key, value)
+    return profile
+
+
+def client_options(profile: str, message_content: bool) -> dict:
+    """commands.Bot 에 넘길 인텐트/캐시 설정
+
+    - default: Intents.default() + 디스코드 기본 캐시 (메시지 1000개)
+    - low: 이 봇이 쓰는 이벤트만 받음 (서버 구조, 메시지) - 멤버/이모지/음성 상태/입력 중 표시 캐시 없음,
+      멤버 목록 청크 요청 없음. 명령의 작성자 정보는 메시지/상호작용에 같이 실려 옴
+    """
+    if profile == 'low':
+        intents = discord.Intents.none()
+        intents.guilds = True
+        intents.guild_messages = True
+        intents.dm_messages = True
+        member_cache_flags = discord.MemberCacheFlags.none()
+    else:
+        intents = discord.Intents.default()
+        member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+    intents.message_content = message_content
+
+    max_messages = int(os.getenv('DISCORD_MAX_MESSAGES', '1000'))
+    return {
+        'intents': intents,
+        'max_messages': max_messages or None,
+        'member_cache_flags': member_cache_flags,
+        'chunk_guilds_at_startup': profile != 'low' and intents.members,
+    }
+
+
+def process_rss_bytes() -> int | None:
+    """현재 상주 메모리 (리눅스 /proc 기준, 없으면 None)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def start_tracing(frames: int | None = None):
+    """tracemalloc 시작 (이미 켜져 있으면 무시) - 할당마다 비용이 붙으므로 조사할 때만"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames or int(os.getenv('TRACEMALLOC_FRAMES', '1')) or 1)
+        logger.info("🔍 tracemalloc 시작")
+
+
+def stop_tracing():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        logger.info("🔍 tracemalloc 종료")
+
+
+def top_allocators(limit: int = 20) -> dict:
+    """tracemalloc 기준 할당이 많은 코드 위치 (꺼져 있으면 tracing=False 만)"""
+    if not tracemalloc.is_tracing():
+        return {'tracing': False}
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        'tracing': True,
+        'traced_bytes': current,
+        'peak_bytes': peak,
+        'top': [
+            {'location': str(stat.traceback[0]), 'bytes': stat.size, 'blocks': stat.count}
+            for stat in snapshot.statistics('lineno')[:limit]
+        ],
+    }
+
+
+def object_counts(limit: int = 20) -> dict:
+    """gc 가 추적하는 객체 수와 상위 타입 (전체 객체를 한 번 훑으므로 디버그용)"""
+    objects = gc.get_objects()
+    counts = Counter(type(obj).__name__ for obj in objects)
+    return {'total': len(objects), 'top': counts.most_common(limit)}
+
+
+def discord_cache_counts(bot) -> dict:
+    """discord.py 내부 캐시 크기"""
+    guilds = bot.guilds
+    return {
+        'guilds': len(guilds),
+        'channels': sum(len(guild.channels) for guild in guilds),
+        'members': sum(len(guild.members) for guild in guilds),
+        'users': len(bot.users),
+        'emojis': len(bot.emojis),
+        'stickers': len(bot.stickers),
+        'messages': len(bot.cached_messages),
+        'private_channels': len(bot.private_channels),
+    }
+
+
+async def memory_report(bot, profile: str, limit: int = 20) -> dict:
+    """/debug/memory 응답 - 프로세스 메모리, 캐시별 항목 수, (켜져 있으면) tracemalloc 상위 할당 위치
+
+    캐시는 루프에서 바로 세고(다른 스레드에서 세면 도중에 바뀔 수 있음), 스냅샷 분석만 스레드에서 실행
+    """
+    caches = {'discord': discord_cache_counts(bot)}
+    for name, cog in bot.cogs.items():
+        memory_stats = getattr(cog, 'memory_stats', None)
+        if memory_stats is not None:
+            caches[name] = memory_stats()
+    return {
+        'profile': profile,
+        'python': sys.version.split()[0],
+        'rss_bytes': process_rss_bytes(),
+        'caches': caches,
+        'objects': object_counts(limit),
+        'tracemalloc': await asyncio.to_thread(top_allocators, limit),
+    }
+
+
+def collect_metrics() -> list:
+    """/metrics 용 프로세스 메모리"""
+    rss = process_rss_bytes()
+    families = []
+    if rss is not None:
+        families.append(('process_resident_memory_bytes', 'gauge', '상주 메모리 (RSS)', {(): rss}))
+    if tracemalloc.is_tracing():
+        families.append(('tracemalloc_traced_bytes', 'gauge', 'tracemalloc 이 추적 중인 할당 크기',
+                         {(): tracemalloc.get_traced_memory()[0]}))
+    return families
@@ -0,0 +1,77 @@
+import logging
+import os
+import re
+
+from utils.dice_parser import DiceSyntaxError, parse_expression
+
+logger = logging.getLogger(__name__)
+
+# 모든 패턴은 모듈 로드 시 한 번만 컴파일
+# [운세] 는 메시지 전체가 이것뿐일 때만 동작 (공백 허용)
+FORTUNE_PATTERN = re.compile(r'\s*\[운세\]\s*')
+
+# 한 번의 스캔으로 확률 질의와 주사위 표현식을 함께 추출
+# - prob: [prob 3d6>=12]
+# - roll: [4d6kh3], [1d20+1d4+3], [1d100b] 등 (실제 문법 검사는 dice_parser 에서)
+COMMAND_PATTERN = re.compile(
+    r'\[(?:'
+    r'prob\s+(?P<prob_dice>\d+)d(?P<prob_sides>\d+)(?P<prob_mod>[+\-]\d+)?\s*'
+    r'(?P<prob_cmp>>=|<=|==|>|<|=)\s*(?P<prob_target>-?\d+)'
+    r'|(?P<roll>[0-9d+\-!khlavisbp]{1,100})'
+    r')\]'
+)
+
+
+class MessagePrefilter:
+    """on_message 앞단의 빠른 필터
+
+    - 봇/웹훅 작성자, 비활성 채널은 본문을 보기 전에 제외
+    - '[' 가 없으면 정규식 없이 제외
+    - 남은 메시지만 한 번 스캔해 명령 추출과 문법 검사를 함께 처리
+    """
+
+    def __init__(self, disabled_channels: set | None = None):
+        if disabled_channels is None:
+            raw = os.getenv('DICE_DISABLED_CHANNELS', '')
+            disabled_channels = {int(c) for c in raw.split(',') if c.strip()}
+        self.disabled_channels = frozenset(disabled_channels)
+        self.scanned = 0
+        self.matched = 0
+
+    def scan(self, message) -> dict | None:
+        """처리할 명령이 있으면 {'fortune', 'rolls', 'probs'} 반환, 없으면 None"""
+        self.scanned += 1
+        if message.author.bot or message.webhook_id is not None:
+            return None
+        if message.channel.id in self.disabled_channels:
+            return None
+
+        content = message.content
+        if '[' not in content:
+            return None
+
+        if '운세' in content and FORTUNE_PATTERN.fullmatch(content):
+            self.matched += 1
+            return {'fortune': True, 'rolls': [], 'probs': []}
+
+        rolls = []
+        probs = []
+        # findall 은 그룹 튜플을 바로 돌려주므로 finditer + group() 보다 가벼움
+        for prob_dice, prob_sides, prob_mod, prob_cmp, prob_target, notation in COMMAND_PATTERN.findall(content):
+            if not notation:
+                probs.append((prob_dice, prob_sides, prob_mod, prob_cmp, prob_target))
+                continue
+            try:
+                parse_expression(notation)
+            except DiceSyntaxError:
+                continue
+            rolls.append(notation)
+
+        if not rolls and not probs:
+            return None
+
+        self.matched += 1
+        return {'fortune': False, 'rolls': rolls, 'probs': probs}
+
+    def stats(self) -> dict:
+        return {'scanned': self.scanned, 'matched': self.matched}
@@ -0,0 +1,170 @@
+import logging
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+# 초 단위 지연 히스토그램 기본 구간 (디스코드/LLM 왕복 범위에 맞춤)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """단조 증가 카운터 (라벨 값 튜플별로 분리 집계)"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self._values: dict = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> list:
+        return [(self.name, _format_labels(self.label_names, key), value)
+                for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """임의로 설정하는 현재값"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+
+class Histogram:
+    """고정 구간 히스토그램 - 관측 1회는 bisect 한 번과 정수 증가 몇 번
+
+    구간별 개수는 누적하지 않고 저장했다가 출력할 때만 누적합으로 변환
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        self._series: dict = {}  # 라벨 -> [구간별 개수..., +Inf 개수, 합계]
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = [0] * (len(self.buckets) + 2)
+            self._series[labels] = series
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self) -> list:
+        samples = []
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                samples.append((f'{self.name}_bucket', _format_labels(self.label_names, key, le), cumulative))
+            samples.append((f'{self.name}_sum', _format_labels(self.label_names, key), series[-1]))
+            samples.append((f'{self.name}_count', _format_labels(self.label_names, key), cumulative))
+        return samples
+
+
+class Registry:
+    """지표 모음 + 출력 시점에 값을 읽어 오는 수집 함수 (기존 stats() 재사용)"""
+
+    def __init__(self):
+        self._metrics: dict = {}
+        self._collectors: dict = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+        return self._metrics.get(name) or self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: tuple = ()) -> Gauge:
+        return self._metrics.get(name) or self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.get(name) or self.register(Histogram(name, help_text, labels, buckets))
+
+    def add_collector(self, key: str, collect):
+        """collect() -> [(이름, 종류, 설명, {라벨 dict 튜플: 값})] 을 스크레이프마다 호출"""
+        self._collectors[key] = collect
+
+    def remove_collector(self, key: str):
+        self._collectors.pop(key, None)
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식 (0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+
+        for key, collect in list(self._collectors.items()):
+            try:
+                families = collect()
+            except Exception as e:
+                logger.error(f'지표 수집 오류 ({key}): {e!r}')
+                continue
+            for name, kind, help_text, values in families:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in values.items():
+                    label_names = tuple(k for k, _ in labels)
+                    label_values = tuple(v for _, v in labels)
+                    lines.append(f'{name}{_format_labels(label_names, label_values)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# 파이프라인 구간별 지표
+TIME_TO_TYPING = REGISTRY.histogram(
+    'dice_time_to_typing_seconds', '메시지 수신부터 타이핑 표시까지')
+FIRST_REPLY = REGISTRY.histogram(
+    'dice_time_to_first_reply_seconds', '메시지 수신부터 굴림 결과가 처음 보일 때까지', ('mode',))
+E2E_LATENCY = REGISTRY.histogram(
+    'dice_e2e_latency_seconds', '메시지 수신부터 마지막 답장 전송까지', ('command',))
+DISCORD_SEND = REGISTRY.histogram(
+    'discord_send_seconds', '디스코드 답장 전송 지연')
+LLM_LATENCY = REGISTRY.histogram(
+    'llm_request_seconds', 'LLM 제공자 요청 지연', ('provider', 'success_level', 'outcome'))
+FALLBACKS = REGISTRY.counter(
+    'narration_fallbacks_total', 'LLM 대신 대체 메시지를 쓴 횟수', ('kind', 'success_level'))
+LOOP_LAG = REGISTRY.histogram(
+    'event_loop_lag_seconds', '이벤트 루프 지연 (예정보다 늦게 깨어난 시간)',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+LOOP_LAG_LAST = REGISTRY.gauge(
+    'event_loop_lag_last_seconds', '마지막으로 측정한 이벤트 루프 지연')
@@ -0,0 +1,130 @@
+import asyncio
+import contextlib
+import logging
+import os
+import random
+
+from utils.narration_pool import NarrationPool
+
+logger = logging.getLogger(__name__)
+
+
+def coalesce_key(dice_result: dict) -> tuple:
+    """같은 요청으로 묶을 기준 - (판정 단계, 공백/대소문자를 정규화한 표기)"""
+    notation = str(dice_result.get('notation', '')).replace(' ', '').lower()
+    return dice_result.get('success_level', 'success'), notation
+
+
+class NarrationCoalescer:
+    """동일한 형태의 실시간 대사 요청을 하나의 API 호출로 합치는 single-flight 계층
+
+    - 같은 키의 요청이 진행 중이지 않으면 기다리지 않고 바로 개별 생성 (선두 요청)
+    - 선두 요청이 진행 중일 때 같은 키가 또 오면 그때 짧은 창(COALESCE_WINDOW)을 열어 뒤따르는 요청을 모음
+    - 모인 요청이 여럿이면 서로 다른 템플릿 N개를 한 번에 받아 한 사람에 하나씩 나눠주고
+      이름/점수는 로컬에서 채움 (같은 대사가 반복되지 않음)
+    - 대기 중인 요청이 취소돼도(마감 시간 초과 등) 공유 호출은 계속 진행
+    - 스트리밍 요청도 leading() 으로 선두 표시를 해 두면 같은 키의 요청이 이 창에 모임
+    """
+
+    def __init__(self, generator):
+        self.generator = generator
+        self.window = float(os.getenv('COALESCE_WINDOW', '0.15'))
+        self.max_waiters = int(os.getenv('COALESCE_MAX_WAITERS', '8'))
+        self._leading: set = set()  # 개별 호출(또는 스트리밍)이 진행 중인 키
+        self._flights: dict = {}
+        self._tasks: set = set()
+        self.requests = 0
+        self.flights = 0
+        self.coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def in_flight(self, dice_result: dict) -> bool:
+        """같은 키의 요청이 진행 중인지 (스트리밍 대신 합류할지 판단)"""
+        key = coalesce_key(dice_result)
+        return key in self._leading or key in self._flights
+
+    @contextlib.contextmanager
+    def leading(self, dice_result: dict):
+        """이 블록 동안 같은 키의 요청은 선두를 기다리지 않고 묶음 창에 모임"""
+        key = coalesce_key(dice_result)
+        self._leading.add(key)
+        try:
+            yield
+        finally:
+            self._leading.discard(key)
+
+    async def narrate(self, dice_result: dict) -> str:
+        """진행 중인 요청이 없으면 바로 생성, 있으면 같은 키의 묶음에 합류하거나 새 묶음을 열고 결과를 기다림"""
+        self.requests += 1
+        key = coalesce_key(dice_result)
+        if key not in self._leading and key not in self._flights:
+            with self.leading(dice_result):
+                return await self.generator._generate_brown_message(dice_result)
+
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._flights.get(key)
+        if waiters is None:
+            waiters = []
+            self._flights[key] = waiters
+            task = asyncio.create_task(self._fly(key, waiters))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        waiters.append((dice_result, future))
+        if len(waiters) >= self.max_waiters:
+            # 가득 찬 묶음은 닫고, 이후 요청은 새 묶음으로
+            self._flights.pop(key, None)
+
+        return await future
+
+    async def _fly(self, key: tuple, waiters: list):
+        await asyncio.sleep(self.window)
+        if self._flights.get(key) is waiters:
+            del self._flights[key]
+
+        live = [(result, future) for result, future in waiters if not future.done()]
+        if not live:
+            return
+        try:
+            if len(live) == 1:
+                result, future = live[0]
+                texts = [await self.generator._generate_brown_message(result)]
+            else:
+                texts = await self._variants(key[0], [result for result, _ in live])
+        except Exception as e:
+            logger.error(f'묶음 대사 생성 오류: {e!r}')
+            texts = [self._fallback(result) for result, _ in live]
+
+        for (_, future), text in zip(live, texts):
+            if not future.done():
+                future.set_result(text)
+
+    async def _variants(self, success_level: str, results: list) -> list:
+        """템플릿 N개를 한 번에 생성해 요청마다 하나씩 렌더링 (모자라면 대체 메시지)"""
+        self.flights += 1
+        self.coalesced += len(results)
+        templates = await self.generator.generate_brown_templates(success_level, len(results))
+        templates = [t for t in templates if NarrationPool.is_valid_template(t)]
+        random.shuffle(templates)
+
+        texts = []
+        for i, result in enumerate(results):
+            if i < len(templates):
+                texts.append(NarrationPool.render(templates[i], result))
+            else:
+                texts.append(self._fallback(result))
+        return texts
+
+    def _fallback(self, result: dict) -> str:
+        return self.generator._get_fallback_message(
+            result.get('success_level', 'success'),
+            result.get('total', 0),
+            result.get('username', '참가자')
+        )
+
+    def stats(self) -> dict:
+        """요청 수, 공유 호출 수, 공유 호출로 처리된 요청 수"""
+        return {'requests': self.requests, 'flights': self.flights, 'coalesced': self.coalesced,
+                'in_flight': len(self._leading) + len(self._flights)}
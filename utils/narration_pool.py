@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import os
+import re
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# 풀에서 관리하는 판정 단계
+SUCCESS_LEVELS = ('critical_success', 'success', 'failure', 'critical_failure', 'impossible')
+
+# 템플릿에 허용되는 자리표시자
+PLACEHOLDERS = ('username', 'total', 'notation')
+_PLACEHOLDER_PATTERN = re.compile(r'\{(\w*)\}')
+
+
+class NarrationPool:
+    """판정 단계별로 미리 생성해 둔 브라운 대사 템플릿 풀
+
+    - 템플릿은 {username}, {total}, {notation} 자리표시자를 사용
+    - 버킷이 최저 수위(low water) 아래로 내려가면 백그라운드 작업이 목표치까지 보충
+    - 버킷이 비어 있으면 None 을 반환하므로 호출 측에서 실시간 생성으로 대체
+    """
+
+    def __init__(self, generator):
+        self.generator = generator
+        self.target = int(os.getenv('NARRATION_POOL_TARGET', '10'))
+        self.low_water = int(os.getenv('NARRATION_POOL_LOW_WATER', '3'))
+        self.refill_interval = float(os.getenv('NARRATION_POOL_INTERVAL', '30'))
+        # 시작 직후 첫 보충을 미뤄 게이트웨이 연결/Cog 로드와 API 호출이 겹치지 않게 함 (미스가 나면 바로 시작)
+        self.start_delay = float(os.getenv('NARRATION_POOL_START_DELAY', '5'))
+        self.buckets = {level: deque() for level in SUCCESS_LEVELS}
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.refill_failures = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        """백그라운드 보충 작업 시작"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self):
+        """백그라운드 보충 작업 종료"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def take(self, dice_result: dict) -> str | None:
+        """풀에서 대사 하나를 꺼내 자리표시자를 채워 반환 (없으면 None)"""
+        bucket = self.buckets.get(dice_result.get('success_level'))
+        if not bucket:
+            self.misses += 1
+            self._wakeup.set()
+            return None
+
+        template = bucket.popleft()
+        self.hits += 1
+        if len(bucket) < self.low_water:
+            self._wakeup.set()
+        return self.render(template, dice_result)
+
+    @staticmethod
+    def render(template: str, dice_result: dict) -> str:
+        """템플릿 자리표시자 치환 (str.format 대신 단순 치환 - 중괄호가 섞여도 안전)"""
+        return (
+            template
+            .replace('{username}', str(dice_result.get('username', '참가자')))
+            .replace('{total}', str(dice_result.get('total', 0)))
+            .replace('{notation}', str(dice_result.get('notation', '')))
+        )
+
+    @staticmethod
+    def is_valid_template(template: str) -> bool:
+        """허용된 자리표시자만 쓰는 대사인지 확인"""
+        if not template or not template.strip():
+            return False
+        return all(name in PLACEHOLDERS for name in _PLACEHOLDER_PATTERN.findall(template))
+
+    def add(self, success_level: str, templates: list) -> int:
+        """검증을 통과한 템플릿을 버킷에 추가하고 추가된 개수 반환"""
+        bucket = self.buckets[success_level]
+        added = 0
+        for template in templates:
+            if len(bucket) >= self.target:
+                break
+            if self.is_valid_template(template):
+                bucket.append(template.strip())
+                added += 1
+        return added
+
+    async def refill_once(self):
+        """최저 수위 아래 버킷을 목표치까지 보충"""
+        for level, bucket in self.buckets.items():
+            if len(bucket) >= self.low_water:
+                continue
+            templates = await self.generator.generate_brown_templates(level, self.target - len(bucket))
+            if not templates:
+                raise RuntimeError(f'{level} 템플릿 생성 실패')
+            self.add(level, templates)
+            self.refills += 1
+
+    async def _refill_loop(self):
+        if self.start_delay > 0:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.start_delay)
+            except asyncio.TimeoutError:
+                pass
+
+        backoff = self.refill_interval
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.refill_once()
+                backoff = self.refill_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # API 장애 시 미스 신호는 무시하고 재시도 간격을 늘려 불필요한 호출 방지
+                self.refill_failures += 1
+                backoff = min(backoff * 2, 600)
+                logger.warning(f'⚠️ 대사 풀 보충 실패 ({backoff:.0f}초 후 재시도): {e}')
+                await asyncio.sleep(backoff)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        """풀 상태 및 적중/미스 통계"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'refills': self.refills,
+            'refill_failures': self.refill_failures,
+            'sizes': {level: len(bucket) for level, bucket in self.buckets.items()},
+        }
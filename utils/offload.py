@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from utils.dice_engine import DiceEngine, probability
+from utils.dice_parser import parse_expression
+
+logger = logging.getLogger(__name__)
+
+
+class WorkQueueFull(Exception):
+    """대기 중인 무거운 작업이 상한에 도달함"""
+
+
+# 작업 함수 - 프로세스 풀로 보내므로 모듈 최상위에 있어야 함 (pickle 가능)
+
+def evaluate_job(notation: str, seed: int, use_numpy: bool, preview: int | None = None) -> dict:
+    """표현식 굴림 (호출 측 엔진이 넘겨준 시드로 새 엔진 생성 → 프로세스마다 같은 눈이 반복되지 않음)"""
+    return parse_expression(notation).evaluate(DiceEngine(seed, use_numpy), preview)
+
+
+def probability_job(num_dice: int, dice_sides: int, modifier: int, comparator: str, target: int):
+    return probability(num_dice, dice_sides, modifier, comparator, target)
+
+
+class WorkPool:
+    """CPU 를 오래 쓰는 굴림/확률 계산을 이벤트 루프 밖에서 실행하는 제한된 작업 풀
+
+    - OFFLOAD_MODE: process (기본, GIL 과 무관) / thread
+    - 실행 중 + 대기 중 작업 수는 OFFLOAD_QUEUE 로 제한, 넘치면 WorkQueueFull
+    - 마감 시간이 지나면 호출 측은 바로 돌아가고, 아직 시작하지 않은 작업은 취소됨
+    - 이미 실행 중이던 작업은 작업자를 계속 붙잡으므로, 마감 초과가 나면 풀을 새로 만들어 이후 작업은
+      새 풀로 보냄. 옛 풀은 다른 요청의 작업이 모두 끝나면 (프로세스 모드면 남은 작업자를 종료해) 정리
+      (스레드는 강제로 멈출 수 없으므로 끝날 때까지 stale 로 집계)
+    - 작업자 프로세스가 죽어 풀이 망가지면(BrokenExecutor) 그 풀도 교체 - 제출할 때 이미 망가져 있었으면
+      새 풀에 한 번 다시 제출하고, 실행 중에 망가졌으면 호출 측에 예외를 그대로 전달
+    - 풀은 첫 무거운 작업이 올 때 생성 (가벼운 굴림만 있으면 프로세스를 띄우지 않음)
+    """
+
+    def __init__(self, mode: str | None = None, workers: int | None = None, max_queued: int | None = None):
+        self.mode = mode or os.getenv('OFFLOAD_MODE', 'process')
+        self.workers = workers or int(os.getenv('OFFLOAD_WORKERS', str(min(4, os.cpu_count() or 1))))
+        self.max_queued = max_queued or int(os.getenv('OFFLOAD_QUEUE', '32'))
+        self._executor: Executor | None = None
+        # 풀별로 아직 결과를 기다리는 작업 수 (교체된 옛 풀은 0 이 되면 정리)
+        self._waiting: dict = {}
+        self._retired: set = set()
+        self._slots = asyncio.Semaphore(self.max_queued)
+        self._stale_threads: list = []
+        self.in_use = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.recycles = 0
+        self.broken = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='offload')
+            logger.info(f"✓ 작업 풀 시작: {self.mode} x{self.workers}")
+        return self._executor
+
+    async def run(self, func, *args, timeout: float | None = None):
+        """func(*args) 를 풀에서 실행 (마감 초과 시 asyncio.TimeoutError, 작업자가 죽으면 BrokenExecutor)"""
+        if self._slots.locked():
+            self.rejected += 1
+            raise WorkQueueFull(f'무거운 작업 대기열이 가득 찼습니다 ({self.max_queued})')
+
+        async with self._slots:
+            self.submitted += 1
+            executor, future = self._submit(func, args)
+            self.in_use += 1
+            self._waiting[executor] = self._waiting.get(executor, 0) + 1
+            try:
+                return await asyncio.wait_for(future, timeout=timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self._retire(executor)
+                raise
+            except BrokenExecutor:
+                self._retire(executor, broken=True)
+                raise
+            finally:
+                self.in_use -= 1
+                self._waiting[executor] -= 1
+                if executor in self._retired and not self._waiting[executor]:
+                    self._dispose(executor)
+
+    def _submit(self, func, args: tuple) -> tuple:
+        """(풀, future) - 쉬는 동안 작업자가 죽어 이미 망가진 풀이면 교체하고 새 풀에 한 번 다시 제출"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return executor, loop.run_in_executor(executor, func, *args)
+        except BrokenExecutor:
+            self._retire(executor, broken=True)
+            if not self._waiting.get(executor):
+                self._dispose(executor)
+            executor = self._get_executor()
+            return executor, loop.run_in_executor(executor, func, *args)
+
+    def _retire(self, executor: Executor, broken: bool = False):
+        """마감을 넘긴 작업이 돌고 있거나 (broken) 작업자가 죽은 풀을 교체 (다음 작업부터 새 풀 사용)"""
+        if executor is self._executor:
+            self._executor = None
+            self._retired.add(executor)
+            self.recycles += 1
+            self.broken += broken
+            reason = '작업자 비정상 종료' if broken else '마감 초과'
+            logger.warning(f"⚠️ 작업 풀 {reason} - 새 풀로 교체 ({self.recycles}회)")
+
+    def _dispose(self, executor: Executor):
+        """교체된 풀 정리 - 더 기다리는 작업이 없으므로 남은(마감 초과) 작업은 버림"""
+        self._retired.discard(executor)
+        self._waiting.pop(executor, None)
+        executor.shutdown(wait=False, cancel_futures=True)
+        if isinstance(executor, ProcessPoolExecutor):
+            # shutdown 은 실행 중인 작업을 멈추지 않으므로 작업자 프로세스를 직접 종료
+            for process in list((getattr(executor, '_processes', None) or {}).values()):
+                process.terminate()
+        else:
+            # 스레드는 멈출 수 없음 - 끝날 때까지 집계만
+            self._stale_threads.extend(t for t in getattr(executor, '_threads', ()) if t.is_alive())
+
+    @property
+    def stale(self) -> int:
+        """교체된 풀에서 아직 돌고 있는 스레드 수 (스레드 모드)"""
+        self._stale_threads = [t for t in self._stale_threads if t.is_alive()]
+        return len(self._stale_threads)
+
+    @property
+    def saturation(self) -> float:
+        """실행/대기 중인 작업 비율 (1 이면 새 작업은 WorkQueueFull)"""
+        return self.in_use / self.max_queued if self.max_queued else 0.0
+
+    def shutdown(self):
+        for executor in [self._executor, *self._retired]:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._retired.clear()
+        self._waiting.clear()
+
+    def stats(self) -> dict:
+        return {
+            'mode': self.mode,
+            'workers': self.workers,
+            'in_use': self.in_use,
+            'saturation': self.saturation,
+            'stale': self.stale,
+            'submitted': self.submitted,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+            'recycles': self.recycles,
+            'broken': self.broken,
+        }
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from types import MappingProxyType
+
+from utils.prompt_templates import PromptTemplates
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PERSONA = "당신은 TV 쇼 진행자 브라운입니다."
+DEFAULT_SAMPLES = ("[안녕하세요!]", "[반갑습니다!]")
+
+# 샘플 대사 어조 분류 - samples 가 목록이면 키워드로 추정, {어조: [대사]} 형태면 그대로 사용
+TONES = ('cheer', 'pity', 'neutral')
+TONE_KEYWORDS = {
+    'pity': ('이런', '안타깝', '유감', '아쉽', '저런', '실망'),
+    'cheer': ('대단', '놀랍', '놀라워', '좋습니다', '좋아요', '축하', '환호', '훌륭', '멋진'),
+}
+LEVEL_TONES = {
+    'critical_success': 'cheer',
+    'success': 'cheer',
+    'failure': 'pity',
+    'critical_failure': 'pity',
+}
+
+
+class PersonaError(ValueError):
+    """페르소나 데이터 형식 오류"""
+
+
+def classify_tone(sample: str) -> str:
+    for tone in ('pity', 'cheer'):
+        if any(keyword in sample for keyword in TONE_KEYWORDS[tone]):
+            return tone
+    return 'neutral'
+
+
+def _clean_samples(samples) -> list:
+    if not isinstance(samples, list) or not all(isinstance(s, str) for s in samples):
+        raise PersonaError('samples 는 문자열 목록이어야 합니다')
+    return [s.strip() for s in samples if s.strip()]
+
+
+def parse_persona(data) -> tuple:
+    """brown_data.json 내용 검증 → (persona, 파일 순서의 대사 목록, 어조별 대사 dict)"""
+    if not isinstance(data, dict):
+        raise PersonaError('최상위 값은 객체여야 합니다')
+    persona = data.get('persona')
+    if not isinstance(persona, str) or not persona.strip():
+        raise PersonaError('persona 가 비어 있습니다')
+
+    raw = data.get('samples')
+    samples = []
+    by_tone = {tone: [] for tone in TONES}
+    if isinstance(raw, dict):
+        for tone, items in raw.items():
+            if tone not in by_tone:
+                raise PersonaError(f'알 수 없는 어조: {tone}')
+            items = _clean_samples(items)
+            samples.extend(items)
+            by_tone[tone].extend(items)
+    else:
+        samples = _clean_samples(raw)
+        for sample in samples:
+            by_tone[classify_tone(sample)].append(sample)
+
+    if not samples:
+        raise PersonaError('samples 가 비어 있습니다')
+    return persona.strip(), samples, by_tone
+
+
+class PersonaSnapshot:
+    """한 시점의 페르소나 데이터 - 만든 뒤에는 바꾸지 않음 (다시 읽으면 새 스냅샷으로 교체)
+
+    요청은 시작할 때 스냅샷 하나를 잡고 끝까지 그것만 쓰므로, 처리 도중 파일이 바뀌어도
+    프롬프트/샘플이 섞이지 않음
+    """
+
+    __slots__ = ('persona', 'samples', 'by_tone', 'version', 'loaded_at', 'source', '_templates')
+
+    def __init__(self, persona: str, samples: list, by_tone: dict, version: int = 0, source: str = 'default'):
+        self.persona = persona
+        self.samples = tuple(samples)
+        self.by_tone = MappingProxyType({tone: tuple(items) for tone, items in by_tone.items()})
+        self.version = version
+        self.loaded_at = time.time()
+        self.source = source
+        self._templates = None
+
+    @classmethod
+    def default(cls) -> 'PersonaSnapshot':
+        return cls(DEFAULT_PERSONA, DEFAULT_SAMPLES, {'neutral': DEFAULT_SAMPLES})
+
+    @property
+    def templates(self) -> PromptTemplates:
+        """이 스냅샷 기준으로 컴파일한 프롬프트 (처음 쓸 때 한 번만)"""
+        if self._templates is None:
+            self._templates = PromptTemplates({'persona': self.persona, 'samples': list(self.samples)})
+        return self._templates
+
+    def samples_for(self, success_level: str | None = None) -> tuple:
+        """판정에 맞는 어조의 대사 (해당 어조가 없으면 전체)"""
+        return self.by_tone.get(LEVEL_TONES.get(success_level, 'neutral')) or self.samples
+
+    def sample(self, k: int, success_level: str | None = None) -> list:
+        """대사 k 개 무작위 선택 (미리 나눠 둔 튜플에서 뽑으므로 O(k))"""
+        pool = self.samples_for(success_level) if success_level else self.samples
+        return random.sample(pool, min(k, len(pool)))
+
+    def summary(self) -> dict:
+        return {
+            'version': self.version,
+            'source': self.source,
+            'loaded_at': self.loaded_at,
+            'samples': {tone: len(items) for tone, items in self.by_tone.items()},
+        }
+
+
+class PersonaStore:
+    """brown_data.json 을 감시해 재시작 없이 페르소나/샘플을 교체
+
+    - 파일의 (수정 시각, 크기)를 PERSONA_RELOAD_INTERVAL 초마다 확인 (0 이면 감시 안 함)
+    - 바뀌었으면 읽고 검증한 뒤 새 스냅샷으로 통째로 교체, 검증에 실패하면 기존 스냅샷 유지
+    - 첫 스냅샷은 처음 접근할 때 읽음 (시작 시간 단축)
+    """
+
+    def __init__(self, path: str, interval: float | None = None):
+        self.path = path
+        self.interval = interval if interval is not None else float(os.getenv('PERSONA_RELOAD_INTERVAL', '5'))
+        self._snapshot: PersonaSnapshot | None = None
+        self._signature = None
+        self._version = 0
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self.reloads = 0
+        self.reload_failures = 0
+        self.last_error: str | None = None
+
+    @property
+    def snapshot(self) -> PersonaSnapshot:
+        if self._snapshot is None:
+            try:
+                self._snapshot = self._read()
+            except FileNotFoundError:
+                logger.warning(f"⚠️ '{self.path}' 파일을 찾을 수 없습니다. 기본 페르소나로 동작합니다.")
+                self._snapshot = PersonaSnapshot.default()
+            except Exception as e:
+                logger.error(f"❌ 페르소나 데이터 로드 중 오류: {e}")
+                self.last_error = str(e)
+                self._snapshot = PersonaSnapshot.default()
+                try:
+                    self._signature = self._stat()
+                except OSError:
+                    pass
+        return self._snapshot
+
+    def _stat(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self) -> PersonaSnapshot:
+        """파일을 읽고 검증해 새 스냅샷 생성 (교체는 호출 측에서)"""
+        signature = self._stat()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            persona, samples, by_tone = parse_persona(json.load(f))
+        self._version += 1
+        snapshot = PersonaSnapshot(persona, samples, by_tone, self._version, self.path)
+        # 다음 요청이 컴파일 비용을 떠안지 않도록 교체 전에 미리 컴파일
+        snapshot.templates
+        self._signature = signature
+        logger.info(f"✓ 페르소나 데이터 로드 완료 (v{snapshot.version}): "
+                    + ', '.join(f'{tone} {n}개' for tone, n in snapshot.summary()['samples'].items()))
+        return snapshot
+
+    async def reload(self, force: bool = False) -> bool:
+        """파일이 바뀌었으면(force 면 무조건) 다시 읽어 교체 - 교체했으면 True"""
+        async with self._lock:
+            try:
+                if not force and self._signature is not None and self._stat() == self._signature:
+                    return False
+                snapshot = await asyncio.to_thread(self._read)
+            except FileNotFoundError:
+                if force:
+                    self.reload_failures += 1
+                    self.last_error = '파일 없음'
+                    logger.warning(f"⚠️ 페르소나 다시 읽기 실패: '{self.path}' 없음 - 기존 데이터 유지")
+                return False
+            except Exception as e:
+                self.reload_failures += 1
+                self.last_error = str(e)
+                # 같은 잘못된 파일을 매 주기마다 다시 읽지 않도록 서명은 기록
+                try:
+                    self._signature = self._stat()
+                except OSError:
+                    pass
+                logger.warning(f"⚠️ 페르소나 다시 읽기 실패 - 기존 데이터 유지: {e}")
+                return False
+
+            self._snapshot = snapshot
+            self.reloads += 1
+            self.last_error = None
+            return True
+
+    def start(self):
+        """파일 감시 작업 시작"""
+        if self.interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            # 아직 한 번도 쓰지 않았으면 첫 접근 때 읽으므로 건너뜀
+            if self._snapshot is not None:
+                await self.reload()
+
+    def stats(self) -> dict:
+        return {
+            **(self._snapshot.summary() if self._snapshot is not None else {'version': 0}),
+            'reloads': self.reloads,
+            'reload_failures': self.reload_failures,
+            'last_error': self.last_error,
+        }
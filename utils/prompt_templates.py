@@ -0,0 +1,132 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 판정에 따른 지시사항 (참가자 이름/점수는 동적 부분에서 전달하므로 정적 문구만 사용)
+JUDGMENT_INSTRUCTIONS = {
+    'critical_success': """위의 샘플 대사들처럼 브라운의 말투로 참가자가 대성공(20점 이상)을 거두었을 때 축하하고 극적으로 표현.
+규칙:
+- 반드시 [대사] 형식으로 작성
+- 운명, 기적, 이상적인 결과 등을 주제로
+- 대단합니다, 놀랍습니다, 정답입니다 등의 샘플 말투 사용
+- 1-3줄의 자연스러운 한국어 대사
+- 점수를 언급해도 좋고 안 해도 됨""",
+
+    'success': """위의 샘플 대사들처럼 브라운의 말투로 참가자가 성공을 거두었을 때 축하하고 격려.
+규칙:
+- 반드시 [대사] 형식으로 작성
+- 당신의 의지, 흐름과의 일치, 신비로운 운 등을 언급
+- 좋습니다, 성공, 흥미롭습니다 등의 샘플 말투 사용
+- 1-3줄의 자연스러운 한국어 대사
+- 점수를 언급해도 좋고 안 해도 됨""",
+
+    'failure': """위의 샘플 대사들처럼 브라운의 말투로 참가자가 실패했을 때 아쉽지만 따뜻하게 표현.
+규칙:
+- 반드시 [대사] 형식으로 작성
+- 아쉬움, 다음 기회, 운의 거부 등을 언급
+- 아, 이런, 아니 아니, 갈등하는군요 등의 샘플 말투 사용
+- 1-3줄의 자연스러운 한국어 대사
+- 점수를 언급해도 좋고 안 해도 됨""",
+
+    'critical_failure': """위의 샘플 대사들처럼 브라운의 말투로 참가자가 대실패(1점)을 거두었을 때 극적으로 표현해주세요.
+규칙:
+- 반드시 [대사] 형식으로 작성
+- 끔찍한 운명, 고통, 절망 등을 언급
+- 맙소사, 아니 아니, 이럴 수가, 호 등의 샘플 말투 사용
+- 1-3줄의 자연스러운 한국어 대사
+- 점수(1)를 꼭 언급해주세요""",
+
+    'impossible': """위의 샘플 대사들처럼 브라운의 말투로 참가자가 존재하지 않는 확률(0면체 등)을 굴리려 했을 때 경고해주세요.
+규칙:
+- 반드시 [대사] 형식으로 작성
+- 공허, 심연, 존재하지 않는 것, 시스템의 오류 등을 언급하며 으스스하게 표현
+- "이보세요", "......", "호", "재미있는 시도군요" 등의 샘플 말투 사용
+- 1-3줄의 자연스러운 한국어 대사
+- 사용자를 나무라거나, 그 너머의 무언가를 본 듯한 반응""",
+}
+
+_MESSAGE_ONLY = "메시지만 제공하세요. 다른 설명은 제외하세요."
+
+_JSON_ARRAY_RULES = """- 반드시 JSON 문자열 배열 하나만 출력 (예: ["[대사1]", "[대사2]"])
+- 배열 외의 설명, 코드 블록, 인용 번호는 붙이지 마세요."""
+
+
+def get_judgment_instruction(success_level: str) -> str:
+    """판정 단계별 지시사항 (알 수 없는 단계는 success 로 취급)"""
+    return JUDGMENT_INSTRUCTIONS.get(success_level, JUDGMENT_INSTRUCTIONS['success'])
+
+
+class PromptTemplates:
+    """brown_data.json 기반 브라운 프롬프트 - 첫 사용 시 1회 컴파일
+
+    페르소나 + 샘플 대사 + 판정별 지시사항은 판정 단계마다 고정된 system 메시지로 미리 만들어 두고,
+    호출마다 바뀌는 참가자/주사위 정보만 짧은 user 메시지로 렌더링합니다.
+    system 메시지가 매번 바이트 단위로 동일하므로 제공자 측 프롬프트 캐싱이 적용될 수 있습니다.
+    """
+
+    def __init__(self, brown_data: dict):
+        persona = brown_data.get('persona', '당신은 TV 쇼 진행자 브라운입니다.')
+        samples = brown_data.get('samples', [])
+        base = f"{persona}\n\n### 인물의 샘플 대사\n" + "\n".join(samples)
+
+        # 단건 생성 / 템플릿 생성용: 판정 단계별 system 메시지
+        self.level_prefixes = {
+            level: f"{base}\n\n### 지시사항\n{instruction}\n{_MESSAGE_ONLY}"
+            for level, instruction in JUDGMENT_INSTRUCTIONS.items()
+        }
+
+        # 일괄 생성용: 모든 판정 지시사항을 포함한 단일 system 메시지
+        all_instructions = "\n\n".join(
+            f"[{level}]\n{instruction}" for level, instruction in JUDGMENT_INSTRUCTIONS.items()
+        )
+        self.batch_prefix = f"{base}\n\n### 판정별 지시사항\n{all_instructions}"
+
+        logger.info(f"✓ 프롬프트 템플릿 컴파일 완료: 판정 {len(self.level_prefixes)}종, 샘플 {len(samples)}개")
+
+    def _level_prefix(self, success_level: str) -> str:
+        return self.level_prefixes.get(success_level, self.level_prefixes['success'])
+
+    def brown_messages(self, dice_result: dict) -> list:
+        """단건 대사 생성용 messages"""
+        suffix = (
+            "### 현재 상황\n"
+            f"참가자: {dice_result.get('username', '참가자')}\n"
+            f"주사위 결과: {dice_result.get('notation', '')} = {dice_result.get('total', 0)}점\n"
+            f"판정: {dice_result.get('success_level', 'success')}"
+        )
+        return [
+            {'role': 'system', 'content': self._level_prefix(dice_result.get('success_level', 'success'))},
+            {'role': 'user', 'content': suffix},
+        ]
+
+    def batch_messages(self, dice_results: list) -> list:
+        """여러 굴림 일괄 생성용 messages (JSON 배열 응답 요청)"""
+        rolls_str = "\n".join(
+            f"{i + 1}. 참가자: {r.get('username', '참가자')} / "
+            f"주사위 결과: {r.get('notation', '')} = {r.get('total', 0)}점 / "
+            f"판정: {r.get('success_level', 'success')}"
+            for i, r in enumerate(dice_results)
+        )
+        suffix = (
+            f"### 현재 상황 (굴림 {len(dice_results)}개)\n{rolls_str}\n\n"
+            "### 출력 형식\n"
+            f"- 굴림마다 해당 판정의 지시사항을 따른 브라운의 대사 하나씩, 순서대로 총 {len(dice_results)}개\n"
+            f"{_JSON_ARRAY_RULES}"
+        )
+        return [
+            {'role': 'system', 'content': self.batch_prefix},
+            {'role': 'user', 'content': suffix},
+        ]
+
+    def template_messages(self, success_level: str, count: int) -> list:
+        """대사 풀 보충용 messages ({username}, {total}, {notation} 자리표시자 사용)"""
+        suffix = (
+            "### 출력 형식\n"
+            f"- 서로 다른 브라운의 대사 {count}개\n"
+            "- 참가자 이름은 {username}, 점수는 {total}, 주사위 표기는 {notation} 그대로 적을 것 (다른 중괄호는 쓰지 말 것)\n"
+            f"{_JSON_ARRAY_RULES}"
+        )
+        return [
+            {'role': 'system', 'content': self._level_prefix(success_level)},
+            {'role': 'user', 'content': suffix},
+        ]
@@ -0,0 +1,165 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def _env_rate(name: str, default_rate: str, default_burst: str) -> tuple:
+    """(초당 토큰, 최대 토큰) 환경 변수 읽기"""
+    return (
+        float(os.getenv(f'RATE_LIMIT_{name}_RATE', default_rate)),
+        float(os.getenv(f'RATE_LIMIT_{name}_BURST', default_burst)),
+    )
+
+
+class TokenBucket:
+    """토큰 버킷 하나 - 마지막 확인 시각 기준으로 게으르게 충전"""
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class BucketGroup:
+    """같은 설정을 공유하는 키별 버킷 묶음 (LRU 로 개수 제한, 유휴 버킷 제거)"""
+
+    def __init__(self, rate: float, burst: float, max_buckets: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_buckets = max_buckets
+        # 이 시간 이상 쓰이지 않은 버킷은 가득 찬 상태와 같으므로 지워도 됨
+        self.idle_after = burst / rate if rate > 0 else float('inf')
+        self.buckets: OrderedDict = OrderedDict()
+        self.rejections = 0
+
+    def _refill(self, key, now: float) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.burst, now)
+            self.buckets[key] = bucket
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+            self.buckets.move_to_end(key)
+        return bucket
+
+    def check(self, key, now: float) -> TokenBucket | None:
+        """토큰이 있으면 버킷 반환 (아직 차감하지 않음), 없으면 None"""
+        bucket = self._refill(key, now)
+        if bucket.tokens < 1:
+            self.rejections += 1
+            return None
+        return bucket
+
+    def peek(self, key, now: float) -> bool:
+        """토큰이 있는지만 확인 (충전/차감/거절 집계 없음)"""
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return self.burst >= 1
+        return min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate) >= 1
+
+    def evict(self, now: float):
+        """가장 오래된 쪽부터 유휴 버킷과 상한 초과분 제거 (호출당 상수 개수만 확인)"""
+        for _ in range(2):
+            if not self.buckets:
+                return
+            key, bucket = next(iter(self.buckets.items()))
+            if len(self.buckets) > self.max_buckets or now - bucket.updated >= self.idle_after:
+                del self.buckets[key]
+            else:
+                return
+
+
+class Permit:
+    """메시지 하나의 LLM 호출 허가 - LLM 을 부르기 직전에 bool 로 평가 (평가할 때마다 토큰 1개)
+
+    굴림/묶음마다 토큰을 따로 쓰고, 한 번 거절되면 같은 메시지의 나머지 호출도 모두 거절
+    (메시지 도중 충전된 토큰으로 일부만 다시 API 를 부르지 않도록). 대사 풀/운세 캐시로 끝나는
+    요청은 평가되지 않으므로 토큰을 쓰지 않음
+    """
+    __slots__ = ('_limiter', '_user_id', '_guild_id', '_denied', 'granted')
+
+    def __init__(self, limiter: 'RateLimiter', user_id: int, guild_id: int | None):
+        self._limiter = limiter
+        self._user_id = user_id
+        self._guild_id = guild_id
+        self._denied = False
+        self.granted = 0
+
+    def __bool__(self) -> bool:
+        if self._denied:
+            return False
+        if not self._limiter.acquire(self._user_id, self._guild_id):
+            self._denied = True
+            return False
+        self.granted += 1
+        return True
+
+
+class RateLimiter:
+    """사용자별 / 서버별 / 전역 토큰 버킷 - LLM 호출 전에 확인
+
+    세 버킷 모두 토큰이 있을 때만 하나씩 차감합니다. 확인은 O(1) 이고,
+    버킷 수는 RATE_LIMIT_MAX_BUCKETS 로 제한되며 유휴 버킷은 점진적으로 제거됩니다.
+
+    버킷은 프로세스마다 따로 있습니다. supervisor.py 로 여러 프로세스를 띄우면(WORKER_COUNT)
+    전역 한도를 프로세스 수로 나눠 합계가 설정값을 넘지 않게 합니다. 서버는 한 샤드(프로세스)에만
+    속하므로 서버별 한도는 그대로이고, 사용자별 한도는 사용자가 속한 서버들의 프로세스마다 따로 적용됩니다.
+    """
+
+    def __init__(self):
+        max_buckets = int(os.getenv('RATE_LIMIT_MAX_BUCKETS', '10000'))
+        self.enabled = os.getenv('RATE_LIMIT', '1') == '1'
+        workers = max(1, int(os.getenv('WORKER_COUNT', '1')))
+        global_rate, global_burst = _env_rate('GLOBAL', '10', '60')
+        self.groups = {
+            'user': BucketGroup(*_env_rate('USER', '0.2', '5'), max_buckets),
+            'guild': BucketGroup(*_env_rate('GUILD', '2', '30'), max_buckets),
+            'global': BucketGroup(global_rate / workers, max(1.0, global_burst / workers), 1),
+        }
+
+    def acquire(self, user_id: int, guild_id: int | None = None) -> bool:
+        """LLM 호출 1회 허용 여부 (허용 시 토큰 차감)"""
+        if not self.enabled:
+            return True
+
+        now = time.monotonic()
+        for group in self.groups.values():
+            group.evict(now)
+
+        keys = (('user', user_id), ('guild', guild_id), ('global', None))
+        allowed = []
+        for scope, key in keys:
+            if scope == 'guild' and key is None:
+                continue
+            bucket = self.groups[scope].check(key, now)
+            if bucket is None:
+                return False
+            allowed.append(bucket)
+
+        for bucket in allowed:
+            bucket.tokens -= 1
+        return True
+
+    def permit(self, user_id: int, guild_id: int | None = None) -> Permit:
+        """실제로 LLM 을 부를 때마다 토큰을 쓰는 지연 허가"""
+        return Permit(self, user_id, guild_id)
+
+    def available(self, user_id: int, guild_id: int | None = None) -> bool:
+        """지금 acquire 하면 허용될지 (차감 없음 - 타이핑 표시 여부 등에 사용)"""
+        if not self.enabled:
+            return True
+        now = time.monotonic()
+        return (self.groups['user'].peek(user_id, now)
+                and (guild_id is None or self.groups['guild'].peek(guild_id, now))
+                and self.groups['global'].peek(None, now))
+
+    def stats(self) -> dict:
+        """버킷 수 및 범위별 거절 횟수"""
+        return {
+            scope: {'buckets': len(group.buckets), 'rejections': group.rejections}
+            for scope, group in self.groups.items()
+        }
@@ -0,0 +1,364 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rolls (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    guild_id INTEGER,
+    channel_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    session_id INTEGER NOT NULL,
+    notation TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    expected REAL,
+    success_level TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rolls_guild_user_ts ON rolls (guild_id, user_id, ts);
+CREATE INDEX IF NOT EXISTS rolls_user_ts ON rolls (user_id, ts);
+CREATE INDEX IF NOT EXISTS rolls_guild_ts ON rolls (guild_id, ts);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER,
+    channel_id INTEGER NOT NULL,
+    started REAL NOT NULL,
+    last_roll REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_channel ON sessions (channel_id, last_roll);
+
+-- 굴림마다 갱신하는 집계 (조회는 기본 키 한 번, 전체 스캔 없음)
+-- scope: 'guild' (scope_id = 서버 ID, DM 은 0) / 'session' (scope_id = sessions.id)
+CREATE TABLE IF NOT EXISTS roll_stats (
+    scope TEXT NOT NULL,
+    scope_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    rolls INTEGER NOT NULL,
+    crits INTEGER NOT NULL,
+    fumbles INTEGER NOT NULL,
+    successes INTEGER NOT NULL,
+    sum_total INTEGER NOT NULL,
+    expected_rolls INTEGER NOT NULL,
+    sum_total_expected INTEGER NOT NULL,
+    sum_expected REAL NOT NULL,
+    streak_kind TEXT,
+    streak INTEGER NOT NULL,
+    best_streak INTEGER NOT NULL,
+    worst_streak INTEGER NOT NULL,
+    PRIMARY KEY (scope, scope_id, user_id)
+) WITHOUT ROWID;
+"""
+
+STATS_COLUMNS = (
+    'rolls', 'crits', 'fumbles', 'successes', 'sum_total', 'expected_rolls',
+    'sum_total_expected', 'sum_expected', 'streak_kind', 'streak', 'best_streak', 'worst_streak',
+)
+
+SUCCESS = ('success', 'critical_success')
+
+
+def _empty_stats() -> dict:
+    stats = dict.fromkeys(STATS_COLUMNS, 0)
+    stats['sum_expected'] = 0.0
+    stats['streak_kind'] = None
+    return stats
+
+
+def apply_roll(stats: dict, total: int, expected: float | None, success_level: str):
+    """집계 한 줄에 굴림 하나 반영 (연속 성공/실패 포함)"""
+    stats['rolls'] += 1
+    stats['sum_total'] += total
+    stats['crits'] += success_level == 'critical_success'
+    stats['fumbles'] += success_level == 'critical_failure'
+    if expected is not None:
+        stats['expected_rolls'] += 1
+        stats['sum_total_expected'] += total
+        stats['sum_expected'] += expected
+
+    kind = 'success' if success_level in SUCCESS else 'failure'
+    stats['successes'] += kind == 'success'
+    if stats['streak_kind'] == kind:
+        stats['streak'] += 1
+    else:
+        stats['streak_kind'], stats['streak'] = kind, 1
+    key = 'best_streak' if kind == 'success' else 'worst_streak'
+    stats[key] = max(stats[key], stats['streak'])
+
+
+def summarize(stats: dict) -> dict:
+    """표시용 파생 값 (대성공률, 평균 vs 기댓값)"""
+    rolls = stats['rolls']
+    expected_rolls = stats['expected_rolls']
+    return {
+        **stats,
+        'crit_rate': stats['crits'] / rolls if rolls else 0.0,
+        'fumble_rate': stats['fumbles'] / rolls if rolls else 0.0,
+        'success_rate': stats['successes'] / rolls if rolls else 0.0,
+        'average': stats['sum_total'] / rolls if rolls else 0.0,
+        'average_vs_expected': (
+            (stats['sum_total_expected'] - stats['sum_expected']) / expected_rolls if expected_rolls else None
+        ),
+    }
+
+
+class ChannelSession:
+    """채널별 현재 세션 캐시 항목 (기록 스레드 전용)"""
+    __slots__ = ('id', 'last_roll')
+
+    def __init__(self, session_id: int, last_roll: float):
+        self.id = session_id
+        self.last_roll = last_roll
+
+
+class RollHistory:
+    """SQLite 굴림 기록 - 추가 전용 로그 + 점진적으로 갱신하는 사용자/세션 집계
+
+    - record() 는 메모리 큐에 넣기만 함 (메시지 처리 경로는 디스크를 기다리지 않음)
+    - 백그라운드 작업이 모인 굴림을 한 트랜잭션으로 기록 (전용 스레드 1개에서 실행)
+    - 세션: 같은 채널에서 ROLL_SESSION_GAP 초 넘게 굴림이 없으면 새 세션
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path if path is not None else os.getenv('ROLL_HISTORY_PATH', 'data/roll_history.sqlite3')
+        self.batch_size = int(os.getenv('ROLL_HISTORY_BATCH', '200'))
+        self.flush_interval = float(os.getenv('ROLL_HISTORY_FLUSH', '1'))
+        self.max_pending = int(os.getenv('ROLL_HISTORY_QUEUE', '10000'))
+        # 같은 배치의 기록이 연달아 이 횟수만큼 실패하면 버림 (그 전까지는 대기열 맨 앞으로 되돌림)
+        self.max_retries = int(os.getenv('ROLL_HISTORY_RETRIES', '5'))
+        self.session_gap = float(os.getenv('ROLL_SESSION_GAP', str(3 * 60 * 60)))
+        # 메모리에 들고 있는 채널 세션 수 상한 (넘치면 오래된 채널부터 버리고 필요할 때 DB 에서 다시 읽음)
+        self.session_cache_size = int(os.getenv('ROLL_SESSION_CACHE', '10000'))
+
+        self._pending: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='roll-history')
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._conn: sqlite3.Connection | None = None
+        self._sessions: OrderedDict = OrderedDict()  # channel_id -> ChannelSession (기록 스레드 전용, LRU)
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.write_failures = 0
+        self._failed_attempts = 0
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def start(self):
+        """DB 열기 + 백그라운드 기록 작업 시작 (열지 못하면 기록 없이 동작)"""
+        try:
+            await self._run(self._open)
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"❌ 굴림 기록 저장소를 열 수 없습니다 ({self.path}): {e!r}")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._writer_loop())
+        logger.info(f"✓ 굴림 기록 저장소: {self.path}")
+
+    async def close(self):
+        """남은 굴림을 모두 기록하고 종료"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            await self.flush()
+            if self._pending:
+                # 마지막 기록도 실패 - 종료하면 사라지므로 버린 것으로 집계
+                self.dropped += len(self._pending)
+                logger.error(f"굴림 기록 {len(self._pending)}개를 저장하지 못하고 종료합니다")
+                self._pending.clear()
+            await self._run(self._conn.close)
+            self._conn = None
+        await asyncio.to_thread(self._executor.shutdown, True)
+
+    def record(self, guild_id: int | None, channel_id: int, user_id: int, notation: str,
+               total: int, expected: float | None, success_level: str):
+        """굴림 하나를 기록 대기열에 추가 (대기열이 가득 차면 버림)"""
+        if self._conn is None:
+            return
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append((time.time(), guild_id, channel_id, user_id, notation, total, expected, success_level))
+        self.recorded += 1
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _writer_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"굴림 기록 실패: {e!r}")
+
+    async def flush(self):
+        """대기 중인 굴림을 배치 단위로 기록
+
+        기록이 실패하면(DB 잠김, 디스크 오류 등) 배치를 대기열 맨 앞으로 되돌리고 이번 flush 는 멈춤
+        (다음 주기에 재시도). max_retries 번 연달아 실패한 배치는 버리고 dropped 에 집계
+        """
+        async with self._lock:
+            while self._pending and self._conn is not None:
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                try:
+                    await self._run(self._write_batch, batch)
+                except Exception as e:
+                    self.write_failures += 1
+                    self._failed_attempts += 1
+                    if self._failed_attempts >= self.max_retries:
+                        self._failed_attempts = 0
+                        self.dropped += len(batch)
+                        logger.error(f"굴림 기록 {self.max_retries}회 연속 실패 - {len(batch)}개 버림: {e!r}")
+                    else:
+                        self._pending.extendleft(reversed(batch))
+                        logger.warning(f"굴림 기록 실패 ({self._failed_attempts}/{self.max_retries}) - "
+                                       f"다음 주기에 재시도: {e!r}")
+                    return
+                self._failed_attempts = 0
+                self.written += len(batch)
+                self.batches += 1
+
+    # 아래는 기록 스레드에서만 실행
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        self._conn = conn
+
+    def _session_for(self, guild_id, channel_id: int, ts: float) -> int:
+        session = self._sessions.get(channel_id)
+        if session is None:
+            row = self._conn.execute(
+                'SELECT id, last_roll FROM sessions WHERE channel_id = ? ORDER BY last_roll DESC LIMIT 1',
+                (channel_id,)
+            ).fetchone()
+            session = ChannelSession(*row) if row else None
+        else:
+            self._sessions.move_to_end(channel_id)
+        if session is None or ts - session.last_roll > self.session_gap:
+            cursor = self._conn.execute(
+                'INSERT INTO sessions (guild_id, channel_id, started, last_roll) VALUES (?, ?, ?, ?)',
+                (guild_id, channel_id, ts, ts)
+            )
+            session = ChannelSession(cursor.lastrowid, ts)
+        session.last_roll = ts
+        self._sessions[channel_id] = session
+        while len(self._sessions) > self.session_cache_size:
+            self._sessions.popitem(last=False)
+        return session.id
+
+    def _load_stats(self, key: tuple) -> dict:
+        row = self._conn.execute(
+            f'SELECT {", ".join(STATS_COLUMNS)} FROM roll_stats WHERE scope = ? AND scope_id = ? AND user_id = ?',
+            key
+        ).fetchone()
+        return dict(zip(STATS_COLUMNS, row)) if row else _empty_stats()
+
+    def _write_batch(self, batch: list):
+        try:
+            self._write_rows(batch)
+        except Exception:
+            # 롤백된 세션 ID 가 캐시에 남지 않도록 비움
+            self._sessions.clear()
+            raise
+
+    def _write_rows(self, batch: list):
+        with self._conn:
+            rows = []
+            touched_sessions = {}
+            aggregates = {}
+            for ts, guild_id, channel_id, user_id, notation, total, expected, level in batch:
+                session_id = self._session_for(guild_id, channel_id, ts)
+                touched_sessions[session_id] = ts
+                rows.append((ts, guild_id, channel_id, user_id, session_id, notation, total, expected, level))
+                for key in (('guild', guild_id or 0, user_id), ('session', session_id, user_id)):
+                    stats = aggregates.get(key)
+                    if stats is None:
+                        stats = aggregates[key] = self._load_stats(key)
+                    apply_roll(stats, total, expected, level)
+
+            self._conn.executemany(
+                'INSERT INTO rolls (ts, guild_id, channel_id, user_id, session_id, notation, total, expected, '
+                'success_level) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._conn.executemany(
+                'UPDATE sessions SET last_roll = ? WHERE id = ?',
+                [(ts, session_id) for session_id, ts in touched_sessions.items()]
+            )
+            self._conn.executemany(
+                f'INSERT OR REPLACE INTO roll_stats (scope, scope_id, user_id, {", ".join(STATS_COLUMNS)}) '
+                f'VALUES (?, ?, ?, {", ".join("?" * len(STATS_COLUMNS))})',
+                [key + tuple(stats[c] for c in STATS_COLUMNS) for key, stats in aggregates.items()]
+            )
+
+    def _read_user_stats(self, guild_id, user_id: int) -> dict | None:
+        row = self._conn.execute(
+            f'SELECT {", ".join(STATS_COLUMNS)} FROM roll_stats WHERE scope = ? AND scope_id = ? AND user_id = ?',
+            ('guild', guild_id or 0, user_id)
+        ).fetchone()
+        return summarize(dict(zip(STATS_COLUMNS, row))) if row else None
+
+    def _read_session_stats(self, channel_id: int, limit: int) -> dict | None:
+        session = self._conn.execute(
+            'SELECT id, started, last_roll FROM sessions WHERE channel_id = ? ORDER BY last_roll DESC LIMIT 1',
+            (channel_id,)
+        ).fetchone()
+        if session is None or time.time() - session[2] > self.session_gap:
+            return None
+        users = self._conn.execute(
+            f'SELECT user_id, {", ".join(STATS_COLUMNS)} FROM roll_stats '
+            'WHERE scope = ? AND scope_id = ? ORDER BY rolls DESC LIMIT ?',
+            ('session', session[0], limit)
+        ).fetchall()
+        return {
+            'session_id': session[0],
+            'started': session[1],
+            'last_roll': session[2],
+            'users': [(row[0], summarize(dict(zip(STATS_COLUMNS, row[1:])))) for row in users],
+        }
+
+    # 조회 (대기 중인 굴림까지 반영한 뒤 기본 키/인덱스로 읽음)
+
+    async def user_stats(self, guild_id: int | None, user_id: int) -> dict | None:
+        await self.flush()
+        return await self._run(self._read_user_stats, guild_id, user_id)
+
+    async def session_stats(self, channel_id: int, limit: int = 10) -> dict | None:
+        await self.flush()
+        return await self._run(self._read_session_stats, channel_id, limit)
+
+    def stats(self) -> dict:
+        return {
+            'recorded': self.recorded,
+            'written': self.written,
+            'pending': len(self._pending),
+            'sessions_cached': len(self._sessions),
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'write_failures': self.write_failures,
+        }
@@ -0,0 +1,119 @@
+import argparse
+import os
+import re
+
+# 지표 한 줄: 이름{라벨} 값
+_SAMPLE_PATTERN = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(.+)$')
+# 히스토그램/요약 계열의 하위 지표 접미사
+_FAMILY_SUFFIXES = ('_bucket', '_sum', '_count')
+
+
+def parse_shard_ids(text: str) -> list:
+    """'0-3,8,10-11' → [0, 1, 2, 3, 8, 10, 11]"""
+    ids = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = (int(x) for x in part.split('-', 1))
+            ids.extend(range(start, end + 1))
+        else:
+            ids.append(int(part))
+    return sorted(set(ids))
+
+
+def format_shard_ids(ids: list) -> str:
+    """parse_shard_ids 의 역 - 연속 구간은 a-b 로"""
+    ranges = []
+    for shard_id in sorted(ids):
+        if ranges and ranges[-1][1] == shard_id - 1:
+            ranges[-1][1] = shard_id
+        else:
+            ranges.append([shard_id, shard_id])
+    return ','.join(str(a) if a == b else f'{a}-{b}' for a, b in ranges)
+
+
+def split_shards(shard_count: int, processes: int) -> list:
+    """샤드 0..shard_count-1 을 프로세스 수만큼 연속 구간으로 고르게 나눔 (빈 구간 없음)"""
+    processes = max(1, min(processes, shard_count))
+    base, extra = divmod(shard_count, processes)
+    groups = []
+    start = 0
+    for i in range(processes):
+        size = base + (1 if i < extra else 0)
+        groups.append(list(range(start, start + size)))
+        start += size
+    return groups
+
+
+def shard_config(argv: list | None = None) -> tuple:
+    """(shard_count, shard_ids) - CLI(--shard-count, --shard-ids)가 환경 변수(SHARD_COUNT, SHARD_IDS)보다 우선
+
+    - 둘 다 없으면 (None, None): 샤딩 없는 단일 Bot
+    - shard_count 가 'auto' 면 ('auto', None): 디스코드 권장 샤드 수로 AutoShardedBot
+    - shard_ids 를 주면 shard_count 도 필요 (다중 프로세스에서 이 프로세스가 맡을 구간)
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--shard-count', default=os.getenv('SHARD_COUNT', ''))
+    parser.add_argument('--shard-ids', default=os.getenv('SHARD_IDS', ''))
+    args, _ = parser.parse_known_args(argv)
+
+    count = args.shard_count.strip().lower()
+    ids = parse_shard_ids(args.shard_ids) if args.shard_ids.strip() else None
+    if not count:
+        if ids is not None:
+            raise ValueError('SHARD_IDS 를 쓰려면 SHARD_COUNT 도 지정해야 합니다')
+        return None, None
+    if count == 'auto':
+        if ids is not None:
+            raise ValueError('SHARD_IDS 를 쓰려면 SHARD_COUNT 를 숫자로 지정해야 합니다')
+        return 'auto', None
+
+    count = int(count)
+    if ids is not None and (ids[0] < 0 or ids[-1] >= count):
+        raise ValueError(f'SHARD_IDS 는 0 ~ {count - 1} 범위여야 합니다')
+    return count, ids
+
+
+def _family_name(name: str, families: dict) -> str:
+    for suffix in _FAMILY_SUFFIXES:
+        if name.endswith(suffix) and name[:-len(suffix)] in families:
+            return name[:-len(suffix)]
+    return name
+
+
+def merge_metrics(texts: dict, label: str = 'worker') -> str:
+    """여러 프로세스의 /metrics 본문을 하나로 합침 (각 표본에 label="키" 추가)
+
+    Prometheus 텍스트 형식은 같은 이름의 표본이 한 HELP/TYPE 아래 모여 있어야 하므로
+    계열별로 모아서 다시 씀
+    """
+    families = {}  # 이름 -> {'help', 'type', 'samples'}
+    for key, text in texts.items():
+        current = None
+        for line in text.splitlines():
+            if line.startswith('# HELP ') or line.startswith('# TYPE '):
+                _, kind, name, *rest = line.split(' ', 3)
+                family = families.setdefault(name, {'help': None, 'type': None, 'samples': []})
+                family['help' if kind == 'HELP' else 'type'] = rest[0] if rest else ''
+                current = name
+                continue
+            match = _SAMPLE_PATTERN.match(line)
+            if match is None:
+                continue
+            name, labels, value = match.groups()
+            extra = f'{label}="{key}"'
+            labels = f'{{{extra},{labels[1:]}' if labels and labels != '{}' else f'{{{extra}}}'
+            family_name = current if current and name.startswith(current) else _family_name(name, families)
+            families.setdefault(family_name, {'help': None, 'type': None, 'samples': []})
+            families[family_name]['samples'].append(f'{name}{labels} {value}')
+
+    lines = []
+    for name, family in families.items():
+        if family['help'] is not None:
+            lines.append(f'# HELP {name} {family["help"]}')
+        if family['type'] is not None:
+            lines.append(f'# TYPE {name} {family["type"]}')
+        lines.extend(family['samples'])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,45 @@
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """시작 단계별 소요 시간 기록 (--profile-startup 이면 준비 완료 시 표로 출력)
+
+    - phase(name): with 블록의 시작 시점과 소요 시간 (동시에 진행되는 단계는 겹쳐 보임)
+    - mark(name): 프로세스 시작 이후 특정 시점
+    """
+
+    def __init__(self, origin: float | None = None, enabled: bool = False):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.enabled = enabled
+        self.phases = []  # (이름, 시작 오프셋, 소요 시간)
+        self.reported = False
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, started - self.origin, time.perf_counter() - started))
+
+    def mark(self, name: str):
+        now = time.perf_counter() - self.origin
+        self.phases.append((name, now, 0.0))
+
+    def report(self) -> str:
+        lines = [f"{'단계':<28}{'시작':>10}{'소요':>10}"]
+        for name, offset, duration in sorted(self.phases, key=lambda p: p[1]):
+            took = f"{duration * 1000:.0f}ms" if duration else '-'
+            lines.append(f"{name:<28}{offset * 1000:>8.0f}ms{took:>10}")
+        return '\n'.join(lines)
+
+    def report_once(self):
+        """처음 준비 완료됐을 때 한 번만 출력 (재연결 시에는 무시)"""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        print(f"⏱️ 시작 단계별 소요 시간\n{self.report()}", flush=True)